@@ -0,0 +1,139 @@
+"""
+Adaptive evaluation with early stopping on confidence bounds.
+
+A full dev set evaluation is wasted on a program that is clearly worse than
+the best one seen so far. AdaptiveEvaluator scores the dev set in chunks and,
+after each chunk, computes a Wilson confidence interval for the program's
+accuracy. Once the upper bound falls below the best fully evaluated accuracy,
+the remaining examples are skipped.
+
+race() does the same for several programs at once: all of them are scored chunk
+by chunk in lockstep, and a program is dropped as soon as its upper bound falls
+below another program's lower bound (or below the best accuracy so far).
+
+A stopped program has no dev set accuracy: its result is a StoppedEvaluation
+whose score is None and which carries the upper bound of its interval and the
+number of examples it was scored on, so partial-sample accuracies never end up
+next to full dev set ones.
+"""
+
+import math
+from statistics import NormalDist
+
+from dspy.evaluate.evaluate import EvaluationResult
+
+
+def z_score(confidence):
+    """Two-sided normal quantile for a confidence level, e.g. 1.96 for 0.95"""
+    return NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+
+
+def wilson_interval(successes, n, z=1.96):
+    """Wilson score interval (low, high) for a proportion of successes out of n"""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+def _score(score):
+    return float(getattr(score, "score", score) or 0.0)
+
+
+class StoppedEvaluation(EvaluationResult):
+    """Result of an evaluation stopped early; score is None, upper_bound caps its dev set accuracy (%)"""
+
+    def __init__(self, results, upper_bound, total):
+        super().__init__(score=None, results=results)
+        self.upper_bound = upper_bound
+        self.total = total
+
+    def __repr__(self):
+        return (f"StoppedEvaluation(upper_bound={self.upper_bound}, "
+                f"results=<{len(self.results)}/{self.total} results>)")
+
+
+class AdaptiveEvaluator:
+    """Chunked evaluator that stops evaluating programs that can no longer be the best
+
+    Args:
+        evaluate_batch: evaluate_batch(programs, examples) -> one list of (example, prediction, score)
+            per program
+        devset (list): Examples to evaluate on
+        chunk_size (int): Examples scored between two stopping checks
+        confidence (float): Confidence level of the accuracy intervals
+        min_examples (int): Examples scored before a program may be stopped
+    """
+
+    def __init__(self, evaluate_batch, devset, chunk_size=8, confidence=0.95, min_examples=8):
+        self.evaluate_batch = evaluate_batch
+        self.devset = devset
+        self.chunk_size = max(1, chunk_size)
+        self.confidence = confidence
+        self.z = z_score(confidence)
+        self.min_examples = min_examples
+        self.best = None  # Best accuracy (0-1) of a program scored on the whole dev set
+        self.evaluations = 0
+        self.stopped = 0
+        self.examples_scored = 0
+        self.examples_skipped = 0
+
+    def interval(self, results):
+        """Confidence interval of the accuracy over scored (example, prediction, score) results"""
+        return wilson_interval(sum(_score(score) for _, _, score in results), len(results), self.z)
+
+    def __call__(self, program):
+        """Evaluate one program, stopping early once it is clearly below the best so far"""
+        return self.race([program])[0]
+
+    def race(self, programs):
+        """Evaluate programs in lockstep, dropping each one once it is clearly not the best"""
+        results = [[] for _ in programs]
+        active = list(range(len(programs)))
+        for start in range(0, len(self.devset), self.chunk_size):
+            examples = self.devset[start:start + self.chunk_size]
+            for index, scored in zip(active, self.evaluate_batch([programs[i] for i in active], examples)):
+                results[index].extend(scored)
+
+            scored_count = start + len(examples)
+            if scored_count < self.min_examples or scored_count >= len(self.devset):
+                continue
+            bounds = {index: self.interval(results[index]) for index in active}
+            threshold = max(low for low, _ in bounds.values()) if len(active) > 1 else 0.0
+            if self.best is not None:
+                threshold = max(threshold, self.best)
+            active = [index for index in active if bounds[index][1] >= threshold]
+            if not active:
+                break
+
+        return [self._finish(scored) for scored in results]
+
+    def _finish(self, results):
+        total = len(self.devset)
+        accuracy = sum(_score(score) for _, _, score in results) / len(results) if results else 0.0
+        self.evaluations += 1
+        self.examples_scored += len(results)
+        self.examples_skipped += total - len(results)
+        if len(results) < total:
+            self.stopped += 1
+            low, high = self.interval(results)
+            best = f"{100 * self.best:.1f}%" if self.best is not None else "the leading candidate"
+            print(f"Stopped early after {len(results)}/{total} examples: {100 * accuracy:.1f}% "
+                  f"({self.confidence:.0%} interval {100 * low:.1f}-{100 * high:.1f}%) can't beat {best}")
+            return StoppedEvaluation(results, round(100 * high, 2), total)
+        if self.best is None or accuracy > self.best:
+            self.best = accuracy
+        return EvaluationResult(score=round(100 * accuracy, 2), results=results)
+
+    def stats(self):
+        """Return early-stopping counters"""
+        return {
+            "evaluations": self.evaluations,
+            "stopped": self.stopped,
+            "examples_scored": self.examples_scored,
+            "examples_skipped": self.examples_skipped,
+            "confidence": self.confidence,
+        }
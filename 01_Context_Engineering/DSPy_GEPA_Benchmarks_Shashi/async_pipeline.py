@@ -0,0 +1,93 @@
+"""
+Asyncio execution mode for the evaluator-optimizer loop.
+
+aevaluate() is an async counterpart of dspy.Evaluate built as a two-stage
+pipeline: a generation stage calls the program through its async LM client and
+pushes predictions onto a bounded queue, and a scoring stage drains that queue.
+With an async LLM-as-a-judge metric, judging example N overlaps generating
+example N+1, so the model server always has work queued.
+"""
+
+import asyncio
+import inspect
+
+from dspy.evaluate.evaluate import EvaluationResult
+
+
+def get_event_loop():
+    """Return the event loop shared by every async step of a run, creating it on first use"""
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = None
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    return loop
+
+
+def run_concurrently(*coroutines):
+    """Run independent coroutines concurrently on the shared loop and return their results in order"""
+    async def gather():
+        return await asyncio.gather(*coroutines)
+
+    return get_event_loop().run_until_complete(gather())
+
+
+async def aevaluate(program, devset, metric, concurrency=8):
+    """Evaluate program on devset, overlapping generation and scoring
+
+    Args:
+        program: DSPy module; called with program.acall(**example.inputs())
+        devset (list): dspy.Example objects with inputs marked
+        metric: metric(gold, pred) -> score, either a plain function or a coroutine function
+        concurrency (int): Maximum examples in each stage at once
+
+    Returns:
+        EvaluationResult with the percentage score, like dspy.Evaluate
+    """
+    queue = asyncio.Queue(maxsize=concurrency)
+    slots = asyncio.Semaphore(concurrency)
+    results = [None] * len(devset)
+    errors = 0
+
+    async def generate(index, example):
+        nonlocal errors
+        async with slots:
+            try:
+                prediction = await program.acall(**example.inputs())
+            except Exception as e:
+                errors += 1
+                print(f"Error generating example {index}: {e}")
+                prediction = None
+        await queue.put((index, example, prediction))
+
+    async def generate_all():
+        await asyncio.gather(*(generate(i, ex) for i, ex in enumerate(devset)))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def score_worker():
+        nonlocal errors
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, example, prediction = item
+            score = 0.0
+            if prediction is not None:
+                try:
+                    score = metric(example, prediction)
+                    if inspect.isawaitable(score):
+                        score = await score
+                except Exception as e:
+                    errors += 1
+                    print(f"Error scoring example {index}: {e}")
+            results[index] = (example, prediction, score)
+
+    await asyncio.gather(generate_all(), *(score_worker() for _ in range(concurrency)))
+
+    total = sum(float(score) for _, _, score in results)
+    percentage = round(100 * total / len(devset), 2) if devset else 0.0
+    print(f"Average Metric: {total} / {len(devset)} ({percentage}%)" + (f", {errors} errors" if errors else ""))
+    return EvaluationResult(score=percentage, results=results)
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Batched multi-example prompting for the audience judge.
+
+The regular judge (dspy.ChainOfThought(Audience)) scores one joke per LM call,
+so every call pays the prefill of the same instructions and few-shot demos.
+BatchedJudge asks for B verdicts in one call instead: the judge's current
+instructions and demos are rendered once, followed by lists of topics and jokes,
+and the model answers with one reasoning and one funny/not-funny verdict per joke.
+If the batched answer cannot be parsed, or doesn't have one verdict per joke, the
+affected jokes fall back to the regular single-example judge.
+
+BatchedJudgeQueue sits between comedian generation and the judge. Every joke
+that needs judging is pushed onto one shared queue; a dispatcher thread collects
+up to `batch_size` pending jokes (waiting at most `max_wait` seconds for the batch
+to fill) and sends each micro-batch as one batched judge call. Callers get a
+per-joke Future, which keeps the LLM-as-a-judge metric's one-example-in,
+one-Prediction-out contract intact for dspy.Evaluate and GEPA.
+
+Sweep batch sizes to pick the sweet spot between accuracy and throughput:
+
+    python batched_judge.py --sizes 1 2 4 8 16
+    python batched_judge.py --student stub:student --sizes 1 4 8
+"""
+
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import dspy
+
+_STOP = object()
+
+BATCH_INSTRUCTIONS = (
+    "Judge every joke in the list independently. Return exactly one reasoning and one verdict per joke, "
+    "in the same order as the jokes."
+)
+
+
+def judge_predictor(judge):
+    """Return the Predict inside a judge program (the ChainOfThought's own predictor)"""
+    return judge.named_predictors()[0][1]
+
+
+def make_batched_signature(instructions):
+    """Batched version of the Audience signature with list inputs and outputs"""
+    fields = {
+        "topics": (list[str], dspy.InputField(desc="The topic of each joke")),
+        "jokes": (list[str], dspy.InputField(desc="The jokes being told, one per topic")),
+        "reasonings": (list[str], dspy.OutputField(desc="Short reasoning for each joke, in order")),
+        "funny": (list[bool], dspy.OutputField(desc="Whether each joke is funny, in order")),
+    }
+    return dspy.make_signature(
+        signature_name="BatchedAudience",
+        instructions=f"{instructions}\n\n{BATCH_INSTRUCTIONS}",
+        signature=fields,
+    )
+
+
+def batched_demos(demos):
+    """Fold the judge's few-shot demos into one batched demo, so they are sent once per call"""
+    if not demos:
+        return []
+    return [dspy.Example(
+        topics=[demo["topic"] for demo in demos],
+        jokes=[demo["joke"] for demo in demos],
+        reasonings=[demo.get("reasoning") or ("Funny." if demo["funny"] else "Not funny.") for demo in demos],
+        funny=[bool(demo["funny"]) for demo in demos],
+    )]
+
+
+class BatchedJudge:
+    """Scores several jokes per LM call, with per-item fallback to the single-example judge
+
+    Args:
+        judge: Single-example judge program (its instructions, demos and LM are reused)
+    """
+
+    def __init__(self, judge):
+        self.judge = judge
+        predictor = judge_predictor(judge)
+        self.predict = dspy.Predict(make_batched_signature(predictor.signature.instructions))
+        self.predict.demos = batched_demos(predictor.demos)
+        self.predict.set_lm(predictor.lm)
+        self.calls = 0
+        self.items = 0
+        self.fallbacks = 0
+        self.parse_failures = 0
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _parse(self, prediction, count):
+        """Per-item verdicts from a batched prediction; None where an item can't be trusted"""
+        reasonings, verdicts = prediction.reasonings or [], prediction.funny or []
+        if len(verdicts) != count:
+            return [None] * count  # Misaligned answer: no verdict can be matched to its joke
+        return [
+            dspy.Prediction(reasoning=reasonings[i] if i < len(reasonings) else "", funny=verdict)
+            if isinstance(verdict, bool) else None
+            for i, verdict in enumerate(verdicts)
+        ]
+
+    def __call__(self, items):
+        """Judge a list of (topic, joke) pairs; returns one Prediction(reasoning, funny) per pair"""
+        if len(items) == 1:
+            topic, joke = items[0]
+            results = [self.judge(topic=topic, joke=joke)]
+            with self._lock:
+                self.calls += 1
+                self.items += 1
+            return results
+
+        try:
+            prediction = self.predict(topics=[topic for topic, _ in items], jokes=[joke for _, joke in items])
+            results = self._parse(prediction, len(items))
+        except Exception:
+            results = [None] * len(items)
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        with self._lock:
+            self.calls += 1
+            self.items += len(items)
+            self.fallbacks += len(missing)
+            self.parse_failures += bool(missing)
+        for i in missing:
+            topic, joke = items[i]
+            results[i] = self.judge(topic=topic, joke=joke)
+        return results
+
+    def stats(self):
+        """Return batching and fallback counters"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "items": self.items,
+                "fallbacks": self.fallbacks,
+                "parse_failures": self.parse_failures,
+            }
+
+
+class BatchedJudgeQueue:
+    """Micro-batching front end that sends each collected batch to the judge as one batched prompt
+
+    Args:
+        judge: Single-example judge program, called as judge(topic=..., joke=...) on fallbacks
+        batch_size (int): Maximum jokes judged together
+        max_wait (float): Seconds to wait for a batch to fill before dispatching it
+        max_workers (int): Batched judge calls running at once
+    """
+
+    def __init__(self, judge, batch_size=8, max_wait=0.02, max_workers=8):
+        self.batched_judge = BatchedJudge(judge)
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.items = 0
+        self.batches = 0
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="judge")
+        self._dispatcher = threading.Thread(target=self._run, name="judge-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def __deepcopy__(self, memo):
+        # Metrics holding the queue may be deep-copied by DSPy; all copies feed the same queue
+        return self
+
+    def submit(self, topic, joke):
+        """Queue one joke for judging and return a Future for the judge's Prediction"""
+        future = Future()
+        self._pending.put((topic, joke, future))
+        return future
+
+    def __call__(self, topic, joke):
+        """Judge one joke, blocking until its batch has been processed"""
+        return self.submit(topic, joke).result()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._pending.put(_STOP)  # Dispatch this batch, then stop
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            item = self._pending.get()
+            if item is _STOP:
+                return
+            batch = self._collect(item)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+            self._executor.submit(self._judge_batch, batch)
+
+    def _judge_batch(self, batch):
+        try:
+            results = self.batched_judge([(topic, joke) for topic, joke, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        """Return batching and fallback counters"""
+        with self._lock:
+            stats = {
+                "items": self.items,
+                "batches": self.batches,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            }
+        return {**stats, **{f"prompt_{k}": v for k, v in self.batched_judge.stats().items()}}
+
+    def close(self):
+        """Finish queued work and stop the dispatcher"""
+        self._pending.put(_STOP)
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+
+def sweep_batch_sizes(judge, devset, sizes, concurrency=8):
+    """Judge the devset at each batch size; returns one row of accuracy and throughput per size"""
+    # Warm up outside the timed runs: the first calls pay for adapter and connection setup
+    BatchedJudge(judge)([(example.topic, example.joke) for example in devset[:2]])
+
+    rows = []
+    for size in sizes:
+        judge_queue = BatchedJudgeQueue(judge, batch_size=size, max_wait=0.05, max_workers=concurrency)
+        start = time.perf_counter()
+        futures = [judge_queue.submit(example.topic, example.joke) for example in devset]
+        verdicts = [future.result().funny for future in futures]
+        seconds = time.perf_counter() - start
+        judge_queue.close()
+
+        stats = judge_queue.batched_judge.stats()
+        correct = sum(verdict == example.funny for verdict, example in zip(verdicts, devset))
+        rows.append({
+            "batch_size": size,
+            "accuracy": 100 * correct / len(devset),
+            "seconds": seconds,
+            "jokes_per_sec": len(devset) / seconds,
+            "lm_calls": stats["calls"] + stats["fallbacks"],
+            "fallbacks": stats["fallbacks"],
+        })
+    return rows
+
+
+def render_sweep(rows):
+    """Markdown table of a batch-size sweep"""
+    lines = [
+        "| Batch size | Accuracy | Time | Jokes/s | LM calls | Fallbacks |",
+        "|------------|----------|------|---------|----------|-----------|",
+    ]
+    for row in rows:
+        lines.append(
+            f"| {row['batch_size']} | {row['accuracy']:.1f}% | {row['seconds']:.1f}s | {row['jokes_per_sec']:.2f} "
+            f"| {row['lm_calls']} | {row['fallbacks']} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    from evaluator_optimizer_dspy import (
+        create_audience_judge, create_joke_datasets, resolve_model, setup_environment,
+    )
+
+    parser = argparse.ArgumentParser(description="Compare audience judge accuracy and throughput per batch size")
+    parser.add_argument("--student", default="llama3.2:1b", help="Judge model (default: llama3.2:1b)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 2, 4, 8, 16], help="Batch sizes to compare")
+    parser.add_argument("--concurrency", type=int, default=8, help="Batches judged at once (default: 8)")
+    parser.add_argument("--cache-mode", default="off", help="Response cache mode (default: off, for fair timing)")
+    args = parser.parse_args()
+
+    student_model = resolve_model(args.student)
+    student_lm, _ = setup_environment(
+        student_model, student_model, cache_mode=args.cache_mode, concurrency=args.concurrency
+    )
+    trainset, valset, devset = create_joke_datasets()
+
+    # The judge as GEPA receives it: instructions plus LabeledFewShot(k=8) demos
+    judge = dspy.LabeledFewShot(k=8).compile(student=create_audience_judge(student_lm), trainset=trainset)
+    judge.set_lm(student_lm)
+
+    print()
+    print(render_sweep(sweep_batch_sizes(judge, devset + valset, args.sizes, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark harness for evaluator_optimizer_dspy.py.
+
+Runs every cell of a (student, teacher, concurrency, cache mode, max_evals)
+matrix `--repeats` times with fixed seeds (seed, seed + 1, ...), each run in its
+own process with --metrics-out. Reports accuracy and throughput (examples/sec,
+LM calls/sec, tokens/sec) as mean ± stdev per cell, and deltas against a
+stored baseline:
+
+    # Offline, against the deterministic stub backend (no Ollama needed)
+    python bench.py --student stub:student --teacher stub:teacher --repeats 3
+
+    # Local models, two concurrency levels
+    python bench.py --student llama3.2:1b llama3.1:8b --teacher llama3.1:8b --concurrency 8 16
+
+    python bench.py ... --save-baseline bench/baseline.json   # store results as the baseline
+    python bench.py ... --baseline bench/baseline.json        # compare against it
+
+Each run gets a fresh, empty response cache unless --cache-dir is given.
+
+--startup instead times the CLI paths that don't run the optimizer (--help,
+--list-models) and fails if one is over --startup-budget or imports DSPy:
+
+    python bench.py --startup
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from import_profile import heavy_imports, profile_command
+from lm_cache import CACHE_MODES
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "evaluator_optimizer_dspy.py")
+
+# Reported per run; throughput metrics regress when they drop, run time when it grows
+ACCURACY_METRICS = ("baseline_judge", "optimized_judge", "baseline_comedian", "optimized_comedian")
+THROUGHPUT_METRICS = ("examples_per_sec", "lm_calls_per_sec", "tokens_per_sec")
+TIME_METRICS = ("run_seconds", "wall_seconds")
+# CLI invocations that must start without loading DSPy
+STARTUP_COMMANDS = (("--help",), ("--list-models",))
+
+
+def cell_name(config):
+    """Stable, readable name for a matrix cell"""
+    return (f"{config['student']} + {config['teacher']}, concurrency {config['concurrency']}, "
+            f"cache {config['cache_mode']}, max_evals {config['max_evals']}")
+
+
+def run_metrics(summary, wall_seconds):
+    """Flatten one run's --metrics-out summary into accuracy and throughput numbers"""
+    seconds = summary["total_seconds"] or 1e-9
+    models = summary["models"].values()
+    calls = sum(stats["calls"] for stats in models)
+    tokens = sum(stats["prompt_tokens"] + stats["completion_tokens"] for stats in models)
+    # Accuracies of evaluations stopped early by --adaptive-eval are not in "scores" and stay out
+    scores = summary.get("scores", {})
+    record = {name: scores[name] for name in ACCURACY_METRICS if name in scores}
+    record.update({
+        "examples_per_sec": summary.get("counters", {}).get("examples", 0) / seconds,
+        "lm_calls_per_sec": calls / seconds,
+        "tokens_per_sec": tokens / seconds,
+        "run_seconds": summary["total_seconds"],
+        "wall_seconds": wall_seconds,
+    })
+    return record
+
+
+def run_once(config, seed, out_dir, cache_dir=None, ollama_url=None):
+    """Run the tutorial once for a cell and seed; returns the flattened metrics or None on failure"""
+    metrics_path = os.path.join(out_dir, f"seed{seed}.json")
+    log_path = os.path.join(out_dir, f"seed{seed}.log")
+
+    with tempfile.TemporaryDirectory(prefix="bench-cache-") as fresh_cache:
+        command = [
+            sys.executable, SCRIPT,
+            "--student", config["student"],
+            "--teacher", config["teacher"],
+            "--concurrency", str(config["concurrency"]),
+            "--cache-mode", config["cache_mode"],
+            "--cache-dir", cache_dir or fresh_cache,
+            "--max-evals", str(config["max_evals"]),
+            "--seed", str(seed),
+            "--metrics-out", metrics_path,
+        ]
+        if ollama_url:
+            command += ["--ollama-url", ollama_url]
+        start = time.perf_counter()
+        with open(log_path, "w", encoding="utf-8") as log:
+            process = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT)
+        wall_seconds = time.perf_counter() - start
+
+    if process.returncode != 0 or not os.path.exists(metrics_path):
+        print(f"   run failed (exit code {process.returncode}), see {log_path}")
+        return None
+    with open(metrics_path, encoding="utf-8") as f:
+        return run_metrics(json.load(f), wall_seconds)
+
+
+def aggregate(runs):
+    """Mean and stdev of every metric over a cell's successful runs that recorded it"""
+    stats = {}
+    for metric in dict.fromkeys(metric for run in runs for metric in run):
+        values = [run[metric] for run in runs if metric in run]
+        stats[metric] = {
+            "mean": statistics.fmean(values),
+            "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        }
+    return stats
+
+
+def compare(stats, baseline_stats, tolerance):
+    """Deltas against the baseline cell; returns (deltas, regressed metric names)"""
+    deltas, regressions = {}, []
+    for metric, current in stats.items():
+        if metric not in baseline_stats:
+            continue
+        before, after = baseline_stats[metric]["mean"], current["mean"]
+        if metric in ACCURACY_METRICS:
+            deltas[metric] = after - before  # percentage points
+            continue
+        change = (after - before) / before if before else 0.0
+        deltas[metric] = change
+        if metric in THROUGHPUT_METRICS and change < -tolerance:
+            regressions.append(metric)
+        if metric in TIME_METRICS and change > tolerance:
+            regressions.append(metric)
+    return deltas, regressions
+
+
+def _fmt(stat, digits=1, unit=""):
+    if stat is None:
+        return "n/a"
+    return f"{stat['mean']:.{digits}f} ± {stat['stdev']:.{digits}f}{unit}"
+
+
+def _points(delta):
+    return "n/a" if delta is None else f"{delta:+.1f}"
+
+
+def render_report(cells):
+    """Markdown table of the benchmark results, plus baseline deltas when present"""
+    lines = [
+        "| Cell | Runs | Optimized judge | Optimized comedian | Examples/s | LM calls/s | Tokens/s | Run time (s) |",
+        "|------|------|-----------------|--------------------|------------|------------|----------|--------------|",
+    ]
+    for name, cell in cells.items():
+        stats = cell["stats"]
+        if not stats:
+            lines.append(f"| {name} | 0/{cell['repeats']} | failed | | | | | |")
+            continue
+        lines.append(
+            f"| {name} | {len(cell['runs'])}/{cell['repeats']} | {_fmt(stats['optimized_judge'])}% "
+            f"| {_fmt(stats['optimized_comedian'])}% | {_fmt(stats['examples_per_sec'])} "
+            f"| {_fmt(stats['lm_calls_per_sec'])} | {_fmt(stats['tokens_per_sec'], 0)} | {_fmt(stats['run_seconds'])} |"
+        )
+
+    compared = {name: cell for name, cell in cells.items() if cell.get("deltas")}
+    if compared:
+        lines += ["", "| Cell | Judge (pts) | Comedian (pts) | Examples/s | LM calls/s | Tokens/s | Run time | Regressions |",
+                  "|------|-------------|----------------|------------|------------|----------|----------|-------------|"]
+        for name, cell in compared.items():
+            d = cell["deltas"]
+            lines.append(
+                f"| {name} | {_points(d.get('optimized_judge'))} | {_points(d.get('optimized_comedian'))} "
+                f"| {d['examples_per_sec']:+.1%} | {d['lm_calls_per_sec']:+.1%} | {d['tokens_per_sec']:+.1%} "
+                f"| {d['run_seconds']:+.1%} | {', '.join(cell['regressions']) or 'none'} |"
+            )
+    return "\n".join(lines)
+
+
+def measure_startup(args, repeats=5):
+    """Median wall time (s) of the tutorial run with these arguments, and the heavy modules it imports"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, *args], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    _, records = profile_command([SCRIPT, *args], stdout=subprocess.DEVNULL)
+    return statistics.median(times), heavy_imports(records)
+
+
+def check_startup(budget, repeats=5):
+    """Time every STARTUP_COMMANDS entry; returns (markdown table, failed commands)"""
+    lines = [
+        "| Command | Median (s) | Budget (s) | Heavy imports | Status |",
+        "|---------|------------|------------|---------------|--------|",
+    ]
+    failed = []
+    for args in STARTUP_COMMANDS:
+        command = " ".join(args)
+        seconds, heavy = measure_startup(args, repeats)
+        ok = seconds <= budget and not heavy
+        if not ok:
+            failed.append(command)
+        lines.append(f"| {command} | {seconds:.3f} | {budget:.2f} | {', '.join(heavy) or 'none'} | "
+                     f"{'ok' if ok else 'FAIL'} |")
+    return "\n".join(lines), failed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark evaluator_optimizer_dspy.py over a matrix of configurations",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("\n\n", 2)[2],
+    )
+    parser.add_argument("--student", nargs="+", default=["llama3.2:1b"], help="Student model(s)")
+    parser.add_argument("--teacher", nargs="+", default=["llama3.1:8b"], help="Teacher model(s)")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[8], help="Concurrency level(s)")
+    parser.add_argument("--cache-mode", nargs="+", choices=CACHE_MODES, default=["write"], help="Cache mode(s)")
+    parser.add_argument("--max-evals", nargs="+", type=int, default=[1], help="GEPA budget(s) in full evaluations")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per cell (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first run in each cell (default: 0)")
+    parser.add_argument("--cache-dir", default=None, help="Share this response cache between runs instead of a fresh one")
+    parser.add_argument("--out", default="bench_results", help="Directory for run logs and results (default: bench_results)")
+    parser.add_argument("--baseline", default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", default=None, help="Also write the results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Relative throughput drop / run time increase counted as a regression (default: 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on any regression")
+    parser.add_argument("--startup", action="store_true",
+                        help="Only check CLI startup time (--help, --list-models); exits with status 1 if too slow")
+    parser.add_argument("--startup-budget", type=float, default=0.5,
+                        help="Median seconds allowed for each startup check (default: 0.5)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.startup:
+        table, failed = check_startup(args.startup_budget, args.repeats)
+        print(table)
+        if failed:
+            print(f"Startup regression in: {', '.join(failed)}")
+        return 1 if failed else 0
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["cells"]
+
+    matrix = itertools.product(args.student, args.teacher, args.concurrency, args.cache_mode, args.max_evals)
+    cells = {}
+    for student, teacher, concurrency, cache_mode, max_evals in matrix:
+        config = {"student": student, "teacher": teacher, "concurrency": concurrency,
+                  "cache_mode": cache_mode, "max_evals": max_evals}
+        name = cell_name(config)
+        cell_dir = os.path.join(args.out, stamp, f"cell{len(cells):02d}")
+        os.makedirs(cell_dir, exist_ok=True)
+        print(f"{name} ({args.repeats} runs)")
+
+        runs = []
+        for seed in range(args.seed, args.seed + args.repeats):
+            record = run_once(config, seed, cell_dir, args.cache_dir)
+            if record is not None:
+                print(f"   seed {seed}: {record['run_seconds']:.1f}s, {record['examples_per_sec']:.1f} examples/s")
+                runs.append(dict(record, seed=seed))
+
+        metrics = [{k: v for k, v in run.items() if k != "seed"} for run in runs]
+        cell = {"config": config, "repeats": args.repeats, "runs": runs, "stats": aggregate(metrics) if runs else {}}
+        if name in baseline and cell["stats"]:
+            cell["deltas"], cell["regressions"] = compare(cell["stats"], baseline[name]["stats"], args.tolerance)
+        cells[name] = cell
+
+    results = {"created": stamp, "seeds": list(range(args.seed, args.seed + args.repeats)), "cells": cells}
+    results_path = os.path.join(args.out, f"bench-{stamp}.json")
+    for path in filter(None, (results_path, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    print()
+    print(render_report(cells))
+    print(f"\nResults written to {results_path}")
+
+    regressed = [name for name, cell in cells.items() if cell.get("regressions")]
+    if regressed:
+        print(f"Regressions in {len(regressed)} cell(s) (tolerance {args.tolerance:.0%})")
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,40 +22,93 @@ Prerequisites:
 Original notebook: evaluator-optimizer-in-dspy.ipynb
 """
 
-import dspy
 import os
 import random
 import argparse
-from dotenv import load_dotenv
+import sys
 
-def setup_environment(student_model="ollama_chat/llama3.2:1b", teacher_model="ollama_chat/llama3.1:8b"):
+from incremental import IncrementalEvaluator, IncrementalStore, incremental_budget
+from instrumentation import RunMetrics, format_score, render_summary, score_value, split_scores
+from joke_data import load_joke_datasets, reservoir_sample
+from judge_memo import JudgeMemo, program_fingerprint
+from lm_cache import CACHE_MODES, ResponseCache
+from program_artifact import describe_program, save_artifact
+from residency import ResidencyScheduler
+from run_checkpoint import RunCheckpoint
+from token_budget import TokenBudget
+
+# DSPy (with LiteLLM behind it) takes seconds to import on a cold start, so it, dotenv and the
+# modules built on DSPy are imported inside the functions that use them: --help, --list-models
+# and --import-profile return without loading any of them
+
+def setup_environment(student_model="ollama_chat/llama3.2:1b", teacher_model="ollama_chat/llama3.1:8b",
+                      cache_dir=".lm_cache", cache_mode="write", cache_max_mb=512, concurrency=8, metrics=None,
+                      seed=None, keep_alive=None, scheduler=None, ollama_url=None, token_budget=None,
+                      resilience=None):
     """Setup DSPy environment and language models using Ollama
     
     Args:
         student_model (str): Model for the student LM (default: llama3.2:1b)
         teacher_model (str): Model for the teacher LM (default: llama3.1:8b)
+        cache_dir (str): Directory for the persistent LM response cache
+        cache_mode (str): "write" (read and store), "read" (read-only) or "off"
+        cache_max_mb (float): Size limit of the response cache before LRU eviction
+        concurrency (int): Maximum requests in flight per LM (size of its connection pool)
+        metrics (RunMetrics): Optional recorder for LM calls, tokens and latency
+        seed (int): Optional sampling seed, for reproducible runs
+        keep_alive: How long Ollama keeps each model loaded after a request (seconds, -1 or e.g. "30m")
+        scheduler (ResidencyScheduler): Optional scheduler admitting student and teacher calls in phases
+        ollama_url (str): Ollama server URL (default: OLLAMA_HOST, then http://localhost:11434)
+        token_budget (TokenBudget): Optional per-predictor max_tokens budgets shared by both LMs
+        resilience (Resilience): Optional deadline, retry, hedging and circuit breaker policy shared by both LMs
     """
+    from dotenv import load_dotenv
+    from local_lm import LocalLM
+    from stub_lm import StubLM, is_stub_model
+    
     # Load environment variables from .env file (optional for Ollama)
     load_dotenv()
     
-    # Disable caching to avoid database file issues
-    import dspy
-    dspy.settings.configure(cache=False)
+    # Share one on-disk response cache between both LMs (replaces DSPy's SQLite cache)
+    response_cache = ResponseCache(cache_dir, mode=cache_mode, max_size_mb=cache_max_mb)
     
     print(f"Using student model: {student_model}")
     print(f"Using teacher model: {teacher_model}")
+    print(f"Response cache: {cache_dir} (mode: {cache_mode})")
+    
+    # "stub:<name>" models are served offline by the deterministic StubLM
+    student_class = StubLM if is_stub_model(student_model) else LocalLM
+    teacher_class = StubLM if is_stub_model(teacher_model) else LocalLM
     
     # Initialize Ollama language model for student (main model)
-    student_lm = dspy.LM(
+    student_lm = student_class(
         model=student_model,
+        response_cache=response_cache,
+        concurrency=concurrency,
+        metrics=metrics,
+        seed=seed,
+        keep_alive=keep_alive,
+        scheduler=scheduler,
+        base_url=ollama_url,
+        token_budget=token_budget,
+        resilience=resilience,
         api_key="",  # Ollama doesn't require API key
         max_tokens=4000,
         temperature=1.0
     )
     
     # Initialize teacher model for optimization (can use same or different model)
-    teacher_lm = dspy.LM(
+    teacher_lm = teacher_class(
         model=teacher_model,
+        response_cache=response_cache,
+        concurrency=concurrency,
+        metrics=metrics,
+        seed=seed,
+        keep_alive=keep_alive,
+        scheduler=scheduler,
+        base_url=ollama_url,
+        token_budget=token_budget,
+        resilience=resilience,
         api_key="",  # Ollama doesn't require API key
         temperature=1.0,
         max_tokens=4000
@@ -65,6 +118,8 @@ def setup_environment(student_model="ollama_chat/llama3.2:1b", teacher_model="ol
 
 def create_joke_datasets():
     """Create training, validation, and development datasets"""
+    import dspy
+    
     random.seed(69)  # Set seed for reproducibility
     
     # Dataset of professional comedian jokes (labeled as funny)
@@ -200,6 +255,8 @@ def create_joke_datasets():
 
 def create_comedian_program(student_lm):
     """Create the basic joke generation program"""
+    import dspy
+    
     # Define custom instructions for our joke generator
     instructions = """Tell a funny joke about the topic in the style of the comedian"""
     
@@ -225,6 +282,8 @@ def create_comedian_program(student_lm):
 
 def create_audience_judge(student_lm):
     """Create the joke evaluation program using Chain of Thought"""
+    import dspy
+    
     # Define custom instructions for our joke judge
     instructions = """You are in the audience at a comedy show and must decide if the joke is funny."""
     
@@ -247,29 +306,209 @@ def create_audience_judge(student_lm):
     
     return audience_program
 
-def exact_match(gold: dspy.Example, pred: dspy.Prediction, trace=None, pred_name=None, pred_trace=None):
+def exact_match(gold: "dspy.Example", pred: "dspy.Prediction", trace=None, pred_name=None, pred_trace=None):
     """Check if the predicted 'funny' label matches the gold answer"""
     return gold.funny == pred.funny
 
-def create_audience_metric(optimized_audience):
-    """Create LLM-as-a-Judge metric for evaluating jokes"""
+def create_audience_metric(optimized_audience, judge_queue=None, judge_memo=None):
+    """Create LLM-as-a-Judge metric for evaluating jokes
+    
+    Args:
+        optimized_audience: Judge program used to score each joke
+        judge_queue (BatchedJudgeQueue): Optional micro-batching queue in front of the judge
+        judge_memo (JudgeMemo): Optional memo of verdicts, so duplicate jokes are judged once
+    """
+    import dspy
+    
+    judge = judge_queue if judge_queue is not None else optimized_audience
+    judge_hash = program_fingerprint(optimized_audience) if judge_memo is not None else None
+    
     def audience_metric(gold: dspy.Example, pred: dspy.Prediction, trace=None, pred_name=None, pred_trace=None):
         """Check if the joke is funny or not using the llm-as-a-judge technique"""
-        response = optimized_audience(topic=gold.topic, joke=pred.joke)
+        if judge_memo is not None:
+            verdict = judge_memo.get(gold.topic, pred.joke, judge_hash)
+            if verdict is not None:
+                return dspy.Prediction(score=verdict["funny"], feedback=verdict["reasoning"])
+        
+        response = judge(topic=gold.topic, joke=pred.joke)
+        if judge_memo is not None:
+            judge_memo.put(gold.topic, pred.joke, judge_hash, response.funny, response.reasoning)
         # Return feedback for the GEPA optimizer
         return dspy.Prediction(score=response.funny, feedback=response.reasoning)
     
     return audience_metric
 
-def optimize_with_gepa(program, trainset, valset, metric, teacher_lm, max_evals=1):
-    """Optimize a program using GEPA evolutionary optimizer"""
+def create_async_audience_metric(optimized_audience, judge_memo=None):
+    """Create the LLM-as-a-Judge metric for the --async pipeline (judges via the async LM client)"""
+    import dspy
+    
+    judge_hash = program_fingerprint(optimized_audience) if judge_memo is not None else None
+    
+    async def audience_ametric(gold: dspy.Example, pred: dspy.Prediction, trace=None, pred_name=None, pred_trace=None):
+        """Async version of audience_metric"""
+        if judge_memo is not None:
+            verdict = judge_memo.get(gold.topic, pred.joke, judge_hash)
+            if verdict is not None:
+                return dspy.Prediction(score=verdict["funny"], feedback=verdict["reasoning"])
+        
+        response = await optimized_audience.acall(topic=gold.topic, joke=pred.joke)
+        if judge_memo is not None:
+            judge_memo.put(gold.topic, pred.joke, judge_hash, response.funny, response.reasoning)
+        return dspy.Prediction(score=response.funny, feedback=response.reasoning)
+    
+    return audience_ametric
+
+def create_evaluator(metric, devset, concurrency=8, use_async=False, adaptive=False, confidence=0.95, trace=None):
+    """Create an evaluator callable: dspy.Evaluate, or the async generate/score pipeline in --async mode
+    
+    With adaptive=True the evaluator is an AdaptiveEvaluator, which scores the devset in chunks
+    and stops once a program is clearly below the best one evaluated so far.
+    With a trace callback, trace(program, results) receives the per-example results of every evaluation.
+    """
+    import dspy
+    from adaptive_eval import AdaptiveEvaluator
+    from async_pipeline import aevaluate, run_concurrently
+    
+    if adaptive:
+        def evaluate_batch(programs, examples):
+            if use_async:
+                return [
+                    result.results for result in evaluate_concurrently(programs, examples, metric, concurrency, trace)
+                ]
+            evaluate = dspy.Evaluate(metric=metric, devset=examples, num_threads=concurrency, display_progress=False)
+            batch = [evaluate(program).results for program in programs]
+            if trace is not None:
+                for program, results in zip(programs, batch):
+                    trace(program, results)
+            return batch
+        
+        return AdaptiveEvaluator(evaluate_batch, devset, chunk_size=concurrency, confidence=confidence)
+    
+    if use_async:
+        evaluate = lambda program: run_concurrently(aevaluate(program, devset, metric, concurrency))[0]
+    else:
+        evaluate = dspy.Evaluate(
+            metric=metric,
+            devset=devset,
+            num_threads=concurrency,  # In-flight LM calls are bounded by each LM's connection pool
+            display_progress=True,
+            display_table=5
+        )
+    if trace is None:
+        return evaluate
+    
+    def evaluate_traced(program):
+        result = evaluate(program)
+        trace(program, result.results)
+        return result
+    
+    return evaluate_traced
+
+def evaluate_concurrently(programs, devset, metric, concurrency=8, trace=None):
+    """Evaluate independent programs at the same time with the async pipeline"""
+    from async_pipeline import aevaluate, run_concurrently
+    
+    results = run_concurrently(*(aevaluate(program, devset, metric, concurrency) for program in programs))
+    if trace is not None:
+        for program, result in zip(programs, results):
+            trace(program, result.results)
+    return results
+
+def run_steps(checkpoint, steps, evaluate, depends_on=None):
+    """Score one or more steps with evaluate(), or reuse their scores if a resumed run finished them
+    
+    Args:
+        depends_on (str): What the scores depend on (e.g. the judge's fingerprint); scores recorded
+            under another key are computed again
+    """
+    if checkpoint is not None and all(checkpoint.done(step, depends_on) for step in steps):
+        print(f"Resumed: reusing {', '.join(steps)} from {checkpoint.run_dir}")
+        return [checkpoint.result(step) for step in steps]
+    
+    scores = [score_value(score) for score in evaluate()]
+    if checkpoint is not None:
+        for step, score in zip(steps, scores):
+            checkpoint.finish(step, score, depends_on)
+    return scores
+
+def run_step(checkpoint, step, evaluate, depends_on=None):
+    """Single-step version of run_steps"""
+    return run_steps(checkpoint, (step,), lambda: [evaluate()], depends_on)[0]
+
+def optimize_checkpointed(checkpoint, name, program, lm, optimize, depends_on=None):
+    """Run a GEPA phase via optimize(log_dir), or load its program if a resumed run finished it
+    
+    With depends_on (e.g. the judge's fingerprint), only a program and GEPA log saved under the
+    same key are reused.
+    """
+    if checkpoint is not None:
+        saved = checkpoint.load_program(name, program, lm, depends_on)
+        if saved is not None:
+            print(f"Resumed: loaded optimized {name} from {checkpoint.program_path(name)}")
+            return saved
+    
+    optimized = optimize(checkpoint.gepa_dir(name, depends_on) if checkpoint is not None else None)
+    if checkpoint is not None:
+        checkpoint.save_program(name, optimized, depends_on)
+    return optimized
+
+def optimize_incremental(store, name, program, lm, trainset, valset, max_evals, optimize, setting=None):
+    """Run a GEPA phase via optimize(start, max_metric_calls), warm-started from an incremental store
+    
+    Without a store, before the store has a program for this phase, or when the phase's setting
+    changed, GEPA starts from `program` with its full budget. Otherwise unchanged train/val data
+    reuses the saved program, and changed data starts GEPA from it with the budget scaled to the
+    examples added and removed.
+    
+    Args:
+        setting (dict): Student and teacher models, starting program and metric fingerprints; the
+            saved program is only reused or warm-started from under the same setting
+    """
+    if store is None:
+        return optimize(program, None)
+    
+    saved = store.load_program(name, program, lm)
+    delta = store.delta(name, trainset, valset, setting)
+    if saved is None or delta.setting_changed:
+        if saved is not None:
+            print(f"Incremental: {name} models, starting program or metric changed, optimizing it from scratch")
+        store.record_phase(name, "cold", delta)
+        optimized = optimize(program, None)
+    elif not delta.changed:
+        print(f"Incremental: {name} train/val data unchanged, reusing its program from {store.directory}")
+        store.record_phase(name, "reused", delta, 0)
+        return saved
+    else:
+        budget = incremental_budget(max_evals * (len(trainset) + len(valset)), delta.fraction, len(valset))
+        print(f"Incremental: warm-starting {name} from its saved program "
+              f"(+{delta.added}/-{delta.removed} examples, {budget} metric calls)")
+        store.record_phase(name, "warm", delta, budget)
+        optimized = optimize(saved, budget)
+    store.save_program(name, optimized, trainset, valset, setting)
+    return optimized
+
+def optimize_with_gepa(program, trainset, valset, metric, teacher_lm, max_evals=1, num_threads=8, seed=0,
+                       log_dir=None, max_metric_calls=None, trace=None):
+    """Optimize a program using GEPA evolutionary optimizer
+    
+    With a log_dir, GEPA checkpoints its candidate pool, Pareto scores and per-example
+    results there after every iteration, and continues from them when run again.
+    A max_metric_calls budget replaces max_evals (used by incremental runs).
+    With a trace callback, trace(detailed_results, valset) receives GEPA's per-candidate
+    validation scores, which are then dropped from the returned program.
+    """
+    import dspy
+    
+    budget = {"max_metric_calls": max_metric_calls} if max_metric_calls else {"max_full_evals": max_evals}
     optimizer = dspy.GEPA(
         metric=metric,
-        max_full_evals=max_evals,
-        num_threads=1,  # Reduced from 16 to avoid file descriptor limits
+        **budget,
+        num_threads=num_threads,  # In-flight LM calls are bounded by each LM's connection pool
         track_stats=True,
         use_merge=False,
         reflection_lm=teacher_lm,
+        seed=seed,
+        log_dir=log_dir,
     )
     
     optimized_program = optimizer.compile(
@@ -277,6 +516,9 @@ def optimize_with_gepa(program, trainset, valset, metric, teacher_lm, max_evals=
         trainset=trainset,
         valset=valset,
     )
+    if trace is not None:
+        trace(optimized_program.detailed_results, valset)
+        optimized_program.detailed_results = None  # Persisted by trace; don't keep every candidate in memory
     
     return optimized_program
 
@@ -288,6 +530,8 @@ def test_comedian_program(comedian_program):
 
 def export_optimized_prompt(optimized_comedian):
     """Export the optimized prompt to OpenAI format"""
+    import dspy
+    
     prompt = {
         name: dspy.ChatAdapter().format(
             p.signature,
@@ -301,22 +545,144 @@ def export_optimized_prompt(optimized_comedian):
     print(prompt[0]["content"])
     return prompt
 
-def main(student_model="ollama_chat/llama3.2:1b", teacher_model="ollama_chat/llama3.1:8b"):
+def main(student_model="ollama_chat/llama3.2:1b", teacher_model="ollama_chat/llama3.1:8b",
+         cache_dir=".lm_cache", cache_mode="write", cache_max_mb=512, concurrency=8, use_async=False,
+         judge_batch_size=8, judge_batch_wait_ms=20, judge_prompt_batch=False, judge_memo_size=10000,
+         judge_memo_path=None,
+         metrics_out=None, seed=None, max_evals=1, dataset=None, trainset_size=None, valset_size=None,
+         devset_size=None, run_dir=None, keep_alive=None, model_phases=False, phase_max_wait=30,
+         unload_on_switch=False, adaptive_eval="off", confidence=0.95, ollama_url=None, artifact_path=None,
+         token_budgets=False, budget_headroom=1.5, budget_min_samples=20, incremental_dir=None,
+         traces_path=None, call_deadline=None, attempt_timeout=600.0, retries=3, hedge_after=None,
+         breaker_failures=10, breaker_cooldown=10.0):
     """Main execution function demonstrating the evaluator-optimizer pattern
     
     Args:
         student_model (str): Model for the student LM
         teacher_model (str): Model for the teacher LM  
+        cache_dir (str): Directory for the persistent LM response cache
+        cache_mode (str): Response cache mode ("write", "read" or "off")
+        cache_max_mb (float): Size limit of the response cache
+        concurrency (int): Evaluation threads and maximum in-flight requests per LM
+        use_async (bool): Run evaluations through async LM clients, overlapping independent steps
+        judge_batch_size (int): Jokes per batched judge prompt with judge_prompt_batch (1 disables batching)
+        judge_batch_wait_ms (float): Time to wait for a judge batch to fill (with judge_prompt_batch)
+        judge_prompt_batch (bool): Judge each batch in one multi-example prompt instead of one call per joke
+        judge_memo_size (int): Judge verdicts memoized in memory (0 disables the memo)
+        judge_memo_path (str): Optional JSON file persisting memoized verdicts across runs
+        metrics_out (str): Optional path for the run metrics (.json or .csv)
+        seed (int): Optional seed for the LMs and GEPA, for reproducible benchmark runs
+        max_evals (int): GEPA budget in full evaluations of the validation set
+        dataset (str): Optional .jsonl/.json/.csv/.parquet file of labeled jokes (default: the built-in jokes)
+        trainset_size (int): Reservoir-sample the training set down to this size
+        valset_size (int): Reservoir-sample the validation set down to this size
+        devset_size (int): Reservoir-sample the development set down to this size
+        run_dir (str): Optional run directory for checkpoints; a run started with the same
+            directory resumes from them
+        keep_alive: How long Ollama keeps each model loaded after a request (None for the server default)
+        model_phases (bool): Run student and teacher calls in separate phases instead of interleaving them
+        phase_max_wait (float): Seconds a queued call for the other model waits before the phase is drained
+        unload_on_switch (bool): Unload the previous model from Ollama when switching phases
+        adaptive_eval (str): "off", "sequential" (stop evaluations that can't beat the best so far) or
+            "race" (also race the basic and few-shot programs against each other)
+        confidence (float): Confidence level of the adaptive evaluation's accuracy intervals
+        ollama_url (str): Ollama server URL (default: OLLAMA_HOST, then http://localhost:11434)
+        artifact_path (str): Optional path to save the optimized programs as a serving artifact
+        token_budgets (bool): Limit each predictor's max_tokens to its observed p99 output length times
+            budget_headroom, with a stop sequence at the completed marker
+        budget_headroom (float): Budget as a multiple of the p99 output length
+        budget_min_samples (int): Calls observed per predictor before its budget applies
+        incremental_dir (str): Optional directory of scores and programs from earlier runs; evaluations
+            reuse stored per-example scores and GEPA phases warm-start from the saved programs
+        traces_path (str): Optional Arrow file to stream per-example evaluation results and GEPA
+            validation scores to (requires pyarrow)
+        call_deadline (float): Seconds an LM call may take including retries (None for no deadline)
+        attempt_timeout (float): Timeout of a single LM request in seconds
+        retries (int): Retries of failed LM requests, with jittered exponential backoff
+        hedge_after: Send a duplicate of an LM request still running after this many seconds, or after
+            the model's observed latency percentile for values like "p95" (None disables hedging)
+        breaker_failures (int): Consecutive failed requests that open a model's circuit breaker (0 disables it)
+        breaker_cooldown (float): Seconds an open circuit breaker holds calls before probing the model again
     """
+    import dspy
+    from batched_judge import BatchedJudgeQueue
+    from resilience import Resilience
+    
     print("=== DSPy Evaluator-Optimizer Tutorial (Ollama Version) ===")
     print("Building a joke-telling AI with GEPA optimization using local models\n")
     
+    metrics = RunMetrics()
+    metrics.set("config", {
+        "student": student_model.split("/", 1)[-1],
+        "teacher": teacher_model.split("/", 1)[-1],
+        "concurrency": concurrency,
+        "cache_mode": cache_mode,
+        "async": use_async,
+        "judge_batch_size": judge_batch_size,
+        "judge_prompt_batch": judge_prompt_batch,
+        "seed": seed,
+        "max_evals": max_evals,
+        "dataset": dataset,
+        "keep_alive": keep_alive,
+        "model_phases": model_phases,
+        "adaptive_eval": adaptive_eval,
+        "token_budgets": token_budgets,
+        "hedge_after": hedge_after,
+    })
+    
+    checkpoint = None
+    if run_dir:
+        checkpoint = RunCheckpoint(run_dir)
+        checkpoint.save_config({
+            "student_model": student_model,
+            "teacher_model": teacher_model,
+            "seed": seed,
+            "max_evals": max_evals,
+            "dataset": dataset,
+            "trainset_size": trainset_size,
+            "valset_size": valset_size,
+            "devset_size": devset_size,
+        })
+        print(f"Checkpointing to {run_dir}\n")
+    
+    store = None
+    if incremental_dir:
+        store = IncrementalStore(incremental_dir)
+        print(f"Incremental: reusing scores and programs from {incremental_dir}\n")
+        if adaptive_eval != "off":
+            # Stored scores already skip the unchanged examples; adaptive stopping needs whole evaluations
+            print("Incremental: adaptive evaluation is turned off\n")
+            adaptive_eval = "off"
+    
+    traces = None
+    if traces_path:
+        from trace_store import TraceWriter
+        
+        traces = TraceWriter(traces_path)
+        print(f"Streaming evaluation traces to {traces_path}\n")
+    
     # Setup environment
     print("1. Setting up Ollama environment...")
+    metrics.start_phase("setup")
     print(f"   Using student model: {student_model}")
     print(f"   Using teacher model: {teacher_model}")
     print("   Make sure Ollama is running and models are pulled")
-    student_lm, teacher_lm = setup_environment(student_model, teacher_model)
+    student_lm, teacher_lm = setup_environment(
+        student_model, teacher_model, cache_dir, cache_mode, cache_max_mb, concurrency, metrics, seed,
+        keep_alive=keep_alive,
+        scheduler=ResidencyScheduler(phase_max_wait, unload_on_switch) if model_phases else None,
+        ollama_url=ollama_url,
+        token_budget=TokenBudget(budget_headroom, budget_min_samples) if token_budgets else None,
+        resilience=Resilience(
+            deadline=call_deadline,
+            attempt_timeout=attempt_timeout,
+            retries=retries,
+            hedge_after=hedge_after,
+            breaker_failures=breaker_failures,
+            breaker_cooldown=breaker_cooldown,
+            seed=seed,
+        ),
+    )
     
     # Test language model
     test_response = student_lm("Hello")
@@ -324,17 +690,30 @@ def main(student_model="ollama_chat/llama3.2:1b", teacher_model="ollama_chat/lla
     
     # Create datasets
     print("2. Creating datasets...")
-    trainset, valset, devset = create_joke_datasets()
+    metrics.start_phase("datasets")
+    sizes = (trainset_size, valset_size, devset_size)
+    if dataset:
+        trainset, valset, devset = load_joke_datasets(dataset, *sizes, seed=seed or 0)
+    else:
+        trainset, valset, devset = create_joke_datasets()
+        if any(sizes):
+            trainset, valset, devset = (
+                reservoir_sample(split, size, seed or 0) if size else split
+                for split, size in zip((trainset, valset, devset), sizes)
+            )
+            print(f"Sampled to {len(trainset)} / {len(valset)} / {len(devset)} examples")
     print()
     
     # Create basic comedian program
     print("3. Creating comedian program...")
+    metrics.start_phase("comedian_program")
     comedian_program = create_comedian_program(student_lm)
     test_comedian_program(comedian_program)
     print()
     
     # Create audience judge
     print("4. Creating audience judge...")
+    metrics.start_phase("audience_judge")
     audience_program = create_audience_judge(student_lm)
     
     # Test audience judge
@@ -345,44 +724,103 @@ def main(student_model="ollama_chat/llama3.2:1b", teacher_model="ollama_chat/lla
     
     # Evaluate basic audience judge
     print("5. Evaluating basic audience judge...")
-    evaluate_audience = dspy.Evaluate(
-        metric=exact_match,
-        devset=devset,
-        num_threads=1,  # Reduced from 16 to avoid file descriptor limits
-        display_progress=True,
-        display_table=5
+    metrics.start_phase("judge_baseline_eval")
+    judge_metric = metrics.counted(exact_match)
+    adaptive = adaptive_eval != "off"
+    audience_trace = traces.evaluation_tracer("audience") if traces is not None else None
+    evaluate_audience = create_evaluator(
+        judge_metric, devset, concurrency, use_async, adaptive, confidence, audience_trace
     )
+    if store is not None:
+        evaluate_audience = IncrementalEvaluator(
+            lambda examples: create_evaluator(judge_metric, examples, concurrency, use_async, trace=audience_trace),
+            devset, store, "exact_match"
+        )
     
-    baseline_judge_score = evaluate_audience(audience_program)
-    print(f"Basic judge accuracy: {baseline_judge_score}%\n")
+    # What an incremental GEPA phase depends on besides its data; demos come from the data, so the
+    # starting programs are fingerprinted before few-shot compilation
+    gepa_setting = {"student": student_lm.model, "teacher": teacher_lm.model}
     
-    # Add few-shot examples to audience judge
-    print("6. Adding few-shot examples to audience judge...")
     fewshot_optimizer = dspy.LabeledFewShot(k=8)
     fewshot_audience = fewshot_optimizer.compile(student=audience_program, trainset=trainset)
     fewshot_audience.set_lm(student_lm)
     
-    fewshot_score = evaluate_audience(fewshot_audience)
-    print(f"Few-shot audience accuracy: {fewshot_score}%\n")
+    # Basic and few-shot programs are scored together when racing, or concurrently in --async mode
+    paired_steps = adaptive_eval == "race" or (use_async and not adaptive and store is None)
+    if adaptive_eval == "race":
+        baseline_judge_score, fewshot_score = run_steps(
+            checkpoint, ("judge_baseline", "judge_fewshot"),
+            lambda: evaluate_audience.race([audience_program, fewshot_audience])
+        )
+    elif paired_steps:
+        # Basic and few-shot judges are independent: evaluate both at once
+        baseline_judge_score, fewshot_score = run_steps(
+            checkpoint, ("judge_baseline", "judge_fewshot"),
+            lambda: evaluate_concurrently(
+                [audience_program, fewshot_audience], devset, judge_metric, concurrency, audience_trace
+            )
+        )
+    else:
+        baseline_judge_score = run_step(checkpoint, "judge_baseline", lambda: evaluate_audience(audience_program))
+    print(f"Basic judge accuracy: {format_score(baseline_judge_score)}\n")
+    
+    # Add few-shot examples to audience judge
+    print("6. Adding few-shot examples to audience judge...")
+    metrics.start_phase("judge_fewshot_eval")
+    if not paired_steps:
+        fewshot_score = run_step(checkpoint, "judge_fewshot", lambda: evaluate_audience(fewshot_audience))
+    print(f"Few-shot audience accuracy: {format_score(fewshot_score)}\n")
     
     # Optimize audience judge with GEPA
     print("7. Optimizing audience judge with GEPA...")
+    metrics.start_phase("judge_gepa")
     try:
-        optimized_audience = optimize_with_gepa(
-            fewshot_audience, trainset, valset, exact_match, teacher_lm
+        optimized_audience = optimize_checkpointed(
+            checkpoint, "audience", fewshot_audience, student_lm,
+            lambda log_dir: optimize_incremental(
+                store, "audience", fewshot_audience, student_lm, trainset, valset, max_evals,
+                lambda start, max_metric_calls: optimize_with_gepa(
+                    start, trainset, valset, judge_metric, teacher_lm, max_evals=max_evals,
+                    num_threads=concurrency, seed=seed or 0, log_dir=log_dir, max_metric_calls=max_metric_calls,
+                    trace=traces.gepa_tracer("audience") if traces is not None else None
+                ),
+                setting={**gepa_setting, "program": program_fingerprint(audience_program), "metric": "exact_match"}
+            )
         )
         
-        opt_audience_score = evaluate_audience(optimized_audience)
-        print(f"Optimized audience accuracy: {opt_audience_score}%\n")
+        opt_audience_score = run_step(checkpoint, "judge_optimized", lambda: evaluate_audience(optimized_audience))
+        print(f"Optimized audience accuracy: {format_score(opt_audience_score)}\n")
     except Exception as e:
         print(f"Error during audience optimization: {e}")
+        if checkpoint is not None:
+            print(f"GEPA progress is kept in {checkpoint.gepa_dir('audience')}; "
+                  f"continue it with --resume {checkpoint.run_dir}")
         print("Using fewshot audience instead of optimized version\n")
         optimized_audience = fewshot_audience
         opt_audience_score = fewshot_score
     
     # Create LLM-as-a-Judge metric for comedian evaluation
     print("8. Creating LLM-as-a-Judge metric...")
-    audience_metric = create_audience_metric(optimized_audience)
+    metrics.start_phase("judge_metric")
+    judge_queue = None
+    if judge_prompt_batch and judge_batch_size > 1:
+        # Stream generated jokes into a shared micro-batching judge queue; each batch shares one prompt
+        # (instructions and demos sent once). Without prompt batching the queue would only add its wait
+        # to every judge call, so jokes are judged directly.
+        judge_queue = BatchedJudgeQueue(
+            optimized_audience,
+            batch_size=judge_batch_size,
+            max_wait=judge_batch_wait_ms / 1000,
+            max_workers=concurrency,
+        )
+    judge_memo = JudgeMemo(judge_memo_size, judge_memo_path) if judge_memo_size > 0 else None
+    audience_metric = metrics.counted(create_audience_metric(optimized_audience, judge_queue, judge_memo))
+    comedian_eval_metric = audience_metric
+    if use_async:
+        comedian_eval_metric = metrics.counted(create_async_audience_metric(optimized_audience, judge_memo))
+    # Comedian scores depend on the judge, so incremental and resumed runs key them by the judge program
+    judge_fingerprint = program_fingerprint(optimized_audience)
+    judge_key = f"judge:{judge_fingerprint}"
     
     # Filter datasets for jokes with comedians
     comedian_trainset = [ex for ex in trainset if hasattr(ex, 'comedian') and ex.comedian]
@@ -395,55 +833,161 @@ def main(student_model="ollama_chat/llama3.2:1b", teacher_model="ollama_chat/lla
     
     # Evaluate basic comedian
     print("9. Evaluating basic comedian...")
-    evaluate_comedian = dspy.Evaluate(
-        metric=audience_metric,
-        devset=comedian_devset,
-        num_threads=1,  # Reduced from 16 to avoid file descriptor limits
-        display_progress=True,
-        display_table=5
+    metrics.start_phase("comedian_baseline_eval")
+    comedian_trace = traces.evaluation_tracer("comedian") if traces is not None else None
+    evaluate_comedian = create_evaluator(
+        comedian_eval_metric, comedian_devset, concurrency, use_async, adaptive, confidence, comedian_trace
     )
+    if store is not None:
+        evaluate_comedian = IncrementalEvaluator(
+            lambda examples: create_evaluator(
+                comedian_eval_metric, examples, concurrency, use_async, trace=comedian_trace
+            ),
+            comedian_devset, store, judge_key
+        )
     
-    baseline_comedian_score = evaluate_comedian(comedian_program)
-    print(f"Basic comedian accuracy: {baseline_comedian_score}%\n")
-    
-    # Add few-shot examples to comedian
-    print("10. Adding few-shot examples to comedian...")
     fewshot_comedian = fewshot_optimizer.compile(student=comedian_program, trainset=trainset)
     fewshot_comedian.set_lm(student_lm)
     
-    fewshot_comedian_score = evaluate_comedian(fewshot_comedian)
-    print(f"Few-shot comedian accuracy: {fewshot_comedian_score}%\n")
+    if adaptive_eval == "race":
+        baseline_comedian_score, fewshot_comedian_score = run_steps(
+            checkpoint, ("comedian_baseline", "comedian_fewshot"),
+            lambda: evaluate_comedian.race([comedian_program, fewshot_comedian]),
+            judge_fingerprint
+        )
+    elif paired_steps:
+        # Judging each generated joke overlaps generating the next; both comedians run at once
+        baseline_comedian_score, fewshot_comedian_score = run_steps(
+            checkpoint, ("comedian_baseline", "comedian_fewshot"),
+            lambda: evaluate_concurrently(
+                [comedian_program, fewshot_comedian], comedian_devset, comedian_eval_metric, concurrency,
+                comedian_trace
+            ),
+            judge_fingerprint
+        )
+    else:
+        baseline_comedian_score = run_step(
+            checkpoint, "comedian_baseline", lambda: evaluate_comedian(comedian_program), judge_fingerprint
+        )
+    print(f"Basic comedian accuracy: {format_score(baseline_comedian_score)}\n")
+    
+    # Add few-shot examples to comedian
+    print("10. Adding few-shot examples to comedian...")
+    metrics.start_phase("comedian_fewshot_eval")
+    if not paired_steps:
+        fewshot_comedian_score = run_step(
+            checkpoint, "comedian_fewshot", lambda: evaluate_comedian(fewshot_comedian), judge_fingerprint
+        )
+    print(f"Few-shot comedian accuracy: {format_score(fewshot_comedian_score)}\n")
     
     # Optimize comedian with GEPA
     print("11. Optimizing comedian with GEPA...")
+    metrics.start_phase("comedian_gepa")
     try:
-        optimized_comedian = optimize_with_gepa(
-            fewshot_comedian, trainset, valset, audience_metric, teacher_lm
+        optimized_comedian = optimize_checkpointed(
+            checkpoint, "comedian", fewshot_comedian, student_lm,
+            lambda log_dir: optimize_incremental(
+                store, "comedian", fewshot_comedian, student_lm, trainset, valset, max_evals,
+                lambda start, max_metric_calls: optimize_with_gepa(
+                    start, trainset, valset, audience_metric, teacher_lm, max_evals=max_evals,
+                    num_threads=concurrency, seed=seed or 0, log_dir=log_dir, max_metric_calls=max_metric_calls,
+                    trace=traces.gepa_tracer("comedian") if traces is not None else None
+                ),
+                setting={**gepa_setting, "program": program_fingerprint(comedian_program), "metric": judge_key}
+            ),
+            judge_fingerprint
         )
         
-        opt_comedian_score = evaluate_comedian(optimized_comedian)
-        print(f"Optimized comedian accuracy: {opt_comedian_score}%\n")
+        opt_comedian_score = run_step(
+            checkpoint, "comedian_optimized", lambda: evaluate_comedian(optimized_comedian), judge_fingerprint
+        )
+        print(f"Optimized comedian accuracy: {format_score(opt_comedian_score)}\n")
     except Exception as e:
         print(f"Error during comedian optimization: {e}")
+        if checkpoint is not None:
+            print(f"GEPA progress is kept in {checkpoint.gepa_dir('comedian', judge_fingerprint)}; "
+                  f"continue it with --resume {checkpoint.run_dir}")
         print("Using fewshot comedian instead of optimized version\n")
         optimized_comedian = fewshot_comedian
         opt_comedian_score = fewshot_comedian_score
     
     # Test optimized comedian
     print("12. Testing optimized comedian...")
+    metrics.start_phase("final_test")
     final_output = optimized_comedian(topic="AI engineering", comedian="Ricky Gervais")
     print(f"Optimized joke: {final_output.joke}\n")
     
     # Export optimized prompt
     print("13. Exporting optimized prompt...")
+    metrics.start_phase("export")
     export_optimized_prompt(optimized_comedian)
+    if artifact_path:
+        save_artifact(artifact_path, {
+            # Evaluations stopped early have no dev set accuracy to record
+            "comedian": describe_program(optimized_comedian, student_lm, split_scores({
+                "baseline": score_value(baseline_comedian_score),
+                "fewshot": score_value(fewshot_comedian_score),
+                "optimized": score_value(opt_comedian_score),
+            })[0]),
+            "audience": describe_program(optimized_audience, student_lm, split_scores({
+                "baseline": score_value(baseline_judge_score),
+                "fewshot": score_value(fewshot_score),
+                "optimized": score_value(opt_audience_score),
+            })[0]),
+        }, metadata={"teacher": teacher_lm.model, "seed": seed, "max_evals": max_evals, "dataset": dataset})
+        print(f"Saved optimized programs to {artifact_path}")
+    
+    if judge_queue is not None:
+        judge_queue.close()
+    if judge_memo is not None:
+        judge_memo.save()
+    if traces is not None:
+        traces.close()
+    metrics.end_phase()
+    
+    # Summary (rendered from the recorded run metrics)
+    cache_stats = student_lm.response_cache.stats()
+    # "scores" holds full dev set accuracies only; evaluations stopped early are reported apart
+    scores, stopped_scores = split_scores({
+        'baseline_judge': score_value(baseline_judge_score),
+        'optimized_judge': score_value(opt_audience_score),
+        'baseline_comedian': score_value(baseline_comedian_score),
+        'optimized_comedian': score_value(opt_comedian_score),
+    })
+    metrics.set("scores", scores)
+    if stopped_scores:
+        metrics.set("stopped_scores", stopped_scores)
+    metrics.set("cache", cache_stats)
+    metrics.set("clients", {lm.model: lm.client_stats() for lm in (student_lm, teacher_lm)})
+    if adaptive:
+        evaluator_stats = [evaluate_audience.stats(), evaluate_comedian.stats()]
+        metrics.set("adaptive_eval", {
+            key: sum(stats[key] for stats in evaluator_stats)
+            for key in ("evaluations", "stopped", "examples_scored", "examples_skipped")
+        })
+    if student_lm.scheduler is not None:
+        load_seconds = sum(lm.client_stats().get("load_seconds", 0.0) for lm in (student_lm, teacher_lm))
+        metrics.set("residency", {**student_lm.scheduler.stats(), "load_seconds": load_seconds})
+    if student_lm.token_budget is not None:
+        metrics.set("token_budget", student_lm.token_budget.stats())
+    metrics.set("resilience", student_lm.resilience.stats())
+    if judge_queue is not None:
+        metrics.set("judge_queue", judge_queue.stats())
+    if judge_memo is not None:
+        metrics.set("judge_memo", judge_memo.stats())
+    if store is not None:
+        metrics.set("incremental", store.stats())
+    if traces is not None:
+        metrics.set("traces", traces.stats())
     
-    # Summary
+    run_summary = metrics.summary()
     print("\n=== RESULTS SUMMARY ===")
-    print(f"Basic audience judge accuracy: {baseline_judge_score}%")
-    print(f"Optimized audience judge accuracy: {opt_audience_score}%")
-    print(f"Basic comedian accuracy: {baseline_comedian_score}%")
-    print(f"Optimized comedian accuracy: {opt_comedian_score}%")
+    for line in render_summary(run_summary):
+        print(line)
+    
+    if metrics_out:
+        metrics.export(metrics_out)
+        print(f"Run metrics written to {metrics_out}")
     
     return {
         'optimized_comedian': optimized_comedian,
@@ -453,7 +997,9 @@ def main(student_model="ollama_chat/llama3.2:1b", teacher_model="ollama_chat/lla
             'optimized_judge': opt_audience_score,
             'baseline_comedian': baseline_comedian_score,
             'optimized_comedian': opt_comedian_score
-        }
+        },
+        'cache': cache_stats,
+        'metrics': run_summary
     }
 
 def parse_args():
@@ -470,6 +1016,31 @@ def parse_args():
   
   # High-performance models (requires 64GB+ RAM)
   python evaluator_optimizer_dspy.py --student gpt-oss:20b --teacher gpt-oss:120b
+  
+  # Run up to 32 requests in flight per model
+  python evaluator_optimizer_dspy.py --concurrency 32
+  
+  # Overlap generation and judging with async LM clients
+  python evaluator_optimizer_dspy.py --async --concurrency 16
+  
+  # Rerun without calling the models again for requests seen before
+  python evaluator_optimizer_dspy.py --cache-mode read
+  
+  # Stream a large labeled corpus, keeping 200 validation and 500 development examples
+  python evaluator_optimizer_dspy.py --dataset jokes.jsonl --valset-size 200 --devset-size 500
+  
+  # Checkpoint a long run, then continue it after a crash or Ollama restart
+  python evaluator_optimizer_dspy.py --student gpt-oss:20b --teacher gpt-oss:120b --run-dir runs/high
+  python evaluator_optimizer_dspy.py --resume runs/high
+  
+  # Re-optimize after adding jokes: reuse earlier scores and programs, evaluate only the new examples
+  python evaluator_optimizer_dspy.py --dataset jokes.jsonl --incremental runs/incremental
+  
+  # Cut tail latency: duplicate requests slower than the p95, give up on calls after 2 minutes
+  python evaluator_optimizer_dspy.py --hedge-after p95 --call-deadline 120
+  
+  # Run offline against the deterministic stub backend (no Ollama needed)
+  python evaluator_optimizer_dspy.py --student stub:student --teacher stub:teacher --seed 0
         """
     )
     
@@ -485,14 +1056,290 @@ def parse_args():
         help="Teacher model name (default: llama3.1:8b)"
     )
     
+    parser.add_argument(
+        "--cache-dir",
+        default=".lm_cache",
+        help="Directory for the persistent LM response cache (default: .lm_cache)"
+    )
+    
+    parser.add_argument(
+        "--cache-mode",
+        choices=CACHE_MODES,
+        default="write",
+        help="Response cache mode: write = read and store, read = read-only, off = disabled (default: write)"
+    )
+    
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=512,
+        help="Evict least-recently-used cache entries above this size in MB (default: 512)"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Evaluation threads and maximum in-flight requests per model (default: 8)"
+    )
+    
+    parser.add_argument(
+        "--ollama-url",
+        default=None,
+        help="Ollama server URL (default: $OLLAMA_HOST, then http://localhost:11434)"
+    )
+    
+    parser.add_argument(
+        "--save-artifact",
+        default=None,
+        metavar="PATH",
+        help="Save the optimized comedian and judge (prompts, demos, scores, model) to a serving artifact"
+    )
+    
+    parser.add_argument(
+        "--keep-alive",
+        default=None,
+        help="How long Ollama keeps each model loaded after a request: seconds, -1 for ever, or a duration "
+             "like 30m (default: Ollama's 5 minutes)"
+    )
+    
+    parser.add_argument(
+        "--call-deadline",
+        type=float,
+        default=None,
+        help="Seconds an LM call may take including retries and backoff (default: no deadline)"
+    )
+    
+    parser.add_argument(
+        "--attempt-timeout",
+        type=float,
+        default=600.0,
+        help="Timeout of a single LM request in seconds (default: 600)"
+    )
+    
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="Retries of LM requests failing with connection errors, timeouts or 5xx responses, "
+             "with jittered exponential backoff (default: 3)"
+    )
+    
+    parser.add_argument(
+        "--hedge-after",
+        default=None,
+        help="Send a duplicate of an LM request still running after this many seconds, or after the model's "
+             "observed latency percentile, e.g. p95; the first reply wins (default: off)"
+    )
+    
+    parser.add_argument(
+        "--breaker-failures",
+        type=int,
+        default=10,
+        help="Consecutive failed requests that open a model's circuit breaker, holding its calls until a "
+             "probe succeeds; 0 disables it (default: 10)"
+    )
+    
+    parser.add_argument(
+        "--breaker-cooldown",
+        type=float,
+        default=10.0,
+        help="Seconds an open circuit breaker waits before probing the model again (default: 10)"
+    )
+    
+    parser.add_argument(
+        "--model-phases",
+        action="store_true",
+        help="Run student and teacher calls in separate phases, so models that don't fit in memory together "
+             "aren't loaded back and forth"
+    )
+    
+    parser.add_argument(
+        "--phase-max-wait",
+        type=float,
+        default=30,
+        help="With --model-phases, seconds a call for the other model waits before the current phase is "
+             "drained (default: 30)"
+    )
+    
+    parser.add_argument(
+        "--unload-on-switch",
+        action="store_true",
+        help="With --model-phases, unload the previous model from Ollama when switching phases"
+    )
+    
+    parser.add_argument(
+        "--adaptive-eval",
+        choices=("off", "sequential", "race"),
+        default="off",
+        help="Stop dev set evaluations once a program's accuracy interval is below the best so far; "
+             "race also races the basic and few-shot programs against each other (default: off)"
+    )
+    
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level of --adaptive-eval's accuracy intervals (default: 0.95)"
+    )
+    
+    parser.add_argument(
+        "--token-budgets",
+        action="store_true",
+        help="Limit each predictor's max_tokens to its observed p99 output length plus headroom, "
+             "stopping at the completed marker"
+    )
+    
+    parser.add_argument(
+        "--budget-headroom",
+        type=float,
+        default=1.5,
+        help="With --token-budgets, budget as a multiple of the p99 output length (default: 1.5)"
+    )
+    
+    parser.add_argument(
+        "--budget-min-samples",
+        type=int,
+        default=20,
+        help="With --token-budgets, calls observed per predictor before its budget applies (default: 20)"
+    )
+    
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run evaluations through async LM clients, overlapping generation, judging and independent steps"
+    )
+    
+    parser.add_argument(
+        "--judge-batch-size",
+        type=int,
+        default=8,
+        help="Generated jokes judged together with --judge-prompt-batch; 1 disables batching (default: 8)"
+    )
+    
+    parser.add_argument(
+        "--judge-batch-wait-ms",
+        type=float,
+        default=20,
+        help="Milliseconds to wait for a judge batch to fill with --judge-prompt-batch (default: 20)"
+    )
+    
+    parser.add_argument(
+        "--judge-prompt-batch",
+        action="store_true",
+        help="Judge each batch of jokes in one multi-example prompt, falling back per joke on parse failures"
+    )
+    
+    parser.add_argument(
+        "--judge-memo-size",
+        type=int,
+        default=10000,
+        help="Judge verdicts memoized per run so duplicate jokes are judged once; 0 disables (default: 10000)"
+    )
+    
+    parser.add_argument(
+        "--judge-memo-path",
+        default=None,
+        help="Optional JSON file to persist memoized judge verdicts across runs"
+    )
+    
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for model sampling and GEPA, for reproducible runs (default: unseeded)"
+    )
+    
+    parser.add_argument(
+        "--max-evals",
+        type=int,
+        default=1,
+        help="GEPA budget in full evaluations of the validation set (default: 1)"
+    )
+    
+    parser.add_argument(
+        "--dataset",
+        default=None,
+        help="Stream labeled jokes from a .jsonl, .json, .csv or .parquet file instead of the built-in jokes"
+    )
+    
+    parser.add_argument(
+        "--trainset-size",
+        type=int,
+        default=None,
+        help="Reservoir-sample the training set down to N examples (default: all)"
+    )
+    
+    parser.add_argument(
+        "--valset-size",
+        type=int,
+        default=None,
+        help="Reservoir-sample the validation set down to N examples (default: all)"
+    )
+    
+    parser.add_argument(
+        "--devset-size",
+        type=int,
+        default=None,
+        help="Reservoir-sample the development set down to N examples (default: all)"
+    )
+    
+    parser.add_argument(
+        "--run-dir",
+        default=None,
+        help="Checkpoint scores, optimized programs and GEPA progress to this directory"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_DIR",
+        default=None,
+        help="Resume a checkpointed run: reuse its configuration, finished steps and GEPA progress"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        metavar="DIR",
+        default=None,
+        help="Reuse per-example scores and warm-start GEPA from the programs saved in DIR by earlier runs, "
+             "evaluating only examples added since"
+    )
+    
+    parser.add_argument(
+        "--traces",
+        metavar="FILE",
+        default=None,
+        help="Stream per-example predictions, scores and feedback of every evaluation and GEPA candidate "
+             "to an Arrow file; query it with trace_store.py (requires pyarrow)"
+    )
+    
+    parser.add_argument(
+        "--metrics-out",
+        default=None,
+        help="Write per-phase timings, LM calls, tokens and latency to this .json or .csv file"
+    )
+    
     parser.add_argument(
         "--list-models",
         action="store_true",
         help="List available Ollama models and exit"
     )
     
+    parser.add_argument(
+        "--import-profile",
+        action="store_true",
+        help="Rerun this command under python -X importtime and print its slowest imports"
+    )
+    
     return parser.parse_args()
 
+def resolve_model(name):
+    """Return the LiteLLM model name for a CLI model name (stub: models are used as-is)"""
+    from stub_lm import is_stub_model
+    
+    return name if is_stub_model(name) else f"ollama_chat/{name}"
+
 def list_available_models():
     """List available Ollama models"""
     try:
@@ -509,18 +1356,34 @@ if __name__ == "__main__":
     # Parse command line arguments
     args = parse_args()
     
+    if args.import_profile:
+        from import_profile import profile_command, render_profile
+        
+        returncode, records = profile_command([arg for arg in sys.argv if arg != "--import-profile"])
+        print()
+        print(render_profile(records))
+        exit(returncode)
+    
     # List models if requested
     if args.list_models:
         list_available_models()
         exit(0)
     
     # Prepare model names with ollama_chat prefix
-    student_model = f"ollama_chat/{args.student}"
-    teacher_model = f"ollama_chat/{args.teacher}"
+    student_model = resolve_model(args.student)
+    teacher_model = resolve_model(args.teacher)
+    
+    if args.resume:
+        # The checkpointed run's models, seed and data replace the corresponding flags
+        run_config = RunCheckpoint.load_config(args.resume)
+        student_model = run_config.pop("student_model")
+        teacher_model = run_config.pop("teacher_model")
+        vars(args).update(run_config, run_dir=args.resume)
+        print(f"Resuming run in {args.resume}")
     
     print(f"Starting DSPy GEPA Demo...")
-    print(f"Student model: {args.student}")
-    print(f"Teacher model: {args.teacher}")
+    print(f"Student model: {student_model}")
+    print(f"Teacher model: {teacher_model}")
     print()
     
     # Install required packages (uncomment if needed)
@@ -530,7 +1393,47 @@ if __name__ == "__main__":
     import asyncio
     
     try:
-        results = main(student_model, teacher_model)
+        results = main(
+            student_model,
+            teacher_model,
+            cache_dir=args.cache_dir,
+            cache_mode=args.cache_mode,
+            cache_max_mb=args.cache_max_mb,
+            concurrency=args.concurrency,
+            use_async=args.use_async,
+            judge_batch_size=args.judge_batch_size,
+            judge_batch_wait_ms=args.judge_batch_wait_ms,
+            judge_prompt_batch=args.judge_prompt_batch,
+            judge_memo_size=args.judge_memo_size,
+            judge_memo_path=args.judge_memo_path,
+            metrics_out=args.metrics_out,
+            seed=args.seed,
+            max_evals=args.max_evals,
+            dataset=args.dataset,
+            trainset_size=args.trainset_size,
+            valset_size=args.valset_size,
+            devset_size=args.devset_size,
+            run_dir=args.run_dir,
+            keep_alive=args.keep_alive,
+            model_phases=args.model_phases,
+            phase_max_wait=args.phase_max_wait,
+            unload_on_switch=args.unload_on_switch,
+            adaptive_eval=args.adaptive_eval,
+            confidence=args.confidence,
+            ollama_url=args.ollama_url,
+            artifact_path=args.save_artifact,
+            token_budgets=args.token_budgets,
+            budget_headroom=args.budget_headroom,
+            budget_min_samples=args.budget_min_samples,
+            incremental_dir=args.incremental,
+            traces_path=args.traces,
+            call_deadline=args.call_deadline,
+            attempt_timeout=args.attempt_timeout,
+            retries=args.retries,
+            hedge_after=args.hedge_after,
+            breaker_failures=args.breaker_failures,
+            breaker_cooldown=args.breaker_cooldown,
+        )
     finally:
         # Clean up any remaining event loops to prevent warnings
         try:
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of a command, from Python's -X importtime.
+
+`python -X importtime` writes one line per imported module to stderr, with the
+time spent importing the module itself and including everything it imported:
+
+    import time: self [us] | cumulative | imported package
+    import time:      1040 |     748213 | dspy
+
+profile_command() reruns a script under -X importtime (its output and any other
+stderr lines are passed through) and parses those lines; render_profile() turns
+them into a table of the slowest top-level imports:
+
+    python evaluator_optimizer_dspy.py --list-models --import-profile
+    python import_profile.py serve.py optimized_programs.json --stdio < requests.jsonl
+
+This module deliberately does not import DSPy.
+"""
+
+import subprocess
+import sys
+
+IMPORT_TIME_PREFIX = "import time:"
+# Imports that make a command slow to start; the CLI paths that don't run the optimizer avoid them
+HEAVY_MODULES = ("dspy", "litellm", "gepa", "openai", "pandas")
+
+
+def parse_importtime(lines):
+    """Parse -X importtime lines into records with module, depth, self_us and cumulative_us"""
+    records = []
+    for line in lines:
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+        self_us, cumulative_us, name = line[len(IMPORT_TIME_PREFIX):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # The header line
+        name = name[1:].rstrip()
+        records.append({
+            "module": name.lstrip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return records
+
+
+def profile_command(argv, stdout=None):
+    """Run `python -X importtime <argv>`; returns (exit code, import records)
+
+    Args:
+        argv (list): Script and its arguments
+        stdout: Where the command's output goes (default: this process's stdout)
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv], stdout=stdout, stderr=subprocess.PIPE, text=True
+    )
+    lines = process.stderr.splitlines()
+    for line in lines:
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            print(line, file=sys.stderr)
+    return process.returncode, parse_importtime(lines)
+
+
+def heavy_imports(records):
+    """Top-level packages from HEAVY_MODULES that a command imported"""
+    return sorted({r["module"].split(".")[0] for r in records} & set(HEAVY_MODULES))
+
+
+def render_profile(records, top=15):
+    """Markdown table of the slowest top-level imports plus the total import time"""
+    roots = sorted((r for r in records if r["depth"] == 0), key=lambda r: r["cumulative_us"], reverse=True)
+    total_ms = sum(r["self_us"] for r in records) / 1000
+    lines = [
+        "| Module | Cumulative (ms) | Share | Self (ms) |",
+        "|--------|-----------------|-------|-----------|",
+    ]
+    for record in roots[:top]:
+        cumulative_ms = record["cumulative_us"] / 1000
+        share = cumulative_ms / total_ms if total_ms else 0.0
+        lines.append(f"| {record['module']} | {cumulative_ms:.1f} | {share:.0%} | {record['self_us'] / 1000:.1f} |")
+    lines.append(f"\nImported {len(records)} modules in {total_ms:.0f}ms")
+    heavy = heavy_imports(records)
+    if heavy:
+        lines.append(f"Heavy imports: {', '.join(heavy)}")
+    return "\n".join(lines)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print("usage: python import_profile.py SCRIPT [ARGS...]\n")
+        print("Run SCRIPT under python -X importtime and print its slowest imports.")
+        return 0
+    returncode, records = profile_command(sys.argv[1:])
+    print(render_profile(records))
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Incremental re-optimization: reuse a previous run's scores and programs when the dataset changes.
+
+Adding a handful of labeled jokes shouldn't mean re-scoring every program on
+every example and re-running GEPA from scratch. An incremental directory
+(--incremental DIR) keeps what earlier runs learned, keyed by content:
+
+    scores.json           per-example scores: {"<program>/<metric>": {"<example>": score}}
+    examples.json         fingerprints of the train/val examples each GEPA phase last saw, and its setting
+    programs/<name>.json  the best program each GEPA phase found (instructions and demos)
+
+Examples are fingerprinted by their fields, and programs by their instructions,
+demos and models (judge_memo.program_fingerprint), so a score is reused exactly
+when the same program is scored on the same example with the same metric.
+IncrementalEvaluator scores only the examples missing from scores.json and
+merges in the rest.
+
+GEPA phases warm-start from the program saved for them. Their data is compared
+with examples.json: unchanged data reuses the saved program without calling
+GEPA, and changed data runs GEPA from the saved program with a budget scaled to
+the share of train/val examples that were added or removed (incremental_budget).
+A saved program is only used under the setting it was optimized in (student and
+teacher models, starting program and metric); any change to these optimizes
+the phase from scratch.
+GEPA keeps no scores across runs (its seed candidate is always evaluated on the
+full valset), so the budget is what bounds the work to the delta.
+
+This module deliberately does not import DSPy.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+
+from judge_memo import program_fingerprint
+from run_checkpoint import RunCheckpoint
+
+# dspy.GEPA's default reflection minibatch size: one proposal scores two minibatches
+REFLECTION_MINIBATCH_SIZE = 3
+
+
+def example_fingerprint(example):
+    """Hash an example's fields (inputs and labels)"""
+    data = example.toDict() if hasattr(example, "toDict") else dict(example)
+    fields = {key: value for key, value in data.items() if not key.startswith("dspy_")}
+    text = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def incremental_budget(full_budget, changed_fraction, valset_size, minibatch_size=REFLECTION_MINIBATCH_SIZE):
+    """GEPA metric calls for a warm-started phase: the changed share of the full budget
+
+    Never less than the seed's valset evaluation plus one proposal, nor more than full_budget.
+    """
+    floor = valset_size + 2 * minibatch_size
+    return min(full_budget, max(floor, math.ceil(full_budget * changed_fraction)))
+
+
+class ExampleDelta:
+    """Train/val examples added and removed since a GEPA phase last ran, and whether its setting changed"""
+
+    def __init__(self, previous, current, setting_changed=False):
+        self.added = len(current - previous)
+        self.removed = len(previous - current)
+        self.total = len(current)
+        self.setting_changed = setting_changed
+
+    @property
+    def changed(self):
+        return bool(self.added or self.removed)
+
+    @property
+    def fraction(self):
+        """Share of the current examples that changed (1.0 for a phase that never ran)"""
+        if not self.total:
+            return 1.0
+        return min(1.0, (self.added + self.removed) / self.total)
+
+
+class IncrementalStore:
+    """Scores, example fingerprints and best programs kept across runs in one directory
+
+    Args:
+        directory (str): Incremental directory (created if missing)
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.programs = RunCheckpoint(directory)  # Saves and loads programs/<name>.json
+        self.reused = 0
+        self.scored = 0
+        self.phases = {}
+        self._scores = self._read("scores.json")
+        self._examples = self._read("examples.json")
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, name, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self._path(name))
+
+    def lookup(self, scope, fingerprints):
+        """Cached scores for a program/metric scope: {fingerprint: score} for those it has"""
+        with self._lock:
+            scores = self._scores.get(scope, {})
+            found = {fp: scores[fp] for fp in fingerprints if fp in scores}
+            self.reused += len(found)
+        return found
+
+    def record(self, scope, scores):
+        """Add {fingerprint: score} to a scope and write scores.json"""
+        with self._lock:
+            self._scores.setdefault(scope, {}).update(scores)
+            self.scored += len(scores)
+            self._write("scores.json", self._scores)
+
+    def delta(self, name, trainset, valset, setting=None):
+        """ExampleDelta of a GEPA phase's train/val data and setting against the run that saved its program
+
+        Args:
+            setting (dict): What the phase's result depends on besides its data (models, starting
+                program, metric); a phase saved with a different setting, or by an older run without
+                one, counts as changed
+        """
+        saved = self._examples.get(name, {})
+        previous = set(saved.get("train", [])) | set(saved.get("val", []))
+        current = {example_fingerprint(example) for example in [*trainset, *valset]}
+        return ExampleDelta(previous, current, saved.get("setting") != setting)
+
+    def load_program(self, name, program, lm):
+        """The program saved for a GEPA phase, loaded into a copy of `program`, or None"""
+        return self.programs.load_program(name, program, lm)
+
+    def save_program(self, name, program, trainset, valset, setting=None):
+        """Save a GEPA phase's best program, the train/val examples it was optimized on and its setting"""
+        self.programs.save_program(name, program)
+        with self._lock:
+            self._examples[name] = {
+                "train": [example_fingerprint(example) for example in trainset],
+                "val": [example_fingerprint(example) for example in valset],
+                "setting": setting,
+            }
+            self._write("examples.json", self._examples)
+
+    def record_phase(self, name, mode, delta, budget=None):
+        """Note how a GEPA phase ran: "reused", "warm" (warm-started) or "cold" (no saved program)"""
+        self.phases[name] = {
+            "mode": mode, "added": delta.added, "removed": delta.removed, "setting_changed": delta.setting_changed,
+            "budget": budget,
+        }
+
+    def stats(self):
+        """Scores reused versus computed, and how each GEPA phase ran"""
+        with self._lock:
+            total = self.reused + self.scored
+            return {
+                "reused": self.reused,
+                "scored": self.scored,
+                "reuse_rate": self.reused / total if total else 0.0,
+                "phases": {name: dict(phase) for name, phase in self.phases.items()},
+            }
+
+
+class IncrementalEvaluator:
+    """Evaluator that scores only examples without a stored score for the program and metric
+
+    Args:
+        create (callable): create(examples) -> evaluator; evaluator(program) returns a result with
+            .results as (example, prediction, score) tuples, like dspy.Evaluate
+        devset (list): Examples to evaluate on
+        store (IncrementalStore): Where scores are looked up and recorded
+        metric_key (str): Identifies the metric, so scores from different metrics are kept apart
+    """
+
+    def __init__(self, create, devset, store, metric_key):
+        self.create = create
+        self.devset = devset
+        self.store = store
+        self.metric_key = metric_key
+        self.fingerprints = [example_fingerprint(example) for example in devset]
+
+    def __call__(self, program):
+        scope = f"{program_fingerprint(program)}/{self.metric_key}"
+        scores = self.store.lookup(scope, self.fingerprints)
+        missing = [
+            (example, fp) for example, fp in zip(self.devset, self.fingerprints) if fp not in scores
+        ]
+        if scores:
+            print(f"Incremental: reusing {len(scores)} of {len(self.devset)} scores, "
+                  f"evaluating {len(missing)} new examples")
+        if missing:
+            result = self.create([example for example, _ in missing])(program)
+            new_scores = {fp: float(score) for (_, fp), (*_, score) in zip(missing, result.results)}
+            self.store.record(scope, new_scores)
+            scores.update(new_scores)
+        if not self.devset:
+            return 0.0
+        # Same percentage as dspy.Evaluate, so reused and fresh evaluations compare directly
+        return round(100 * sum(scores[fp] for fp in self.fingerprints) / len(self.devset), 2)
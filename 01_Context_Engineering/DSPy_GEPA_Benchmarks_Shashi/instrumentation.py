@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Run instrumentation: wall time per phase, LM calls, tokens and latency per model.
+
+RunMetrics is filled in while evaluator_optimizer_dspy.py runs (LocalLM records
+every call, main() marks the start of each numbered step) and can be exported
+as JSON or CSV with --metrics-out. The RESULTS SUMMARY is rendered from it, and
+so are the BENCHMARKS.md tables:
+
+    python instrumentation.py metrics/*.json                     # print markdown tables
+    python instrumentation.py metrics/*.json --update BENCHMARKS.md
+
+This module deliberately does not import DSPy.
+"""
+
+import argparse
+import csv
+import functools
+import inspect
+import json
+import statistics
+import threading
+import time
+
+# Phases of main() grouped the way PERFORMANCE.md's Runtime Breakdown reports them
+PHASE_GROUPS = {
+    "setup": "Environment Setup",
+    "datasets": "Dataset Creation",
+    "comedian_program": "Basic Evaluations",
+    "audience_judge": "Basic Evaluations",
+    "judge_baseline_eval": "Basic Evaluations",
+    "judge_fewshot_eval": "Basic Evaluations",
+    "judge_gepa": "GEPA Optimization",
+    "judge_metric": "Basic Evaluations",
+    "comedian_baseline_eval": "Basic Evaluations",
+    "comedian_fewshot_eval": "Basic Evaluations",
+    "comedian_gepa": "GEPA Optimization",
+    "final_test": "Final Testing",
+    "export": "Final Testing",
+}
+
+TABLE_BEGIN = "<!-- metrics:begin -->"
+TABLE_END = "<!-- metrics:end -->"
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q in 0..100) of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def score_value(result):
+    """Return a plain float from a dspy EvaluationResult or a numeric score
+
+    An evaluation stopped early by adaptive evaluation has no dev set accuracy; it is
+    returned as {"stopped": True, "upper_bound": ..., "examples": ...} instead.
+    """
+    if is_stopped(result):
+        return result
+    upper_bound = getattr(result, "upper_bound", None)
+    if upper_bound is not None:
+        return {"stopped": True, "upper_bound": upper_bound, "examples": len(result.results)}
+    return float(getattr(result, "score", result))
+
+
+def is_stopped(score):
+    """True for a score_value() of an evaluation stopped early"""
+    return isinstance(score, dict) and score.get("stopped", False)
+
+
+def format_score(score):
+    """Printable score_value(), e.g. 50.0% or stopped (upper bound 40.0% on 8 examples)"""
+    if is_stopped(score):
+        return f"stopped (upper bound {score['upper_bound']}% on {score['examples']} examples)"
+    return f"{score}%"
+
+
+def split_scores(scores):
+    """Split named score_value()s into (full dev set accuracies, stopped evaluations)"""
+    full = {name: score for name, score in scores.items() if not is_stopped(score)}
+    stopped = {name: score for name, score in scores.items() if is_stopped(score)}
+    return full, stopped
+
+
+class RunMetrics:
+    """Collects phase timings and per-model LM call statistics for one run"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.phases = []
+        self.values = {}
+        self.counters = {}
+        self._calls = {}
+        self._totals = {"lm_calls": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._phase = None
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def start_phase(self, name):
+        """Start timing a phase, closing the previous one"""
+        self.end_phase()
+        with self._lock:
+            self._phase = {"name": name, "start": time.perf_counter(), "totals": dict(self._totals)}
+
+    def end_phase(self):
+        """Close the current phase (if any) and record its wall time and LM usage"""
+        with self._lock:
+            if self._phase is None:
+                return
+            phase, self._phase = self._phase, None
+            record = {"name": phase["name"], "seconds": round(time.perf_counter() - phase["start"], 3)}
+            for key, value in self._totals.items():
+                record[key] = value - phase["totals"][key]
+            self.phases.append(record)
+
+    def record_call(self, model, latency, prompt_tokens=0, completion_tokens=0, cache_hit=False):
+        """Record one LM call (cache hits count as calls but not towards latency)"""
+        with self._lock:
+            stats = self._calls.setdefault(model, {
+                "calls": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0, "latencies": [],
+            })
+            stats["calls"] += 1
+            self._totals["lm_calls"] += 1
+            if cache_hit:
+                stats["cache_hits"] += 1
+                self._totals["cache_hits"] += 1
+                return
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["latencies"].append(latency)
+            self._totals["prompt_tokens"] += prompt_tokens
+            self._totals["completion_tokens"] += completion_tokens
+
+    def increment(self, counter, amount=1):
+        """Add to a named counter (e.g. examples scored)"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def counted(self, metric, counter="examples"):
+        """Wrap a (sync or async) metric so every call increments a counter"""
+        if inspect.iscoroutinefunction(metric):
+            @functools.wraps(metric)
+            async def counted_ametric(*args, **kwargs):
+                self.increment(counter)
+                return await metric(*args, **kwargs)
+            return counted_ametric
+
+        @functools.wraps(metric)
+        def counted_metric(*args, **kwargs):
+            self.increment(counter)
+            return metric(*args, **kwargs)
+        return counted_metric
+
+    def set(self, key, value):
+        """Attach a result value (scores, cache stats, configuration, ...) to the run"""
+        with self._lock:
+            self.values[key] = value
+
+    def summary(self):
+        """Return the run as a JSON-serialisable dict"""
+        self.end_phase()
+        with self._lock:
+            models = {}
+            for model, stats in self._calls.items():
+                latencies = stats["latencies"]
+                models[model] = {
+                    "calls": stats["calls"],
+                    "cache_hits": stats["cache_hits"],
+                    "prompt_tokens": stats["prompt_tokens"],
+                    "completion_tokens": stats["completion_tokens"],
+                    "latency_mean": round(statistics.fmean(latencies), 4) if latencies else 0.0,
+                    "latency_p50": round(percentile(latencies, 50), 4),
+                    "latency_p90": round(percentile(latencies, 90), 4),
+                    "latency_p99": round(percentile(latencies, 99), 4),
+                }
+            return {
+                "started": self.started,
+                "total_seconds": round(sum(phase["seconds"] for phase in self.phases), 3),
+                "phases": list(self.phases),
+                "models": models,
+                "counters": dict(self.counters),
+                **self.values,
+            }
+
+    def export(self, path):
+        """Write the summary to path as JSON, or as long-format CSV if path ends in .csv"""
+        summary = self.summary()
+        if not path.endswith(".csv"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2, default=str)
+            return
+
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["section", "name", "metric", "value"])
+            for phase in summary["phases"]:
+                for metric, value in phase.items():
+                    if metric != "name":
+                        writer.writerow(["phase", phase["name"], metric, value])
+            for model, stats in summary["models"].items():
+                for metric, value in stats.items():
+                    writer.writerow(["model", model, metric, value])
+            for metric, value in summary.get("scores", {}).items():
+                writer.writerow(["score", "", metric, value])
+            for metric, value in summary["counters"].items():
+                writer.writerow(["counter", "", metric, value])
+            writer.writerow(["run", "", "total_seconds", summary["total_seconds"]])
+
+
+def render_summary(summary):
+    """Return the RESULTS SUMMARY lines for a run summary"""
+    scores = {**summary.get("scores", {}), **summary.get("stopped_scores", {})}
+    lines = [
+        f"Basic audience judge accuracy: {format_score(scores.get('baseline_judge', 0.0))}",
+        f"Optimized audience judge accuracy: {format_score(scores.get('optimized_judge', 0.0))}",
+        f"Basic comedian accuracy: {format_score(scores.get('baseline_comedian', 0.0))}",
+        f"Optimized comedian accuracy: {format_score(scores.get('optimized_comedian', 0.0))}",
+        f"Total runtime: {summary['total_seconds'] / 60:.1f} min",
+    ]
+    for model, stats in summary["models"].items():
+        lines.append(
+            f"{model}: {stats['calls']} LM calls ({stats['cache_hits']} cached), "
+            f"{stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens, "
+            f"latency p50 {stats['latency_p50']:.2f}s / p99 {stats['latency_p99']:.2f}s"
+        )
+
+    cache = summary.get("cache")
+    if cache:
+        lines.append(f"LM cache ({cache['mode']}): {cache['hits']} hits, {cache['misses']} misses "
+                     f"({cache['hit_rate']:.1%} hit rate), {cache['evictions']} evictions")
+    for model, client in summary.get("clients", {}).items():
+        injected = client.get("injected") or {}
+        if client.get("retried") or injected.get("failures") or injected.get("timeouts"):
+            line = f"{model}: {client['retried']} retries ({client['retry_seconds']:.0f}s backoff)"
+            if injected:
+                line += f", injected {injected['failures']} failures and {injected['timeouts']} timeouts"
+            lines.append(line)
+        if client.get("prefixed") or client.get("model_loads"):
+            lines.append(f"{model}: prefix reuse {client['prefix_hits']}/{client['prefixed']} requests "
+                         f"({client['reordered']} reordered), {client['model_loads']} model loads "
+                         f"({client['load_seconds']:.1f}s)")
+    for endpoint, calls in summary.get("resilience", {}).items():
+        if calls["retries"] or calls["hedged"] or calls["deadline_exceeded"] or calls["breaker_opened"]:
+            lines.append(f"Resilience {endpoint}: {calls['retries']} retries ({calls['retry_seconds']:.1f}s "
+                         f"jittered backoff), {calls['hedged']} hedged ({calls['hedge_wins']} won), "
+                         f"{calls['deadline_exceeded']} past deadline, breaker opened {calls['breaker_opened']}x "
+                         f"({calls['held']} calls held {calls['held_seconds']:.1f}s, {calls['rejected']} rejected)")
+    adaptive = summary.get("adaptive_eval")
+    if adaptive:
+        total = adaptive["examples_scored"] + adaptive["examples_skipped"]
+        lines.append(f"Adaptive evaluation: {adaptive['examples_skipped']} of {total} examples skipped, "
+                     f"{adaptive['stopped']} of {adaptive['evaluations']} evaluations stopped early")
+    residency = summary.get("residency")
+    if residency:
+        phases = ", ".join(f"{model} x{count}" for model, count in residency["phases"].items())
+        lines.append(f"Model phases: {residency['switches']} switches ({phases}), "
+                     f"{residency['wait_seconds']:.1f}s queued, {residency['load_seconds']:.1f}s loading models")
+    for key, budget in summary.get("token_budget", {}).items():
+        if budget["budgeted_calls"]:
+            lines.append(f"Token budget {key}: {budget['budget']} tokens (p99 {budget['p99_tokens']:.0f}), "
+                         f"{budget['truncated']}/{budget['budgeted_calls']} truncated "
+                         f"({budget['truncation_rate']:.1%}), ~{budget['seconds_saved']:.1f}s decode time saved")
+    judge_queue = summary.get("judge_queue")
+    if judge_queue:
+        lines.append(f"Judge queue: {judge_queue['items']} judgments in {judge_queue['batches']} batches "
+                     f"(mean batch size {judge_queue['mean_batch_size']:.1f})")
+        if "prompt_calls" in judge_queue:
+            lines.append(f"Batched judge prompts: {judge_queue['prompt_calls']} calls, "
+                         f"{judge_queue['prompt_fallbacks']} per-joke fallbacks")
+    judge_memo = summary.get("judge_memo")
+    if judge_memo:
+        lines.append(f"Judge memo: {judge_memo['hits']} hits, {judge_memo['misses']} misses "
+                     f"({judge_memo['hit_rate']:.1%} hit rate)")
+    incremental = summary.get("incremental")
+    if incremental:
+        phases = ", ".join(
+            f"{name} {phase['mode']}" + (f" (+{phase['added']}/-{phase['removed']} examples, "
+                                         f"{phase['budget']} metric calls)" if phase["mode"] == "warm" else "")
+            for name, phase in incremental["phases"].items()
+        )
+        lines.append(f"Incremental: reused {incremental['reused']} of {incremental['reused'] + incremental['scored']} "
+                     f"scores ({incremental['reuse_rate']:.1%})" + (f"; GEPA: {phases}" if phases else ""))
+    traces = summary.get("traces")
+    if traces:
+        interned = traces["interned"]
+        lines.append(f"Traces: {traces['rows']} rows in {traces['batches']} batches "
+                     f"({traces['bytes'] / 1024:.0f} KB, {interned['candidate']} candidates, "
+                     f"{interned['topic']} topics) -> {traces['path']}")
+    return lines
+
+
+def _label(summary):
+    config = summary.get("config", {})
+    student = config.get("student", "?")
+    teacher = config.get("teacher", "?")
+    return f"{student} + {teacher}"
+
+
+def _cell(score):
+    return "stopped" if score is None else f"{score:.2f}%"
+
+
+def _improvement(before, after):
+    if not before or after is None:
+        return "n/a"
+    change = (after - before) / before * 100
+    return "No change" if abs(change) < 0.05 else f"{change:+.0f}%"
+
+
+def render_benchmark_tables(summaries):
+    """Render BENCHMARKS.md-style markdown tables from one or more run summaries"""
+    lines = ["### Audience Judge Optimization", "",
+             "| Configuration | Baseline | GEPA Optimized | Improvement |",
+             "|---------------|----------|----------------|-------------|"]
+    for summary in summaries:
+        scores = summary.get("scores", {})
+        # Stopped evaluations are left out of "scores" and of the comparison
+        before, after = scores.get("baseline_judge"), scores.get("optimized_judge")
+        lines.append(f"| {_label(summary)} | {_cell(before)} | **{_cell(after)}** | {_improvement(before, after)} |")
+
+    lines += ["", "### Comedian Performance", "",
+              "| Configuration | Baseline | GEPA Optimized | Improvement |",
+              "|---------------|----------|----------------|-------------|"]
+    for summary in summaries:
+        scores = summary.get("scores", {})
+        # Stopped evaluations are left out of "scores" and of the comparison
+        before, after = scores.get("baseline_comedian"), scores.get("optimized_comedian")
+        lines.append(f"| {_label(summary)} | {_cell(before)} | **{_cell(after)}** | {_improvement(before, after)} |")
+
+    lines += ["", "### Runtime Performance", "",
+              "| Configuration | Total Runtime | GEPA Phase | LM Calls | Cache Hits | Tokens (prompt / completion) |",
+              "|---------------|---------------|------------|----------|------------|------------------------------|"]
+    for summary in summaries:
+        gepa = sum(p["seconds"] for p in summary["phases"] if PHASE_GROUPS.get(p["name"]) == "GEPA Optimization")
+        calls = sum(p["lm_calls"] for p in summary["phases"])
+        hits = sum(p["cache_hits"] for p in summary["phases"])
+        prompt = sum(p["prompt_tokens"] for p in summary["phases"])
+        completion = sum(p["completion_tokens"] for p in summary["phases"])
+        lines.append(f"| {_label(summary)} | {summary['total_seconds'] / 60:.1f} min | {gepa / 60:.1f} min "
+                     f"| {calls} | {hits} | {prompt} / {completion} |")
+
+    lines += ["", "### Runtime Breakdown", "",
+              "| Configuration | " + " | ".join(dict.fromkeys(PHASE_GROUPS.values())) + " |",
+              "|---------------|" + "|".join("-" * (len(g) + 2) for g in dict.fromkeys(PHASE_GROUPS.values())) + "|"]
+    for summary in summaries:
+        groups = dict.fromkeys(PHASE_GROUPS.values(), 0.0)
+        for phase in summary["phases"]:
+            group = PHASE_GROUPS.get(phase["name"])
+            if group:
+                groups[group] += phase["seconds"]
+        lines.append(f"| {_label(summary)} | " + " | ".join(f"{s:.0f}s" for s in groups.values()) + " |")
+
+    lines += ["", "### LM Latency per Model", "",
+              "| Configuration | Model | Calls | p50 | p90 | p99 |",
+              "|---------------|-------|-------|-----|-----|-----|"]
+    for summary in summaries:
+        for model, stats in summary["models"].items():
+            lines.append(f"| {_label(summary)} | {model} | {stats['calls']} | {stats['latency_p50']:.2f}s "
+                         f"| {stats['latency_p90']:.2f}s | {stats['latency_p99']:.2f}s |")
+    return "\n".join(lines)
+
+
+def update_markdown(path, tables):
+    """Replace the generated region between the metrics markers in a markdown file"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    begin, end = text.index(TABLE_BEGIN), text.index(TABLE_END)
+    text = text[:begin + len(TABLE_BEGIN)] + "\n" + tables + "\n" + text[end:]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render benchmark tables from --metrics-out JSON files")
+    parser.add_argument("metrics", nargs="+", help="Metrics JSON files written with --metrics-out")
+    parser.add_argument("--update", metavar="MARKDOWN", help="Rewrite the generated tables in this file")
+    args = parser.parse_args()
+
+    summaries = []
+    for path in args.metrics:
+        with open(path, encoding="utf-8") as f:
+            summaries.append(json.load(f))
+    tables = render_benchmark_tables(summaries)
+
+    if args.update:
+        update_markdown(args.update, tables)
+        print(f"Updated {args.update} from {len(summaries)} run(s)")
+    else:
+        print(tables)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Streaming loader for labeled joke datasets.
+
+Jokes are read one record at a time from JSONL, JSON (an array of records,
+decoded one element at a time), CSV or Parquet files, so the corpus is never
+held in memory. Every record is assigned to train / val / dev (60/20/20) by
+hashing its topic and joke text, which is deterministic and needs no shuffle of
+the full list. Each split is subsampled with a fixed-size reservoir, so memory
+stays bounded by the requested split sizes, and dspy.Example objects are only
+built for the records that are kept. A split without a size is kept whole, so
+memory is only bounded for large files when all three sizes are given.
+
+Records need "topic", "joke" and "funny" fields; "comedian" is optional.
+"funny" may be a boolean or one of true/false, yes/no, 1/0.
+
+Parquet support requires pyarrow (`pip install pyarrow`).
+"""
+
+import csv
+import hashlib
+import json
+import os
+import random
+
+SPLITS = ("train", "val", "dev")
+SPLIT_BOUNDS = (60, 80)  # Hash buckets 0-59 train, 60-79 val, 80-99 dev
+TRUE_VALUES = ("true", "yes", "1")
+
+
+def _parse_funny(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def normalize_record(row):
+    """Return a record with the tutorial's fields, or None if it has no joke"""
+    joke = (row.get("joke") or "").strip()
+    if not joke:
+        return None
+    return {
+        "topic": (row.get("topic") or "").strip(),
+        "joke": joke,
+        "comedian": (row.get("comedian") or "").strip() or None,
+        "funny": _parse_funny(row.get("funny", False)),
+    }
+
+
+def _iter_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _iter_parquet(path, batch_size=4096):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet datasets requires pyarrow: pip install pyarrow") from e
+
+    columns = ["topic", "joke", "comedian", "funny"]
+    parquet_file = pq.ParquetFile(path)
+    present = [c for c in columns if c in parquet_file.schema_arrow.names]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=present):
+        yield from batch.to_pylist()
+
+
+def _iter_json(path, chunk_size=1 << 16):
+    """Records of a JSON array, decoded one at a time; a .json file holding JSON Lines is read as such"""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buffer, position = f.read(chunk_size), 0
+
+        def next_char():
+            """First non-whitespace character from `position` on, reading more of the file as needed"""
+            nonlocal buffer, position
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position < len(buffer):
+                    return buffer[position]
+                buffer, position = f.read(chunk_size), 0
+                if not buffer:
+                    return ""
+
+        if next_char() != "[":
+            yield from _iter_jsonl(path)
+            return
+        position += 1
+        if next_char() == "]":
+            return
+        while True:
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                # The record continues past the buffer: keep its start and read on
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}: expected an array of JSON objects, found {type(record).__name__}")
+            yield record
+            separator = next_char()
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"{path}: expected ',' or ']' between records, found {separator!r}")
+            position += 1
+            next_char()
+
+
+READERS = {".jsonl": _iter_jsonl, ".json": _iter_json, ".csv": _iter_csv, ".parquet": _iter_parquet}
+
+
+def iter_records(path):
+    """Stream normalized records from a .jsonl, .json, .csv or .parquet file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported dataset format '{extension}' (expected {', '.join(READERS)})")
+    for row in READERS[extension](path):
+        record = normalize_record(row)
+        if record is not None:
+            yield record
+
+
+def split_of(record, salt=""):
+    """Deterministically assign a record to "train", "val" or "dev" from a hash of its text"""
+    key = f"{salt}|{record['topic']}|{record['joke']}".encode("utf-8")
+    bucket = int.from_bytes(hashlib.sha256(key).digest()[:8], "big") % 100
+    if bucket < SPLIT_BOUNDS[0]:
+        return "train"
+    return "val" if bucket < SPLIT_BOUNDS[1] else "dev"
+
+
+class Reservoir:
+    """Uniform random sample of at most k items from a stream of unknown length (Algorithm R)
+
+    Args:
+        k (int): Sample size, or None to keep every item
+        rng (random.Random): Source of randomness
+    """
+
+    def __init__(self, k, rng):
+        self.k = k
+        self.rng = rng
+        self.seen = 0
+        self.items = []
+
+    def add(self, item):
+        self.seen += 1
+        if self.k is None or len(self.items) < self.k:
+            self.items.append(item)
+            return
+        index = self.rng.randrange(self.seen)
+        if index < self.k:
+            self.items[index] = item
+
+
+def reservoir_sample(items, k, seed=0):
+    """Return a uniform sample of k items from any iterable, in one pass and O(k) memory"""
+    reservoir = Reservoir(k, random.Random(seed))
+    for item in items:
+        reservoir.add(item)
+    return reservoir.items
+
+
+def to_example(record):
+    """Build the dspy.Example the tutorial uses for a record"""
+    import dspy
+
+    return dspy.Example(**record).with_inputs("topic", "comedian", "joke")
+
+
+def load_joke_datasets(path, trainset_size=None, valset_size=None, devset_size=None, seed=0, salt=""):
+    """Stream a dataset file into train / val / dev lists of dspy.Examples
+
+    Only splits given a size are reservoir-sampled; the others keep every record they are assigned.
+
+    Args:
+        path (str): .jsonl, .json, .csv or .parquet file of labeled jokes
+        trainset_size (int): Maximum training examples (reservoir-sampled), None for all
+        valset_size (int): Maximum validation examples, None for all
+        devset_size (int): Maximum development examples, None for all
+        seed (int): Seed for reservoir sampling
+        salt (str): Changes the hash-based split assignment
+    """
+    rng = random.Random(seed)
+    reservoirs = {
+        "train": Reservoir(trainset_size, rng),
+        "val": Reservoir(valset_size, rng),
+        "dev": Reservoir(devset_size, rng),
+    }
+    for record in iter_records(path):
+        reservoirs[split_of(record, salt)].add(record)
+
+    scanned = sum(reservoir.seen for reservoir in reservoirs.values())
+    print(f"Streamed {scanned} jokes from {path}")
+    splits = []
+    for name in SPLITS:
+        records = reservoirs[name].items
+        rng.shuffle(records)  # Files are often grouped by label; don't hand GEPA a sorted split
+        splits.append([to_example(record) for record in records])
+    for name, examples in zip(("Training", "Validation", "Development"), splits):
+        print(f"{name} set size: {len(examples)}")
+    return tuple(splits)
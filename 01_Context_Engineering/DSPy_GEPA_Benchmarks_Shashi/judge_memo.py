@@ -0,0 +1,105 @@
+"""
+Memoization of LLM-as-a-Judge verdicts.
+
+GEPA re-judges the same jokes many times: unchanged candidates regenerate
+identical outputs, and few-shot comedians often repeat training jokes verbatim.
+JudgeMemo remembers each verdict under (normalized topic, normalized joke,
+judge program fingerprint) so a duplicate judgment costs nothing. Entries are
+kept in a bounded LRU and can optionally be persisted to a JSON file.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Normalize text for memo lookups: case-insensitive, whitespace collapsed"""
+    return " ".join(str(text or "").lower().split())
+
+
+def program_fingerprint(program):
+    """Hash a DSPy program's state (instructions, demos) and the models its predictors use"""
+    models = sorted(
+        getattr(predictor.lm, "model", "") or "" for _, predictor in program.named_predictors()
+    )
+    state = json.dumps({"state": program.dump_state(), "models": models}, sort_keys=True, default=str)
+    return hashlib.sha256(state.encode("utf-8")).hexdigest()[:16]
+
+
+class JudgeMemo:
+    """Bounded LRU memo of judge verdicts with hit-rate statistics
+
+    Args:
+        max_entries (int): Maximum verdicts kept in memory
+        path (str): Optional JSON file to load verdicts from (the most recent max_entries) and save them to
+    """
+
+    def __init__(self, max_entries=10000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                entries = list(json.load(f).items())
+            # save() writes verdicts least recently used first, so the most recent max_entries come last
+            self._entries.update(entries[max(0, len(entries) - max_entries):])
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _key(self, topic, joke, program_hash):
+        return f"{program_hash}|{normalize_text(topic)}|{normalize_text(joke)}"
+
+    def get(self, topic, joke, program_hash):
+        """Return the memoized verdict dict ({"funny", "reasoning"}) or None"""
+        key = self._key(topic, joke, program_hash)
+        with self._lock:
+            verdict = self._entries.get(key)
+            if verdict is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return verdict
+
+    def put(self, topic, joke, program_hash, funny, reasoning):
+        """Remember a verdict, evicting the least recently used one past max_entries"""
+        key = self._key(topic, joke, program_hash)
+        with self._lock:
+            self._entries[key] = {"funny": funny, "reasoning": reasoning}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """Write the memo to its JSON file (if a path was given)"""
+        if not self.path:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def stats(self):
+        """Return a snapshot of the memo counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,171 @@
+"""
+Persistent, content-addressed cache for LM responses.
+
+Each response is stored as one JSON file named after the SHA-256 of the request
+(model + generation params + formatted messages). Files are written to a temp
+file and atomically renamed into place, so several threads or processes can share
+one cache directory without the locking problems of a single SQLite database.
+Least-recently-used entries are evicted once the directory exceeds its size limit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+CACHE_MODES = ("read", "write", "off")
+
+# Request params that identify the endpoint rather than the generation
+IGNORED_PARAMS = ("api_key", "api_base", "base_url")
+
+
+def make_cache_key(model, params, prompt=None, messages=None):
+    """Build a stable cache key from the model, generation params and formatted messages"""
+    payload = {
+        "model": model,
+        # Unset (None) params are not sent to the model, so they don't change the response
+        "params": {k: v for k, v in sorted(params.items()) if k not in IGNORED_PARAMS and v is not None},
+        "prompt": prompt,
+        "messages": messages,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk LM response cache with LRU eviction and hit/miss counters
+
+    Args:
+        cache_dir (str): Directory holding the cache entries
+        mode (str): "write" reads and stores, "read" only serves existing entries, "off" disables the cache
+        max_size_mb (float): Evict least-recently-used entries once the cache grows past this size
+    """
+
+    def __init__(self, cache_dir=".lm_cache", mode="write", max_size_mb=512):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = 0
+
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._size = sum(size for _, _, size in self._entries())
+
+    def __deepcopy__(self, memo):
+        # DSPy deep-copies programs (and their LMs) during compilation; all copies share one cache
+        return self
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _entries(self):
+        """Yield (path, last_used, size) for every entry in the cache directory"""
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another process
+                yield entry.path, stat.st_mtime, stat.st_size
+
+    def get(self, key):
+        """Return the cached response dict for key, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                record = json.load(f)
+            # Touch the entry so LRU eviction keeps recently used responses
+            os.utime(path, None)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return record["response"]
+
+    def put(self, key, response, model=None):
+        """Store a response dict under key (no-op unless mode is "write")"""
+        if self.mode != "write":
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {"key": key, "model": model, "created": time.time(), "response": response}
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False, default=str)
+            size = os.path.getsize(tmp_path)
+            try:
+                size -= os.path.getsize(path)  # Overwriting an entry only adds the difference
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self.writes += 1
+            self._size += size
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        """Remove least-recently-used entries until the cache is below 90% of its size limit"""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            total = sum(size for _, _, size in entries)
+            target = int(self.max_bytes * 0.9)
+
+            for path, _, size in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+            self._size = total
+
+    def stats(self):
+        """Return a snapshot of the cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size_mb": round(self._size / (1024 * 1024), 2),
+            }
@@ -0,0 +1,296 @@
+"""
+DSPy language model client for local Ollama models.
+
+LocalLM is a drop-in dspy.LM that serves repeated requests from a persistent
+ResponseCache instead of paying for inference again. DSPy's own request cache
+is turned off for these LMs so there is exactly one cache in play.
+
+Every LocalLM runs its calls through a LocalEngine, DSPy's engine hook: DSPy
+renders each call into one canonical Request and the engine answers it from the
+cache or the model server. Ollama models ("ollama_chat/..." and "ollama/...")
+are called through one pooled OllamaClient per LM, which bounds the number of
+requests in flight and owns retries; any other model is sent through LiteLLM.
+With a TokenBudget, Ollama requests get learned per-predictor max_tokens limits
+(see token_budget.py).
+
+Requests carry only plain-text chat messages and the generation params in
+SUPPORTED_PARAMS (plus Ollama's own options as Config.extensions). Anything else
+(response_format, tools, reasoning, images, ...) is refused with an
+UnsupportedFeatureError rather than silently dropped. DSPy sends n > 1 as n
+identical Requests, so with the response cache on they share one entry.
+"""
+
+import dataclasses
+import time
+
+import dspy
+from dspy.clients.engines.base import validate_request
+from dspy.lm15 import Message, Response, TextPart, UnsupportedFeatureError, Usage, response_to_events
+
+from lm_cache import IGNORED_PARAMS, make_cache_key
+from ollama_client import OPTION_NAMES, OllamaClient, ollama_base_url
+
+OLLAMA_PREFIXES = ("ollama_chat/", "ollama/")
+
+# Request.config fields LocalLM sends (under the same names as DSPy's LM kwargs)
+SUPPORTED_PARAMS = ("max_tokens", "temperature", "top_p", "top_k", "stop", "seed")
+
+
+def _to_dict(response):
+    """Convert a provider response into a JSON-serialisable dict"""
+    if hasattr(response, "model_dump"):
+        return response.model_dump()
+    return dict(response)
+
+
+def _token_counts(response):
+    """Return (prompt_tokens, completion_tokens) from an OpenAI-style response dict"""
+    usage = response.get("usage") or {}
+    return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+
+
+def _from_ollama(model, result):
+    """Convert an Ollama /api/chat result into an OpenAI-style response dict"""
+    prompt_tokens = result.get("prompt_eval_count", 0)
+    completion_tokens = result.get("eval_count", 0)
+    return {
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": result.get("done_reason") or "stop",
+                "message": {"role": "assistant", "content": result["message"]["content"]},
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _to_response(model, data):
+    """Build DSPy's Response from an OpenAI-style response dict (fresh or cached)"""
+    choice = data["choices"][0]
+    finish_reason = choice.get("finish_reason") or "stop"
+    prompt_tokens, completion_tokens = _token_counts(data)
+    return Response(
+        id=data.get("id"),
+        model=model,
+        message=Message.assistant([TextPart(choice["message"]["content"] or "")]),
+        finish_reason=finish_reason if finish_reason in ("stop", "length") else "stop",
+        usage=Usage(input_tokens=prompt_tokens, output_tokens=completion_tokens,
+                    total_tokens=prompt_tokens + completion_tokens),
+    )
+
+
+def _chat_request(request):
+    """Return the OpenAI-style (messages, params) of a Request, refusing anything LocalLM can't send"""
+    validate_request(request)
+    config = request.config
+    unsupported = [
+        field.name for field in dataclasses.fields(config)
+        if field.name not in SUPPORTED_PARAMS + ("extensions",) and getattr(config, field.name) not in (None, ())
+    ]
+    unsupported += sorted(set(config.extensions or {}) - set(OPTION_NAMES))
+    if request.tools:
+        unsupported.append("tools")
+    if any(not isinstance(part, TextPart) for message in request.messages for part in message.parts):
+        unsupported.append("non-text message parts")
+    if unsupported:
+        raise UnsupportedFeatureError(f"{request.model} (LocalLM) does not support: {', '.join(unsupported)}")
+
+    messages = []
+    if request.system is not None:
+        system = request.system if isinstance(request.system, str) else "".join(part.text for part in request.system)
+        messages.append({"role": "system", "content": system})
+    messages.extend({"role": message.role, "content": message.text or ""} for message in request.messages)
+
+    params = {name: getattr(config, name) for name in SUPPORTED_PARAMS}
+    params["stop"] = list(config.stop) or None
+    params.update(config.extensions or {})
+    return messages, {k: v for k, v in params.items() if v is not None}
+
+
+class LocalEngine:
+    """DSPy engine for a LocalLM: one canonical Request in, one Response out
+
+    DSPy owns fan-out, history and callbacks; the LM owns the cache and retries.
+    """
+
+    supported_params = SUPPORTED_PARAMS
+
+    def __init__(self, lm):
+        self.lm = lm
+
+    def complete(self, request):
+        messages, params = _chat_request(request)
+        return self.lm._complete(messages, params)
+
+    def stream(self, request):
+        return response_to_events(self.complete(request))
+
+    def close(self):
+        pass
+
+
+class AsyncLocalEngine(LocalEngine):
+    """Async counterpart of LocalEngine"""
+
+    async def complete(self, request):
+        messages, params = _chat_request(request)
+        return await self.lm._acomplete(messages, params)
+
+    async def stream(self, request):
+        for event in response_to_events(await self.complete(request)):
+            yield event
+
+    async def aclose(self):
+        pass
+
+
+class LocalLM(dspy.LM):
+    """dspy.LM backed by a local model server with an on-disk response cache
+
+    Args:
+        model (str): LiteLLM model name, e.g. "ollama_chat/llama3.2:1b"
+        response_cache (ResponseCache): Shared cache, or None to always call the model
+        concurrency (int): Maximum requests in flight through this LM's connection pool
+        metrics (RunMetrics): Optional recorder for call counts, tokens and latency
+        keep_alive: How long Ollama keeps the model loaded after each request (None for the server default)
+        scheduler (ResidencyScheduler): Optional per-model phase scheduler shared with other LMs
+        base_url (str): Ollama server URL (default: api_base, then OLLAMA_HOST, then localhost:11434)
+        token_budget (TokenBudget): Optional per-predictor generation limits shared with other LMs
+        resilience (Resilience): Optional deadline, retry, hedging and circuit breaker policy shared with other LMs
+        **kwargs: Passed through to dspy.LM (temperature, max_tokens, ...); api_key and api_base
+            are kept by the LM as connection settings
+    """
+
+    def __init__(self, model, response_cache=None, concurrency=8, metrics=None, keep_alive=None,
+                 scheduler=None, base_url=None, token_budget=None, resilience=None, **kwargs):
+        self.connection = {k: kwargs.pop(k) for k in IGNORED_PARAMS if k in kwargs}
+        # The client retries each request itself, so DSPy must not retry it again
+        self.retries = kwargs.pop("num_retries", 3)
+        kwargs.update(cache=False, num_retries=0)
+        super().__init__(model, engine=LocalEngine(self), async_engine=AsyncLocalEngine(self), **kwargs)
+        self.response_cache = response_cache
+        self.metrics = metrics
+        self.keep_alive = keep_alive
+        self.scheduler = scheduler
+        self.token_budget = token_budget
+        self.resilience = resilience
+        self.client = self._make_client(base_url or self.connection.get("api_base"), concurrency)
+
+    def _make_client(self, base_url, concurrency):
+        """The OllamaClient this LM calls (None to send requests through LiteLLM instead)"""
+        if not self.model.startswith(OLLAMA_PREFIXES):
+            return None
+        return OllamaClient(
+            ollama_base_url(base_url),
+            max_connections=concurrency,
+            retries=self.retries,
+            keep_alive=self.keep_alive,
+            scheduler=self.scheduler,
+            resilience=self.resilience,
+        )
+
+    def dump_state(self):
+        # The engines are this LM's connection to the server, not settings a saved program carries
+        return {**dspy.BaseLM.dump_state(self), "num_retries": self.retries}
+
+    @property
+    def model_name(self):
+        """Model name as the server knows it, without the LiteLLM provider prefix"""
+        return self.model.split("/", 1)[1] if "/" in self.model else self.model
+
+    def client_stats(self):
+        """Connection pool and retry counters (empty for models served through LiteLLM)"""
+        return self.client.stats() if self.client is not None else {}
+
+    def _cache_key(self, messages, params):
+        if self.response_cache is None or not self.response_cache.enabled:
+            return None
+        return make_cache_key(self.model, params, messages=messages)
+
+    def _cached_response(self, key):
+        if key is None:
+            return None
+        return self.response_cache.get(key)
+
+    def _store_response(self, key, response):
+        if key is not None:
+            self.response_cache.put(key, response, model=self.model)
+
+    def _record(self, start, response=None):
+        if self.metrics is None:
+            return
+        if response is None:
+            self.metrics.record_call(self.model, 0.0, cache_hit=True)
+            return
+        prompt_tokens, completion_tokens = _token_counts(response)
+        self.metrics.record_call(self.model, time.perf_counter() - start, prompt_tokens, completion_tokens)
+
+    def _chat(self, messages, params):
+        """One completion, within the predictor's token budget (retried without it if that truncates it)"""
+        if self.token_budget is None:
+            return self.client.chat(self.model_name, messages, params)
+        plan = self.token_budget.plan(self.model, messages, params)
+        result = self.client.chat(self.model_name, messages, plan.params)
+        if self.token_budget.record(plan, result):
+            result = self.client.chat(self.model_name, messages, plan.fallback)
+            self.token_budget.record(plan, result, retry=True)
+        return result
+
+    async def _achat(self, messages, params):
+        if self.token_budget is None:
+            return await self.client.achat(self.model_name, messages, params)
+        plan = self.token_budget.plan(self.model, messages, params)
+        result = await self.client.achat(self.model_name, messages, plan.params)
+        if self.token_budget.record(plan, result):
+            result = await self.client.achat(self.model_name, messages, plan.fallback)
+            self.token_budget.record(plan, result, retry=True)
+        return result
+
+    def _send(self, messages, params):
+        """Run the request against the model server (no caching)"""
+        if self.client is None:
+            from litellm import completion
+
+            return _to_dict(completion(self.model, messages, num_retries=self.retries, **params, **self.connection))
+        return _from_ollama(self.model, self._chat(messages, params))
+
+    async def _asend(self, messages, params):
+        if self.client is None:
+            from litellm import acompletion
+
+            response = await acompletion(self.model, messages, num_retries=self.retries, **params, **self.connection)
+            return _to_dict(response)
+        return _from_ollama(self.model, await self._achat(messages, params))
+
+    def _complete(self, messages, params):
+        """Answer one request from the response cache or the model server"""
+        start = time.perf_counter()
+        key = self._cache_key(messages, params)
+        response = self._cached_response(key)
+        if response is not None:
+            self._record(start)
+            return _to_response(self.model, response)
+
+        response = self._send(messages, params)
+        self._record(start, response)
+        self._store_response(key, response)
+        return _to_response(self.model, response)
+
+    async def _acomplete(self, messages, params):
+        start = time.perf_counter()
+        key = self._cache_key(messages, params)
+        response = self._cached_response(key)
+        if response is not None:
+            self._record(start)
+            return _to_response(self.model, response)
+
+        response = await self._asend(messages, params)
+        self._record(start, response)
+        self._store_response(key, response)
+        return _to_response(self.model, response)
@@ -0,0 +1,362 @@
+"""
+Pooled HTTP client for a local Ollama server.
+
+One OllamaClient is shared by every call an LM makes, so concurrent evaluation
+threads reuse a fixed pool of keep-alive connections instead of opening a new
+socket per request. A PrefixGate caps the number of requests in flight:
+callers beyond the limit block until a slot frees up (backpressure), which keeps
+file descriptor usage flat no matter how many evaluation threads are running,
+and waiting requests sharing a prompt prefix are admitted back-to-back so the
+server can reuse its KV cache.
+
+With a keep_alive set, every request carries it, so models stay loaded between
+GEPA phases instead of expiring after Ollama's default 5 minutes. Responses whose
+load_duration shows the model had to be loaded are counted as model loads.
+
+Clients of different models on the same server can share a ResidencyScheduler,
+which admits their requests in per-model phases (see residency.py).
+
+Every request goes through a Resilience policy (see resilience.py): deadlines,
+jittered retries of connection errors, timeouts and 5xx responses, optional
+hedging of slow requests, and a circuit breaker per server and model. Clients
+share one policy when it is passed in; otherwise each gets its own, with the
+client's timeout and retries.
+
+This module deliberately does not import DSPy.
+"""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import os
+import re
+import threading
+import time
+
+import httpx
+
+from prefix_gate import PrefixGate, prefix_key
+from resilience import Resilience
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+DEFAULT_KEEP_ALIVE = 300  # Ollama unloads idle models after 5 minutes unless told otherwise
+LOAD_THRESHOLD = 0.1  # A resident model reports a load_duration of a few milliseconds
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+# Generation params understood by Ollama's "options" object (DSPy name -> Ollama name)
+OPTION_NAMES = {
+    "temperature": "temperature",
+    "max_tokens": "num_predict",
+    "top_p": "top_p",
+    "top_k": "top_k",
+    "seed": "seed",
+    "stop": "stop",
+    "num_ctx": "num_ctx",
+    "repeat_penalty": "repeat_penalty",
+}
+
+
+def ollama_base_url(api_base=None):
+    """Resolve the Ollama server URL from an explicit api_base or the OLLAMA_HOST variable"""
+    url = api_base or os.environ.get("OLLAMA_HOST") or DEFAULT_OLLAMA_URL
+    if "://" not in url:
+        url = f"http://{url}"
+    return url.rstrip("/")
+
+
+def parse_keep_alive(value):
+    """Convert a --keep-alive value into what Ollama accepts: seconds as a number, or a duration string"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value) if "." in value else int(value)
+    except ValueError:
+        if DURATION_PART.sub("", value.strip()):
+            raise ValueError(f"Invalid keep-alive '{value}' (expected seconds, -1, or a duration like 30m or 1h)")
+        return value.strip()
+
+
+def keep_alive_seconds(value):
+    """Seconds a model stays loaded after a request with this keep_alive (inf for negative values)"""
+    value = parse_keep_alive(value)
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, str):
+        sign = -1 if value.startswith("-") else 1
+        value = sign * sum(float(n) * DURATION_UNITS[unit] for n, unit in DURATION_PART.findall(value))
+    return float("inf") if value < 0 else float(value)
+
+
+def build_options(params):
+    """Translate DSPy/OpenAI-style generation params into Ollama options"""
+    return {OPTION_NAMES[k]: v for k, v in params.items() if k in OPTION_NAMES and v is not None}
+
+
+class OllamaClient:
+    """Shared, bounded connection pool for one Ollama server
+
+    Args:
+        base_url (str): Ollama server URL, e.g. http://localhost:11434
+        max_connections (int): Maximum concurrent requests (and pooled sockets)
+        timeout (float): Per-request timeout in seconds (ignored when a resilience policy is given)
+        retries (int): Retries for connection errors and 5xx responses (ignored when a resilience policy is given)
+        transport: Optional httpx transport (sync and async) replacing the network, e.g. the stub backend
+        keep_alive: How long the server keeps the model loaded after each request
+            (seconds, -1 for ever, or a duration like "30m"; None leaves Ollama's default)
+        scheduler (ResidencyScheduler): Optional scheduler shared with the clients of other models
+        resilience (Resilience): Optional deadline, retry, hedging and circuit breaker policy shared
+            with other clients
+    """
+
+    def __init__(self, base_url=DEFAULT_OLLAMA_URL, max_connections=8, timeout=600.0, retries=3, transport=None,
+                 keep_alive=None, scheduler=None, resilience=None):
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.resilience = resilience or Resilience(attempt_timeout=timeout, retries=retries)
+        self.timeout = self.resilience.attempt_timeout
+        self.retries = self.resilience.retries
+        self.keep_alive = parse_keep_alive(keep_alive)
+        self.scheduler = scheduler
+        self.requests = 0
+        self.retried = 0
+        self.retry_seconds = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.model_loads = 0
+        self.load_seconds = 0.0
+        self.unloads = 0
+        # Hedged duplicates are sent outside the gate, so the pool has room for one per gated request
+        pool_size = max_connections * 2 if self.resilience.hedge_after is not None else max_connections
+        self._limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=max_connections)
+        self._transport = transport
+        self._client = httpx.Client(
+            base_url=base_url, limits=self._limits, timeout=self.timeout, transport=transport
+        )
+        self._gate = PrefixGate(max_connections)
+        self._hedge_executor = None
+        self._lock = threading.Lock()
+        # httpx.AsyncClient is bound to the event loop that uses it
+        self._async_clients = {}
+
+    def __deepcopy__(self, memo):
+        # LM copies made by DSPy must keep sharing the same pool
+        return self
+
+    def _acquire(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _payload(self, model, messages, params, keep_alive=None):
+        payload = {"model": model, "messages": messages, "stream": False, "options": build_options(params)}
+        keep_alive = parse_keep_alive(keep_alive) if keep_alive is not None else self.keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    def _record_load(self, result):
+        load_seconds = result.get("load_duration", 0) / 1e9
+        if load_seconds >= LOAD_THRESHOLD:
+            with self._lock:
+                self.model_loads += 1
+                self.load_seconds += load_seconds
+        return result
+
+    def _count_retry(self, delay):
+        with self._lock:
+            self.retried += 1
+            self.retry_seconds += delay
+        return delay
+
+    def _endpoint(self, model):
+        return f"{self.base_url} {model}"
+
+    def _executor(self):
+        """Threads for hedged requests: two per gate slot, so a primary and its hedge never wait for a worker"""
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=2 * self.max_connections, thread_name_prefix="hedge"
+                )
+            return self._hedge_executor
+
+    @contextlib.contextmanager
+    def _phase(self, model):
+        """Wait for the scheduler to make `model` the active one (no-op without a scheduler)"""
+        if self.scheduler is None:
+            yield
+            return
+        previous = self.scheduler.acquire(model)
+        try:
+            if previous is not None:
+                self.unload(previous)
+            yield
+        finally:
+            self.scheduler.release(model)
+
+    @contextlib.asynccontextmanager
+    async def _aphase(self, model):
+        if self.scheduler is None:
+            yield
+            return
+        previous = await self.scheduler.acquire_async(model)
+        try:
+            if previous is not None:
+                await self.aunload(previous)
+            yield
+        finally:
+            self.scheduler.release(model)
+
+    def chat(self, model, messages, params, keep_alive=None):
+        """Send one non-streaming /api/chat request and return Ollama's response dict"""
+        payload = self._payload(model, messages, params, keep_alive)
+
+        def post(timeout):
+            response = self._client.post("/api/chat", json=payload, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+
+        endpoint = self._endpoint(model)
+        with self._phase(model):
+            self._gate.acquire(prefix_key(messages))
+            self._acquire()
+            try:
+                deadline = self.resilience.start(endpoint)
+                for attempt in range(self.retries + 1):
+                    self.resilience.admit(endpoint, deadline)
+                    try:
+                        return self._record_load(self.resilience.send(endpoint, post, deadline, self._executor()))
+                    except httpx.HTTPError as e:
+                        delay = self.resilience.retry_delay(endpoint, e, attempt, deadline)
+                        if delay is None:
+                            raise
+                        time.sleep(self._count_retry(delay))
+            finally:
+                self._release()
+                self._gate.release()
+
+    def _async_client(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._async_clients:
+                # Drop pools of event loops that have since been closed
+                for closed in [l for l in self._async_clients if l.is_closed()]:
+                    del self._async_clients[closed]
+                client = httpx.AsyncClient(
+                    base_url=self.base_url, limits=self._limits, timeout=self.timeout, transport=self._transport
+                )
+                self._async_clients[loop] = client
+            return self._async_clients[loop]
+
+    async def achat(self, model, messages, params, keep_alive=None):
+        """Async counterpart of chat()"""
+        payload = self._payload(model, messages, params, keep_alive)
+        client = self._async_client()
+
+        async def post(timeout):
+            response = await client.post("/api/chat", json=payload, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+
+        endpoint = self._endpoint(model)
+        async with self._aphase(model):
+            await self._gate.acquire_async(prefix_key(messages))
+            self._acquire()
+            try:
+                deadline = self.resilience.start(endpoint)
+                for attempt in range(self.retries + 1):
+                    await self.resilience.aadmit(endpoint, deadline)
+                    try:
+                        return self._record_load(await self.resilience.asend(endpoint, post, deadline))
+                    except httpx.HTTPError as e:
+                        delay = self.resilience.retry_delay(endpoint, e, attempt, deadline)
+                        if delay is None:
+                            raise
+                        await asyncio.sleep(self._count_retry(delay))
+            finally:
+                self._release()
+                self._gate.release()
+
+    def _count_unload(self, response):
+        response.raise_for_status()
+        with self._lock:
+            self.unloads += 1
+
+    def unload(self, model):
+        """Ask the server to unload a model now (best effort; errors are ignored)"""
+        try:
+            self._count_unload(self._client.post("/api/chat", json={"model": model, "messages": [], "keep_alive": 0}))
+        except httpx.HTTPError:
+            pass
+
+    async def aunload(self, model):
+        """Async counterpart of unload()"""
+        try:
+            response = await self._async_client().post(
+                "/api/chat", json={"model": model, "messages": [], "keep_alive": 0}
+            )
+            self._count_unload(response)
+        except httpx.HTTPError:
+            pass
+
+    def list_models(self):
+        """Return the names of the models pulled on this server"""
+        response = self._client.get("/api/tags")
+        response.raise_for_status()
+        return [m["name"] for m in response.json().get("models", [])]
+
+    def stats(self):
+        """Return request counters for this pool"""
+        with self._lock:
+            stats = {
+                "base_url": self.base_url,
+                "max_connections": self.max_connections,
+                "keep_alive": self.keep_alive,
+                "requests": self.requests,
+                "retried": self.retried,
+                "retry_seconds": self.retry_seconds,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "model_loads": self.model_loads,
+                "load_seconds": self.load_seconds,
+                "unloads": self.unloads,
+            }
+        return {**stats, **self._gate.stats()}
+
+    def close(self):
+        """Close the pooled connections, each event loop's async pool on its own loop
+
+        From a coroutine on a loop with a pool, use aclose() so that pool is awaited.
+        """
+        self._client.close()
+        with self._lock:
+            clients, self._async_clients = self._async_clients, {}
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for loop, client in clients.items():
+            if loop.is_closed():
+                continue  # Nothing can run aclose() on a closed loop; its pool is dropped
+            if loop is current:
+                loop.create_task(client.aclose())
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+            else:
+                loop.run_until_complete(client.aclose())
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+
+    async def aclose(self):
+        """Async counterpart of close(): awaits the running loop's pool, then closes the others"""
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+        self.close()
@@ -0,0 +1,146 @@
+"""
+Prefix-aware admission gate for requests to one model server.
+
+Every DSPy call from the same predictor sends the same system prompt and
+few-shot demo turns; only the final user message differs. Ollama keeps the KV
+cache of the prompt it processed last in each of its slots, so a request whose
+prefix matches the previous one skips most of its prefill. When more requests
+are waiting than there are free slots, PrefixGate admits the waiting request
+with the same prefix as the last admitted one first, so identical prefixes
+reach the server back-to-back instead of interleaving judge, comedian and
+reflection prompts. A request passed over too often is admitted regardless, so
+nothing starves.
+
+The gate is shared by a client's sync threads and its async event loops alike.
+
+This module deliberately does not import DSPy.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+
+
+def prefix_key(messages):
+    """Hash of everything but the final message (None for single-message prompts)"""
+    if len(messages) < 2:
+        return None
+    payload = json.dumps(messages[:-1], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _Waiter:
+    __slots__ = ("prefix", "skipped", "granted", "event", "future", "loop")
+
+    def __init__(self, prefix, event=None, future=None, loop=None):
+        self.prefix = prefix
+        self.skipped = 0
+        self.granted = False
+        self.event = event
+        self.future = future
+        self.loop = loop
+
+
+class PrefixGate:
+    """Counting semaphore that admits waiting requests grouped by prompt prefix
+
+    Args:
+        slots (int): Requests admitted at once
+        max_skips (int): Times a waiting request may be passed over before it is admitted first
+    """
+
+    def __init__(self, slots, max_skips=None):
+        self.free = slots
+        self.max_skips = max_skips if max_skips is not None else 4 * slots
+        self.admitted = 0
+        self.prefixed = 0
+        self.prefix_hits = 0
+        self.reordered = 0
+        self._last_prefix = None
+        self._waiters = []
+        self._lock = threading.Lock()
+
+    def _admit(self, prefix):
+        # Caller holds the lock
+        self.admitted += 1
+        if prefix is not None:
+            self.prefixed += 1
+            self.prefix_hits += prefix == self._last_prefix
+            self._last_prefix = prefix
+
+    def _choose(self):
+        """Index of the waiter to admit next: same prefix as the last admission, else the oldest"""
+        if self._waiters[0].skipped < self.max_skips and self._last_prefix is not None:
+            for index, waiter in enumerate(self._waiters):
+                if waiter.prefix == self._last_prefix:
+                    return index
+        return 0
+
+    def _grant(self, waiter):
+        waiter.granted = True
+        if waiter.event is not None:
+            waiter.event.set()
+        else:
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+
+    def acquire(self, prefix=None):
+        """Block until the request is admitted"""
+        with self._lock:
+            if self.free > 0 and not self._waiters:
+                self.free -= 1
+                self._admit(prefix)
+                return
+            waiter = _Waiter(prefix, event=threading.Event())
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    async def acquire_async(self, prefix=None):
+        """Async counterpart of acquire()"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.free > 0 and not self._waiters:
+                self.free -= 1
+                self._admit(prefix)
+                return
+            waiter = _Waiter(prefix, future=loop.create_future(), loop=loop)
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release()  # The slot was handed over as the task was cancelled; pass it on
+            raise
+
+    def release(self):
+        """Free a slot, handing it straight to the next waiting request if there is one"""
+        with self._lock:
+            if not self._waiters:
+                self.free += 1
+                return
+            index = self._choose()
+            for skipped in self._waiters[:index]:
+                skipped.skipped += 1
+            waiter = self._waiters.pop(index)
+            self.reordered += index > 0
+            self._admit(waiter.prefix)
+            self._grant(waiter)
+
+    def stats(self):
+        """Return admission counters"""
+        with self._lock:
+            return {
+                "admitted": self.admitted,
+                "prefixed": self.prefixed,
+                "prefix_hits": self.prefix_hits,
+                "reordered": self.reordered,
+            }
@@ -0,0 +1,230 @@
+"""
+Compiled program artifacts: optimized programs saved for serving.
+
+An artifact is one compact, versioned JSON file holding everything needed to
+call the optimized programs again: for every named predictor its signature
+(fields, types, descriptions), instructions and demos, plus the chat messages
+DSPy's ChatAdapter renders for it, with the inputs left as {{placeholders}}.
+It also records the scores each program reached and the model it was
+optimized for.
+
+Building an artifact needs DSPy; loading one doesn't. load_artifact() is a
+json.load plus a version check, and CompiledPredictor fills the pre-rendered
+messages and parses the model's [[ ## field ## ]] reply by itself, so a serving
+process starts in milliseconds and never imports the optimizer stack:
+
+    artifact = load_artifact("optimized_programs.json")
+    comedian = artifact.program("comedian")
+    messages = comedian.render(topic="AI engineering", comedian="Ricky Gervais")
+    ...send messages to the model...
+    comedian.parse(reply)  # {"joke": "..."}
+
+This module deliberately does not import DSPy at load time.
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+
+from lm_cache import IGNORED_PARAMS
+
+ARTIFACT_FORMAT = "dspy-gepa-programs"
+ARTIFACT_VERSION = 1
+FIELD_HEADER = re.compile(r"\[\[ ## (\w+) ## \]\]")
+TRUE_VALUES = ("true", "yes", "1")
+FALSE_VALUES = ("false", "no", "0")
+
+
+def placeholder(name):
+    """Marker standing in for an input field in pre-rendered messages"""
+    return f"{{{{{name}}}}}"
+
+
+def _type_name(annotation):
+    if isinstance(annotation, type):
+        return annotation.__name__
+    return str(annotation).replace("typing.", "")
+
+
+def _demo_dict(demo):
+    data = demo.toDict() if hasattr(demo, "toDict") else dict(demo)
+    return {key: value for key, value in data.items() if not key.startswith("dspy_")}
+
+
+def describe_predictor(predictor):
+    """Serializable description of a dspy.Predict, with its ChatAdapter messages pre-rendered"""
+    import dspy
+
+    signature = predictor.signature
+    fields = {}
+    for kind, group in (("input", signature.input_fields), ("output", signature.output_fields)):
+        for name, field in group.items():
+            fields[name] = {
+                "kind": kind,
+                "type": _type_name(field.annotation),
+                "desc": (field.json_schema_extra or {}).get("desc", ""),
+            }
+    messages = dspy.ChatAdapter().format(
+        signature,
+        demos=predictor.demos,
+        inputs={name: placeholder(name) for name in signature.input_fields},
+    )
+    return {
+        "signature": signature.__name__,
+        "instructions": signature.instructions,
+        "fields": fields,
+        "demos": [_demo_dict(demo) for demo in predictor.demos],
+        "messages": messages,
+        "config": dict(predictor.config),  # Extra LM kwargs the predictor passes on every call
+    }
+
+
+def describe_program(program, lm=None, scores=None):
+    """Serializable description of a DSPy program: all named predictors, scores and model"""
+    lm = lm or program.named_predictors()[0][1].lm
+    return {
+        "predictors": {name: describe_predictor(p) for name, p in program.named_predictors()},
+        "model": getattr(lm, "model", None),
+        # All of the LM's kwargs (LocalLM sends and cache-keys them all), except connection settings
+        "lm_kwargs": {k: v for k, v in getattr(lm, "kwargs", {}).items() if k not in IGNORED_PARAMS},
+        "scores": scores or {},
+    }
+
+
+def save_artifact(path, programs, metadata=None):
+    """Write programs ({name: describe_program(...)}) to a versioned artifact file"""
+    import dspy
+
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "dspy_version": getattr(dspy, "__version__", None),
+        "adapter": "ChatAdapter",
+        "metadata": metadata or {},
+        "programs": programs,
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, separators=(",", ":"), default=str)
+    os.replace(tmp_path, path)
+    return path
+
+
+def parse_value(text, type_name):
+    """Convert a field's reply text to its declared type (bool and str; anything else as JSON, else text)"""
+    text = text.strip()
+    if type_name == "str":
+        return text
+    if type_name == "bool":
+        lowered = text.lower().strip("`'\". ")
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValueError(f"Expected a bool, got {text!r}")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+class CompiledPredictor:
+    """One predictor from an artifact: renders requests and parses replies without DSPy
+
+    Args:
+        name (str): Predictor name within its program
+        spec (dict): The predictor's entry in the artifact
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        self.fields = spec["fields"]
+        self.inputs = [f for f, info in self.fields.items() if info["kind"] == "input"]
+        self.outputs = [f for f, info in self.fields.items() if info["kind"] == "output"]
+        self.config = spec.get("config", {})
+        self._placeholders = re.compile("|".join(re.escape(placeholder(name)) for name in self.inputs) or "(?!)")
+
+    def render(self, **inputs):
+        """Chat messages for one request: the pre-rendered prompt with the inputs filled in"""
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing input field(s) for {self.name}: {', '.join(missing)}")
+        *prefix, last = self.spec["messages"]
+        values = {placeholder(name): str(inputs[name]) for name in self.inputs}
+        # One pass, so an input containing another field's placeholder is left as it is
+        content = self._placeholders.sub(lambda match: values[match.group(0)], last["content"])
+        return [*prefix, {**last, "content": content}]
+
+    def parse(self, reply):
+        """Output fields from a [[ ## field ## ]] formatted reply; raises ValueError if any is missing"""
+        sections, current = {}, None
+        for part in FIELD_HEADER.split(reply):
+            if current is not None:
+                sections[current] = part
+                current = None
+            elif part in self.fields or part == "completed":
+                current = part
+        missing = [name for name in self.outputs if name not in sections]
+        if missing:
+            raise ValueError(f"Reply is missing output field(s): {', '.join(missing)}")
+        return {name: parse_value(sections[name], self.fields[name]["type"]) for name in self.outputs}
+
+
+class CompiledProgram:
+    """An optimized program loaded from an artifact"""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.model = spec.get("model")
+        self.lm_kwargs = spec.get("lm_kwargs", {})
+        self.scores = spec.get("scores", {})
+        self.predictors = {n: CompiledPredictor(n, p) for n, p in spec["predictors"].items()}
+
+    @property
+    def predictor(self):
+        """The program's predictor (programs served from artifacts have exactly one)"""
+        if len(self.predictors) != 1:
+            raise ValueError(f"{self.name} has {len(self.predictors)} predictors; pick one from .predictors")
+        return next(iter(self.predictors.values()))
+
+    def render(self, **inputs):
+        return self.predictor.render(**inputs)
+
+    def request_params(self):
+        """Generation params of a call, merged as LocalLM merges them: LM kwargs, then the predictor's config"""
+        return {**self.lm_kwargs, **self.predictor.config}
+
+    def parse(self, reply):
+        return self.predictor.parse(reply)
+
+
+class Artifact:
+    """A loaded artifact file"""
+
+    def __init__(self, data):
+        self.data = data
+        self.version = data["version"]
+        self.metadata = data.get("metadata", {})
+        self.programs = {name: CompiledProgram(name, spec) for name, spec in data["programs"].items()}
+
+    def program(self, name):
+        if name not in self.programs:
+            raise KeyError(f"No program '{name}' in artifact (has: {', '.join(self.programs)})")
+        return self.programs[name]
+
+
+def load_artifact(path):
+    """Load an artifact written by save_artifact"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a program artifact")
+    if data.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"{path} has artifact version {data.get('version')}, expected {ARTIFACT_VERSION}")
+    return Artifact(data)
@@ -0,0 +1,164 @@
+"""
+Model residency scheduler: serve one model at a time, in phases.
+
+When the student and teacher don't fit in memory together, every request that
+alternates between them makes Ollama unload one model and load the other. The
+ResidencyScheduler is shared by the clients of both models and admits requests
+for one model (the active one) at a time. Requests for the other model queue
+until the active model's in-flight work has drained, then all of them are
+admitted together as the next phase: pending student rollouts run as one
+phase, the teacher's reflection calls as the next.
+
+Switches are bounded by `max_wait`: the active model keeps admitting new work
+only until another model's oldest request has waited that long, after which
+the phase drains and the scheduler switches. With `unload=True` the first
+request of a new phase also asks the server to unload the previous model, so
+the incoming model gets all of the memory instead of evicting it lazily.
+
+This module deliberately does not import DSPy.
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _Waiter:
+    __slots__ = ("model", "since", "unload", "granted", "event", "future", "loop")
+
+    def __init__(self, model, event=None, future=None, loop=None):
+        self.model = model
+        self.since = time.monotonic()
+        self.unload = None
+        self.granted = False
+        self.event = event
+        self.future = future
+        self.loop = loop
+
+
+class ResidencyScheduler:
+    """Admits LM requests in per-model phases to avoid loading models back and forth
+
+    Args:
+        max_wait (float): Seconds a request for another model waits before the active phase is drained
+        unload (bool): Unload the previous model from the server when switching phases
+    """
+
+    def __init__(self, max_wait=30.0, unload=False):
+        self.max_wait = max_wait
+        self.unload = unload
+        self.active = None
+        self.switches = 0
+        self.phases = defaultdict(int)
+        self.wait_seconds = 0.0
+        self._in_flight = defaultdict(int)
+        self._waiters = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _draining(self):
+        """True once another model's oldest request has waited max_wait seconds"""
+        now = time.monotonic()
+        return any(
+            queue and now - queue[0].since >= self.max_wait
+            for model, queue in self._waiters.items()
+            if model != self.active
+        )
+
+    def _next_model(self):
+        others = [queue[0] for model, queue in self._waiters.items() if queue and model != self.active]
+        if others:
+            return min(others, key=lambda waiter: waiter.since).model
+        return self.active if self._waiters[self.active] else None
+
+    def _advance(self):
+        """Start the next phase once the active model has nothing in flight"""
+        # Caller holds the lock
+        if self._in_flight[self.active]:
+            return
+        model = self._next_model()
+        if model is None:
+            return
+        previous, self.active = self.active, model
+        if previous != model:
+            self.switches += 1
+            self.phases[model] += 1
+        waiters = self._waiters.pop(model)
+        if self.unload and previous not in (None, model):
+            waiters[0].unload = previous
+        now = time.monotonic()
+        for waiter in waiters:
+            self._in_flight[model] += 1
+            self.wait_seconds += now - waiter.since
+            waiter.granted = True
+            if waiter.event is not None:
+                waiter.event.set()
+            else:
+                waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+
+    def _try_admit(self, model):
+        # Caller holds the lock
+        if self.active is None:
+            self.active = model
+            self.phases[model] += 1
+        if model == self.active and not self._waiters[model] and not self._draining():
+            self._in_flight[model] += 1
+            return True
+        return False
+
+    def acquire(self, model):
+        """Block until `model` is the active one; returns a model to unload first, or None"""
+        with self._lock:
+            if self._try_admit(model):
+                return None
+            waiter = _Waiter(model, event=threading.Event())
+            self._waiters[model].append(waiter)
+            self._advance()
+        waiter.event.wait()
+        return waiter.unload
+
+    async def acquire_async(self, model):
+        """Async counterpart of acquire()"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_admit(model):
+                return None
+            waiter = _Waiter(model, future=loop.create_future(), loop=loop)
+            self._waiters[model].append(waiter)
+            self._advance()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters[model].remove(waiter)
+            if granted:
+                self.release(model)
+            raise
+        return waiter.unload
+
+    def release(self, model):
+        """Mark a request for `model` as finished"""
+        with self._lock:
+            self._in_flight[model] -= 1
+            self._advance()
+
+    def stats(self):
+        """Return phase counters"""
+        with self._lock:
+            return {
+                "switches": self.switches,
+                "phases": dict(self.phases),
+                "wait_seconds": self.wait_seconds,
+                "max_wait": self.max_wait,
+                "unload": self.unload,
+            }
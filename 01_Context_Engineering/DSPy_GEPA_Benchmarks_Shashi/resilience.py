@@ -0,0 +1,378 @@
+"""
+Deadlines, jittered retries, hedged requests and circuit breakers for model server calls.
+
+One slow or failing Ollama call used to cost a whole GEPA phase (the optimizer
+gives up and the tutorial falls back to the few-shot program), and one call stuck
+behind a model load dominated an evaluation's runtime. A Resilience policy is
+shared by every OllamaClient of a run and applied to each /api/chat call:
+
+- Deadline: a call gives up after `deadline` seconds, retries included. Each
+  attempt's httpx timeout is what remains of it (at most `attempt_timeout`).
+- Retries: connection errors, timeouts and 5xx responses are retried up to
+  `retries` times, sleeping a "full jitter" backoff (uniform between 0 and
+  backoff * 2^attempt, capped at max_backoff), so failed calls don't retry in
+  lockstep.
+- Hedging: an attempt still running after `hedge_after` seconds (or after the
+  endpoint's observed p95 latency, for "p95") gets one duplicate request. The
+  first reply wins and the other is cancelled (async) or ignored (sync).
+- Circuit breaker per endpoint (server and model): after `breaker_failures`
+  consecutive failed attempts the endpoint is open for `breaker_cooldown`
+  seconds. Calls are held instead of being sent, then one probe request is let
+  through. A successful probe closes the breaker. A held call fails with
+  CircuitOpenError only when its deadline passes, or without a deadline, after
+  being held for retries + 1 cooldowns. So a short outage delays an evaluation
+  rather than zeroing its scores.
+
+Every endpoint counts its attempts, retries, hedges, deadline misses and breaker
+activity (stats()).
+
+This module deliberately does not import DSPy.
+"""
+
+import asyncio
+import concurrent.futures
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from instrumentation import percentile
+
+PROBE_POLL = 0.5  # Seconds a held call waits while another call probes a half-open endpoint
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """A call ran out of its deadline"""
+
+
+class CircuitOpenError(httpx.TransportError):
+    """A call was held back by its endpoint's circuit breaker for as long as it could wait"""
+
+
+def parse_hedge_after(value):
+    """--hedge-after value: None ("off"), seconds, or a latency percentile such as "p95" (returned as "p95")"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    value = value.strip().lower()
+    if value in ("", "off", "none"):
+        return None
+    if value.startswith("p") and value[1:].replace(".", "", 1).isdigit():
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid hedge delay '{value}' (expected seconds, a percentile like p95, or off)")
+
+
+def is_retryable(error):
+    """Connection errors, timeouts and 5xx responses are worth another attempt; 4xx responses are not"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one endpoint
+
+    Args:
+        failure_threshold (int): Consecutive failed attempts that open the breaker (0 disables it)
+        cooldown (float): Seconds the breaker stays open before a probe request is let through
+    """
+
+    def __init__(self, failure_threshold=10, cooldown=10.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def wait_time(self):
+        """Seconds to hold a call before asking again; 0 means send it now (possibly as the probe)"""
+        if not self.failure_threshold:
+            return 0.0
+        with self._lock:
+            if self.state == "closed":
+                return 0.0
+            now = time.monotonic()
+            if self.state == "open":
+                if now < self._open_until:
+                    return self._open_until - now
+                self.state = "half_open"
+            if self._probing:
+                return min(PROBE_POLL, self.cooldown)
+            self._probing = True
+            return 0.0
+
+    def success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def failure(self):
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened += 1
+                self._open_until = time.monotonic() + self.cooldown
+
+
+def _counters():
+    return {
+        "calls": 0,
+        "attempts": 0,
+        "failures": 0,
+        "retries": 0,
+        "retry_seconds": 0.0,
+        "deadline_exceeded": 0,
+        "hedged": 0,
+        "hedge_wins": 0,
+        "held": 0,
+        "held_seconds": 0.0,
+        "rejected": 0,
+    }
+
+
+class _Endpoint:
+    def __init__(self, breaker, window):
+        self.breaker = breaker
+        self.latencies = deque(maxlen=window)
+        self.counters = _counters()
+
+
+class Resilience:
+    """Call policy shared by the LM clients of a run
+
+    Args:
+        deadline (float): Seconds a call may take, retries and backoff included (None: no deadline)
+        attempt_timeout (float): Timeout of a single attempt in seconds
+        retries (int): Retries after a failed attempt
+        backoff (float): Base of the exponential backoff in seconds (the first retry waits up to this)
+        max_backoff (float): Longest backoff
+        hedge_after: Seconds before a slow attempt is duplicated, a percentile of the endpoint's
+            latencies such as "p95", or None to never hedge
+        hedge_min_samples (int): Latencies an endpoint must have seen before percentile hedging starts
+        breaker_failures (int): Consecutive failed attempts that open an endpoint's breaker (0 disables it)
+        breaker_cooldown (float): Seconds an open breaker holds calls before probing the endpoint
+        seed (int): Seed for the backoff jitter
+        window (int): Most recent latencies kept per endpoint
+    """
+
+    def __init__(self, deadline=None, attempt_timeout=600.0, retries=3, backoff=1.0, max_backoff=30.0,
+                 hedge_after=None, hedge_min_samples=20, breaker_failures=10, breaker_cooldown=10.0, seed=None,
+                 window=1000):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_after = parse_hedge_after(hedge_after)
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.window = window
+        self._rng = random.Random(seed)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _endpoint(self, name):
+        with self._lock:
+            if name not in self._endpoints:
+                breaker = CircuitBreaker(self.breaker_failures, self.breaker_cooldown)
+                self._endpoints[name] = _Endpoint(breaker, self.window)
+            return self._endpoints[name]
+
+    def _count(self, endpoint, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                endpoint.counters[key] += value
+
+    def start(self, name):
+        """Begin a call to an endpoint; returns its deadline (a time.monotonic() value, or None)"""
+        self._count(self._endpoint(name), calls=1)
+        return time.monotonic() + self.deadline if self.deadline else None
+
+    def _remaining(self, deadline):
+        return float("inf") if deadline is None else deadline - time.monotonic()
+
+    def _hold_until(self, deadline):
+        if deadline is not None:
+            return deadline
+        return time.monotonic() + self.breaker_cooldown * (self.retries + 1)
+
+    def _hold(self, name, hold_until):
+        """Seconds to wait before the next attempt (0 to send now); raises CircuitOpenError past hold_until"""
+        endpoint = self._endpoint(name)
+        wait = endpoint.breaker.wait_time()
+        if wait and wait >= self._remaining(hold_until):
+            self._count(endpoint, rejected=1)
+            raise CircuitOpenError(f"Circuit breaker for {name} is open")
+        if wait:
+            self._count(endpoint, held=1, held_seconds=wait)
+        return wait
+
+    def admit(self, name, deadline):
+        """Block while the endpoint's breaker is open"""
+        hold_until = self._hold_until(deadline)
+        while wait := self._hold(name, hold_until):
+            time.sleep(wait)
+
+    async def aadmit(self, name, deadline):
+        """Async counterpart of admit()"""
+        hold_until = self._hold_until(deadline)
+        while wait := self._hold(name, hold_until):
+            await asyncio.sleep(wait)
+
+    def _timeout(self, name, deadline):
+        remaining = self._remaining(deadline)
+        if remaining <= 0:
+            self._count(self._endpoint(name), deadline_exceeded=1)
+            raise DeadlineExceeded(f"Deadline of {self.deadline}s exceeded calling {name}")
+        return min(self.attempt_timeout, remaining)
+
+    def _hedge_delay(self, name):
+        if self.hedge_after is None:
+            return None
+        if not isinstance(self.hedge_after, str):
+            return self.hedge_after
+        endpoint = self._endpoint(name)
+        with self._lock:
+            latencies = list(endpoint.latencies)
+        if len(latencies) < self.hedge_min_samples:
+            return None
+        return percentile(latencies, float(self.hedge_after[1:]))
+
+    def _record(self, name, start, error=None, hedged=False, hedge_won=False):
+        endpoint = self._endpoint(name)
+        if error is None or (isinstance(error, httpx.HTTPError) and not is_retryable(error)):
+            endpoint.breaker.success()  # A 4xx reply still means the endpoint is up
+            if error is None:
+                with self._lock:
+                    endpoint.latencies.append(time.monotonic() - start)
+        else:
+            # Anything else, cancellation and errors raised before sending included, counts against the
+            # endpoint; this also ends a half-open probe, which would otherwise hold every later call
+            endpoint.breaker.failure()
+        self._count(endpoint, attempts=1, failures=int(error is not None), hedged=int(hedged),
+                    hedge_wins=int(hedge_won))
+
+    @staticmethod
+    def _first_result(futures):
+        """(result, future) of the first request to succeed; raises the first error if none does"""
+        error = None
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                return future.result(), future  # The slower request finishes in the background and is ignored
+            except Exception as e:
+                error = error or e
+        raise error
+
+    def send(self, name, request, deadline, executor):
+        """Run one attempt, request(timeout) -> result, hedged if it is slow
+
+        Args:
+            name (str): Endpoint
+            request (callable): request(timeout) sends the request and returns the result
+            deadline (float): The call's deadline, from start()
+            executor (concurrent.futures.Executor): Runs hedged attempts; it needs two free workers per
+                concurrent call, or requests queue behind each other and hedges fire on requests never sent
+        """
+        start = time.monotonic()
+        futures, winner = [], None
+        try:
+            timeout = self._timeout(name, deadline)
+            hedge_delay = self._hedge_delay(name)
+            if hedge_delay is None or hedge_delay >= timeout:
+                result = request(timeout)
+            else:
+                started = threading.Event()
+
+                def primary():
+                    started.set()
+                    return request(timeout)
+
+                futures.append(executor.submit(primary))
+                # The hedge delay counts from when the primary request is sent, not from when it was queued
+                started.wait()
+                start = time.monotonic()
+                done, _ = concurrent.futures.wait(futures, timeout=hedge_delay)
+                if not done:
+                    futures.append(executor.submit(request, max(0.001, timeout - hedge_delay)))
+                result, winner = self._first_result(futures)
+        except BaseException as e:
+            self._record(name, start, e, hedged=len(futures) > 1)
+            raise
+        self._record(name, start, hedged=len(futures) > 1, hedge_won=winner is not None and winner is not futures[0])
+        return result
+
+    async def asend(self, name, request, deadline):
+        """Async counterpart of send(): request(timeout) returns an awaitable; the losing request is cancelled"""
+        start = time.monotonic()
+        tasks, pending, winner = [], set(), None
+        try:
+            timeout = self._timeout(name, deadline)
+            hedge_delay = self._hedge_delay(name)
+            tasks.append(asyncio.ensure_future(request(timeout)))
+            if hedge_delay is not None and hedge_delay < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    tasks.append(asyncio.ensure_future(request(max(0.001, timeout - hedge_delay))))
+            pending, error = set(tasks), None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        result, winner = task.result(), task
+                        break
+                    except Exception as e:
+                        error = error or e
+            if winner is None:
+                raise error
+        except BaseException as e:
+            self._record(name, start, e, hedged=len(tasks) > 1)
+            raise
+        finally:
+            for task in pending or tasks:
+                task.cancel()
+        self._record(name, start, hedged=len(tasks) > 1, hedge_won=winner is not tasks[0])
+        return result
+
+    def retry_delay(self, name, error, attempt, deadline):
+        """Jittered backoff before retrying after `error`, or None if the call should fail now"""
+        endpoint = self._endpoint(name)
+        if attempt >= self.retries or not is_retryable(error) or isinstance(error, DeadlineExceeded):
+            return None
+        delay = self._rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if delay >= self._remaining(deadline):
+            self._count(endpoint, deadline_exceeded=1)
+            return None
+        self._count(endpoint, retries=1, retry_seconds=delay)
+        return delay
+
+    def stats(self):
+        """Per-endpoint counters, breaker state and p99 attempt latency"""
+        with self._lock:
+            endpoints = {
+                name: (dict(e.counters), list(e.latencies), e.breaker) for name, e in self._endpoints.items()
+            }
+        return {
+            name: {
+                **counters,
+                "breaker": breaker.state,
+                "breaker_opened": breaker.opened,
+                "p99_seconds": percentile(latencies, 99),
+            }
+            for name, (counters, latencies, breaker) in endpoints.items()
+        }
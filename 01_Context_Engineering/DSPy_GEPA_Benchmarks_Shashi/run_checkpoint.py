@@ -0,0 +1,122 @@
+"""
+Run directory with checkpoints, so a crashed or interrupted run can be resumed.
+
+A run directory holds:
+
+    config.json           the run's configuration (models, seed, dataset, ...)
+    progress.json         scores of every finished step, written after each step
+    depends.json          what a step or program was computed with, for those that
+                          depend on an earlier result (e.g. the judge that scored them)
+    gepa/<name>/          dspy.GEPA's log_dir: candidate pool, Pareto scores and
+                          per-example results, saved by GEPA after every iteration
+    programs/<name>.json  optimized programs, saved once their GEPA phase finishes
+
+`--resume RUN_DIR` reuses all of it: finished steps are skipped, finished GEPA
+phases load their saved program, and an interrupted GEPA phase continues from
+its last iteration (GEPA resumes automatically from a log_dir it has written).
+
+A step, program or GEPA phase saved with a `depends_on` key is only reused
+under the same key. Comedian steps are keyed by the judge's fingerprint, so if
+a resumed run's judge differs from the one that scored them (its GEPA phase
+failed before and fell back to the few-shot judge, then succeeded on resume),
+they are computed again rather than mixed with scores from the other judge.
+"""
+
+import json
+import os
+import tempfile
+
+
+def _write_json(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RunCheckpoint:
+    """Checkpoints of one run in a run directory
+
+    Args:
+        run_dir (str): Directory for the run's checkpoints (created if missing)
+    """
+
+    def __init__(self, run_dir):
+        self.run_dir = run_dir
+        os.makedirs(run_dir, exist_ok=True)
+        self._progress = _read_json(self._path("progress.json"), {})
+        self._depends = _read_json(self._path("depends.json"), {})
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _path(self, *parts):
+        return os.path.join(self.run_dir, *parts)
+
+    @staticmethod
+    def load_config(run_dir):
+        """Return the configuration saved in a run directory"""
+        config = _read_json(os.path.join(run_dir, "config.json"))
+        if config is None:
+            raise FileNotFoundError(f"No checkpointed run in {run_dir} (config.json is missing)")
+        return config
+
+    def save_config(self, config):
+        """Record the run's configuration"""
+        _write_json(self._path("config.json"), config)
+
+    def done(self, step, depends_on=None):
+        """Return True if a step finished in this or a previous attempt (with the same depends_on key)"""
+        return step in self._progress and self._depends.get(step) == depends_on
+
+    def result(self, step):
+        """Return the value recorded for a finished step"""
+        return self._progress[step]
+
+    def _set_depends(self, name, depends_on):
+        if self._depends.get(name) != depends_on:
+            self._depends[name] = depends_on
+            _write_json(self._path("depends.json"), self._depends)
+
+    def finish(self, step, value=None, depends_on=None):
+        """Record a finished step (e.g. its score) and write progress.json"""
+        self._set_depends(step, depends_on)
+        self._progress[step] = value
+        _write_json(self._path("progress.json"), self._progress)
+
+    def gepa_dir(self, name, depends_on=None):
+        """GEPA log_dir for an optimization phase (one per depends_on key, so GEPA never resumes across them)"""
+        return self._path("gepa", name if depends_on is None else f"{name}-{depends_on}")
+
+    def program_path(self, name):
+        return self._path("programs", f"{name}.json")
+
+    def save_program(self, name, program, depends_on=None):
+        """Save an optimized program's state (instructions and demos, without LM settings)"""
+        self._set_depends(f"programs/{name}", depends_on)
+        state = program.dump_state()
+        # A bare Predict's state is one predictor; a composite module's maps names to predictors
+        for predictor_state in [state] if "lm" in state else state.values():
+            predictor_state["lm"] = None  # The LMs are rebuilt from the run's configuration
+        _write_json(self.program_path(name), state)
+
+    def load_program(self, name, program, lm, depends_on=None):
+        """Load a saved program's state into a copy of `program`, or None if there is none (with depends_on)"""
+        if self._depends.get(f"programs/{name}") != depends_on:
+            return None
+        state = _read_json(self.program_path(name))
+        if state is None:
+            return None
+        loaded = program.deepcopy()
+        loaded.load_state(state)
+        loaded.set_lm(lm)
+        return loaded
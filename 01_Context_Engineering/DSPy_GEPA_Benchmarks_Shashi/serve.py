@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Serve the optimized programs of a saved artifact over HTTP or stdio.
+
+The server loads an artifact written with --save-artifact (see
+program_artifact.py) and answers requests for its programs; it never rebuilds
+datasets, LMs or the optimizer, and for Ollama models never imports DSPy, so it
+starts in well under a second.
+
+Requests are micro-batched: everything arriving within `--batch-window-ms` (or
+until `--max-batch` requests are waiting) is dispatched together. Identical
+requests in a batch are sent to the model once, and the batch is sorted by
+program so requests sharing a prompt prefix reach the server back-to-back and
+reuse its KV cache. At most `--concurrency` model calls are in flight at once,
+and replies go through the same on-disk response cache as the tutorial.
+
+    # HTTP: POST /v1/<program> with the inputs as JSON, GET /stats, GET /health
+    python serve.py optimized_programs.json --http 8000
+    curl -s localhost:8000/v1/comedian -d '{"topic": "AI engineering", "comedian": "Ricky Gervais"}'
+    curl -s localhost:8000/v1/audience -d '{"joke": "...", "topic": "AI engineering"}'
+
+    # stdio: one JSON request per line in, one JSON response per line out (in completion order)
+    echo '{"id": 1, "program": "comedian", "inputs": {"topic": "AI", "comedian": "Ricky Gervais"}}' \\
+        | python serve.py optimized_programs.json --stdio
+
+Request counts, p50/p99 latency, throughput, cache hits and batch sizes are
+served on /stats and printed when the server stops.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from instrumentation import percentile
+from lm_cache import CACHE_MODES, ResponseCache, make_cache_key
+from ollama_client import OllamaClient, ollama_base_url, parse_keep_alive
+from program_artifact import load_artifact
+
+LATENCY_WINDOW = 10000  # Latencies kept for the percentiles
+
+
+class ServeError(Exception):
+    """A request that can't be served; carries the HTTP status to answer with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def is_stub_model(model):
+    # Same test as stub_lm.is_stub_model, without importing DSPy into the server
+    return model.startswith("stub:")
+
+
+class ServeStats:
+    """Request, latency and batching counters of a running server"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.batched = 0
+        self.coalesced = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.first = None
+        self.last = None
+        self._lock = threading.Lock()
+
+    def record(self, start, error=False, cache_hit=False):
+        end = time.perf_counter()
+        with self._lock:
+            self.requests += 1
+            self.errors += error
+            self.cache_hits += cache_hit
+            self.latencies.append(end - start)
+            self.first = start if self.first is None else min(self.first, start)
+            self.last = end if self.last is None else max(self.last, end)
+
+    def record_batch(self, size, coalesced):
+        with self._lock:
+            self.batches += 1
+            self.batched += size
+            self.coalesced += coalesced
+
+    def summary(self):
+        """Return the counters, latency percentiles (ms) and throughput"""
+        with self._lock:
+            latencies = list(self.latencies)
+            elapsed = (self.last - self.first) if self.requests else 0.0
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "cache_hits": self.cache_hits,
+                "p50_ms": 1000 * percentile(latencies, 50),
+                "p99_ms": 1000 * percentile(latencies, 99),
+                "throughput": self.requests / elapsed if elapsed > 0 else 0.0,
+                "batches": self.batches,
+                "mean_batch": self.batched / self.batches if self.batches else 0.0,
+                "coalesced": self.coalesced,
+            }
+
+
+def render_stats(summary):
+    """One-line summary of ServeStats.summary()"""
+    return (
+        f"{summary['requests']} requests ({summary['errors']} errors, {summary['cache_hits']} cache hits), "
+        f"p50 {summary['p50_ms']:.0f}ms, p99 {summary['p99_ms']:.0f}ms, {summary['throughput']:.1f} req/s, "
+        f"{summary['batches']} batches (mean size {summary['mean_batch']:.1f}, {summary['coalesced']} coalesced)"
+    )
+
+
+class ProgramServer:
+    """Runs requests for an artifact's programs against their models, through the response cache
+
+    Args:
+        artifact (Artifact): Loaded program artifact
+        response_cache (ResponseCache): Cache for model replies
+        ollama_url (str): Ollama server URL for non-stub models
+        concurrency (int): Maximum model calls in flight per client
+        model (str): Serve every program with this model instead of the one it was optimized for
+        keep_alive: How long the server keeps models loaded between requests
+    """
+
+    def __init__(self, artifact, response_cache, ollama_url=None, concurrency=8, model=None, keep_alive=None):
+        self.artifact = artifact
+        self.response_cache = response_cache
+        self.ollama_url = ollama_base_url(ollama_url)
+        self.concurrency = concurrency
+        self.model = model
+        self.keep_alive = keep_alive
+        self._clients = {}
+        for program in artifact.programs.values():
+            if self.model or program.model:
+                self._client(self.model_for(program))  # Connect (or load the stub backend) before the first request
+
+    def model_for(self, program):
+        model = self.model or program.model
+        if not model:
+            raise ServeError(500, f"{program.name} has no model in the artifact; pass --model")
+        return model
+
+    def _client(self, model):
+        """Pooled client for a model: one shared Ollama pool, or an in-process stub per stub spec"""
+        key = model if is_stub_model(model) else self.ollama_url
+        if key not in self._clients:
+            if is_stub_model(model):
+                from stub_lm import STUB_SERVER, STUB_URL, StubTransport, parse_stub_spec
+
+                _, options = parse_stub_spec(model)
+                if "max_loaded" in options:
+                    STUB_SERVER.max_loaded = int(options.pop("max_loaded"))
+                transport = StubTransport(**options)
+                self._clients[key] = OllamaClient(
+                    STUB_URL, max_connections=self.concurrency, transport=transport, keep_alive=self.keep_alive
+                )
+            else:
+                self._clients[key] = OllamaClient(
+                    self.ollama_url, max_connections=self.concurrency, keep_alive=self.keep_alive
+                )
+        return self._clients[key]
+
+    def prepare(self, name, inputs):
+        """Look up the program and render its messages; raises ServeError for bad requests"""
+        try:
+            program = self.artifact.program(name)
+        except KeyError as e:
+            raise ServeError(404, e.args[0])
+        if not isinstance(inputs, dict):
+            raise ServeError(400, "Inputs must be a JSON object")
+        missing = [field for field in program.predictor.inputs if field not in inputs]
+        if missing:
+            raise ServeError(400, f"Missing input field(s) for {name}: {', '.join(missing)}")
+        return program, program.render(**inputs)
+
+    async def run(self, name, inputs):
+        """Serve one request; returns (outputs, cache_hit)"""
+        program, messages = self.prepare(name, inputs)
+        model = self.model_for(program)
+        params = program.request_params()
+        # Same key as LocalLM's, so responses cached by benchmark runs are served from the cache
+        key = make_cache_key(model, params, messages=messages)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return program.parse(cached["choices"][0]["message"]["content"]), True
+
+        model_name = model.split("/", 1)[1] if "/" in model else model
+        try:
+            result = await self._client(model).achat(model_name, messages, params)
+        except Exception as e:
+            raise ServeError(502, f"{model}: {e or type(e).__name__}")
+        content = result["message"]["content"]
+        try:
+            outputs = program.parse(content)
+        except ValueError as e:
+            raise ServeError(502, f"Unparseable reply from {model}: {e}")
+        # Stored in the same OpenAI-style shape as LocalLM's entries
+        self.response_cache.put(key, {
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": result.get("done_reason") or "stop",
+                         "message": {"role": "assistant", "content": content}}],
+        }, model=model)
+        return outputs, False
+
+    def stats(self):
+        return {
+            "cache": {"hits": self.response_cache.hits, "misses": self.response_cache.misses},
+            "clients": {key: client.stats() for key, client in self._clients.items()},
+        }
+
+
+class MicroBatcher:
+    """Collects requests for a short window and dispatches them together
+
+    Args:
+        server (ProgramServer): Serves the requests
+        stats (ServeStats): Records latencies and batch sizes
+        window (float): Seconds to wait for more requests after the first one of a batch
+        max_batch (int): Dispatch as soon as this many requests are waiting
+        concurrency (int): Maximum requests being served at once
+    """
+
+    def __init__(self, server, stats, window=0.01, max_batch=16, concurrency=8):
+        self.server = server
+        self.stats = stats
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.concurrency = concurrency
+        self._pending = []
+        self._timer = None
+        self._semaphore = None
+
+    async def submit(self, name, inputs):
+        """Serve one request as part of the next batch; returns (outputs, cache_hit)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((name, inputs, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        groups = {}
+        for name, inputs, future in batch:
+            key = (name, json.dumps(inputs, sort_keys=True, default=str))
+            groups.setdefault(key, (name, inputs, []))[2].append(future)
+        self.stats.record_batch(len(batch), len(batch) - len(groups))
+        # Sorted by program, so requests with the same prompt prefix are admitted together
+        for key in sorted(groups, key=lambda k: k[0]):
+            name, inputs, futures = groups[key]
+            asyncio.ensure_future(self._serve(name, inputs, futures))
+
+    async def _serve(self, name, inputs, futures):
+        async with self._semaphore:
+            try:
+                result = await self.server.run(name, inputs)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for future in futures:
+            if not future.done():
+                future.set_result(result)
+
+
+async def handle(batcher, stats, name, inputs):
+    """Serve one request and record it; returns (HTTP status, response body)"""
+    start = time.perf_counter()
+    try:
+        outputs, cache_hit = await batcher.submit(name, inputs)
+    except ServeError as e:
+        stats.record(start, error=True)
+        return e.status, {"error": str(e)}
+    except Exception as e:
+        stats.record(start, error=True)
+        return 500, {"error": str(e) or type(e).__name__}
+    stats.record(start, cache_hit=cache_hit)
+    return 200, {"program": name, "outputs": outputs, "cached": cache_hit,
+                 "latency_ms": round(1000 * (time.perf_counter() - start), 1)}
+
+
+def serve_http(port, host, batcher, stats, server):
+    """Serve until interrupted: the HTTP handlers run in threads, batching happens on one event loop"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="serve-loop", daemon=True).start()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"status": "ok", "programs": list(server.artifact.programs)})
+            elif self.path == "/stats":
+                self._reply(200, {**stats.summary(), **server.stats()})
+            else:
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if not self.path.startswith("/v1/"):
+                self.rfile.read(length)
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                inputs = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                self._reply(400, {"error": f"Invalid JSON: {e}"})
+                return
+            name = self.path[len("/v1/"):].strip("/")
+            self._reply(*asyncio.run_coroutine_threadsafe(handle(batcher, stats, name, inputs), loop).result())
+
+        def log_message(self, format, *args):
+            pass  # One line per request would dominate the output; see /stats instead
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    print(f"Serving {', '.join(server.artifact.programs)} on http://{host}:{port}/v1/<program>", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+async def serve_stdio(batcher, stats):
+    """Serve JSON lines from stdin until EOF, writing each response as soon as it is ready"""
+    loop = asyncio.get_running_loop()
+    tasks = []
+
+    async def answer(line):
+        try:
+            request = json.loads(line)
+            status, body = await handle(batcher, stats, request["program"], request.get("inputs", {}))
+        except (ValueError, KeyError, TypeError) as e:
+            status, body, request = 400, {"error": f"Invalid request: {e}"}, {}
+        if isinstance(request, dict) and "id" in request:
+            body = {"id": request["id"], **body}
+        sys.stdout.write(json.dumps({**body, "status": status}) + "\n")
+        sys.stdout.flush()
+
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        if line.strip():
+            tasks.append(asyncio.ensure_future(answer(line)))
+    await asyncio.gather(*tasks)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Serve optimized programs from a --save-artifact file over HTTP or stdio",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("\n\n", 3)[3],
+    )
+    parser.add_argument("artifact", help="Artifact written by evaluator_optimizer_dspy.py --save-artifact")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--http", type=int, metavar="PORT", help="Serve HTTP on this port")
+    mode.add_argument("--stdio", action="store_true", help="Serve JSON lines on stdin/stdout")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP bind address (default: 127.0.0.1)")
+    parser.add_argument("--model", default=None,
+                        help="Serve with this model instead of the one each program was optimized for")
+    parser.add_argument("--ollama-url", default=None,
+                        help="Ollama server URL (default: $OLLAMA_HOST, then http://localhost:11434)")
+    parser.add_argument("--keep-alive", default="30m",
+                        help="How long the server keeps models loaded between requests (default: 30m)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum model calls in flight (default: 8)")
+    parser.add_argument("--batch-window-ms", type=float, default=10.0,
+                        help="Milliseconds to collect requests into one batch (default: 10)")
+    parser.add_argument("--max-batch", type=int, default=16, help="Largest batch (default: 16)")
+    parser.add_argument("--cache-dir", default=".lm_cache", help="Response cache directory (default: .lm_cache)")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default="write",
+                        help="write: read and store replies, read: only serve cached ones, off: no cache")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    artifact = load_artifact(args.artifact)
+    load_ms = 1000 * (time.perf_counter() - start)
+    server = ProgramServer(
+        artifact,
+        ResponseCache(args.cache_dir, mode=args.cache_mode),
+        ollama_url=args.ollama_url,
+        concurrency=args.concurrency,
+        model=args.model,
+        keep_alive=parse_keep_alive(args.keep_alive),
+    )
+    stats = ServeStats()
+    batcher = MicroBatcher(server, stats, args.batch_window_ms / 1000, args.max_batch, args.concurrency)
+    programs = ", ".join(f"{name} ({args.model or p.model})" for name, p in artifact.programs.items())
+    print(f"Loaded {programs} from {args.artifact} in {load_ms:.0f}ms "
+          f"(ready in {1000 * (time.perf_counter() - start):.0f}ms)",
+          file=sys.stderr, flush=True)
+
+    if args.stdio:
+        asyncio.run(serve_stdio(batcher, stats))
+    else:
+        serve_http(args.http, args.host, batcher, stats, server)
+    print(render_stats(stats.summary()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+"""
+Deterministic stub LM backend for running the tutorial without Ollama.
+
+Any model named "stub:<name>" is served by StubLM instead of a model server.
+StubLM is a regular LocalLM whose OllamaClient talks to an in-process
+StubTransport rather than the network, so the connection pool, concurrency
+limit, retries, response cache and metrics all run exactly as they do against
+Ollama. Behaviour is configured in the model name:
+
+    stub:student                                    # instant, deterministic replies
+    stub:student?latency=lognormal:0.2,0.6          # ~0.2s median latency, heavy tail
+    stub:judge?latency=uniform:0.05,0.1&tokens=fixed:40&per_token=0.01
+    stub:teacher?fail_rate=0.05&timeout_rate=0.01   # inject 5xx responses and timeouts
+    stub:teacher?load=8&max_loaded=1&prefill=0.001  # 8s model loads, one resident model
+    stub:student?runaway=0.2&per_token=0.01         # 20% of replies ramble on past the completed marker
+
+Spec parameters:
+    latency       Request latency distribution in seconds (default: fixed:0)
+    tokens        Completion token count distribution (default: estimated from the reply)
+    per_token     Extra seconds of latency per completion token (default: 0)
+    fail_rate     Probability of a 503 response (default: 0)
+    timeout_rate  Probability of a timeout after the drawn latency (default: 0)
+    load          Seconds to load the model when it isn't resident (default: 0)
+    max_loaded    Models the stub server keeps resident at once, shared by all stub
+                  models; loading another evicts the least recently used (default: unlimited)
+    prefill       Seconds per prompt token not covered by the model's cached prefix (default: 0)
+    runaway       Probability that a reply keeps generating after [[ ## completed ## ]],
+                  up to the request's max_tokens (default: 0)
+    seed          Seed mixed into every draw (default: the run's --seed, else 0)
+
+Distributions are written "fixed:x", "uniform:low,high", "normal:mean,sd",
+"lognormal:median,sigma" or "exp:mean"; a bare number means fixed.
+
+Replies are derived from a hash of (seed, model, messages), so the same run
+produces the same outputs every time. Prompts formatted by DSPy's ChatAdapter
+and JSONAdapter (which GEPA's instruction proposer uses) are answered with every
+requested output field (booleans are drawn at random, text fields get short
+canned strings); any other prompt (the "Hello" smoke test, plain reflection
+prompts) gets a ``` fenced reply. Latency and fault draws also depend on the
+attempt number, so a retried request can succeed.
+
+Like Ollama, the stub server unloads a model once the keep_alive of its last
+request has passed (5 minutes by default) and reports the time spent loading it
+as load_duration. Each model caches the prefix (all but the final message) of
+the last prompt it processed, so a request repeating that prefix only pays
+prefill for its final message. A request with no messages and keep_alive 0
+unloads the model.
+
+Like a real server behind httpx, a request whose latency exceeds its read
+timeout fails with ReadTimeout once the timeout has passed.
+
+Requests are cut at their `stop` sequences and at `max_tokens` (Ollama's
+num_predict, reported with done_reason "length"), and report the seconds spent
+on completion tokens (per_token times their number) as eval_duration.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qsl
+
+import httpx
+
+from local_lm import LocalLM
+from ollama_client import OllamaClient, keep_alive_seconds, parse_keep_alive
+from prefix_gate import prefix_key
+
+STUB_PREFIX = "stub:"
+STUB_URL = "http://stub"
+
+# "[[ ## funny ## ]]` (must be formatted as a valid Python bool)" in the ChatAdapter's output instructions
+OUTPUT_FIELD = re.compile(r"`\[\[ ## (\w+) ## \]\]`(?: \(must be formatted as a valid Python ([\w\[\], ]+)\))?")
+OUTPUT_MARKER = "Respond with the corresponding output fields"
+# "Respond with a JSON object in the following order of fields: `new_instruction`." from the JSONAdapter
+JSON_FIELD = re.compile(r"`(\w+)`(?: \(must be formatted as a valid Python ([\w\[\], ]+)\))?")
+JSON_MARKER = "Respond with a JSON object in the following order of fields:"
+# A list-valued input field, e.g. "[[ ## jokes ## ]]\n["...", "..."]"; list outputs match its length
+LIST_INPUT = re.compile(r"\[\[ ## \w+ ## \]\]\n(\[.*?\])\n", re.DOTALL)
+
+CANNED_TEXT = (
+    "My code works and I have no idea why.",
+    "The model converged, so naturally I moved the goalposts.",
+    "I asked the optimizer for feedback and it asked me for more data.",
+    "Our latency budget is a feeling, not a number.",
+    "Every prompt is the final prompt until the next evaluation.",
+)
+
+STUB_OPTIONS = ("latency", "tokens", "per_token", "fail_rate", "timeout_rate", "load", "max_loaded", "prefill",
+                "runaway", "seed")
+COMPLETED_MARKER = "[[ ## completed ## ]]"
+
+
+def is_stub_model(model):
+    """Return True if a model name selects the stub backend"""
+    return model.startswith(STUB_PREFIX)
+
+
+def parse_distribution(text):
+    """Parse "kind:a,b" (or a bare number) into a function drawing a value from an rng"""
+    kind, _, args = str(text).partition(":")
+    if not args:
+        kind, args = "fixed", kind
+    values = [float(v) for v in args.split(",")]
+    samplers = {
+        "fixed": lambda rng: values[0],
+        "uniform": lambda rng: rng.uniform(values[0], values[1]),
+        "normal": lambda rng: max(0.0, rng.gauss(values[0], values[1])),
+        "lognormal": lambda rng: rng.lognormvariate(math.log(values[0]), values[1]),
+        "exp": lambda rng: rng.expovariate(1 / values[0]),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown distribution '{kind}' (expected one of {', '.join(samplers)})")
+    return samplers[kind]
+
+
+def parse_stub_spec(model):
+    """Split "stub:name?key=value&..." into (name, options dict)"""
+    name, _, query = model[len(STUB_PREFIX):].partition("?")
+    options = dict(parse_qsl(query))
+    unknown = set(options) - set(STUB_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown stub option(s) in '{model}': {', '.join(sorted(unknown))}")
+    return name, options
+
+
+def _json_value(type_name, rng, length=1):
+    """Random value for an output field of the given Python type name (lists get `length` items)"""
+    if type_name == "bool":
+        return rng.choice([True, False])
+    if type_name in ("int", "float"):
+        return rng.randint(0, 10)
+    if type_name.startswith("list"):
+        item_type = type_name[5:-1] if type_name.startswith("list[") else "str"
+        return [_json_value(item_type, rng) for _ in range(length)]
+    return rng.choice(CANNED_TEXT)
+
+
+def _field_value(type_name, rng, length=1):
+    """The same value as _json_value, written the way ChatAdapter fields are"""
+    value = _json_value(type_name, rng, length)
+    return json.dumps(value) if isinstance(value, list) else str(value)
+
+
+def _input_length(text):
+    """Length of the first list-valued input in a prompt (1 if there is none)"""
+    for match in LIST_INPUT.finditer(text):
+        try:
+            return len(json.loads(match.group(1)))
+        except ValueError:
+            continue
+    return 1
+
+
+def stub_reply(messages, rng):
+    """Build a reply to a chat request in the format its prompt asks for"""
+    text = messages[-1]["content"] if messages else ""
+    length = _input_length(text)
+    if JSON_MARKER in text:
+        fields = JSON_FIELD.findall(text.split(JSON_MARKER)[-1])
+        return json.dumps({name: _json_value(type_name, rng, length) for name, type_name in fields})
+    if OUTPUT_MARKER not in text:
+        return f"```\n{rng.choice(CANNED_TEXT)}\n```"
+
+    fields = OUTPUT_FIELD.findall(text.split(OUTPUT_MARKER)[-1])
+    sections = [
+        f"[[ ## {name} ## ]]\n{_field_value(type_name, rng, length)}"
+        for name, type_name in fields
+        if name != "completed"
+    ]
+    sections.append("[[ ## completed ## ]]")
+    return "\n\n".join(sections)
+
+
+def count_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def ramble(rng, max_tokens):
+    """What a model that doesn't stop at the completed marker generates next, up to max_tokens"""
+    text = ""
+    while count_tokens(text) < max_tokens:
+        text += f"\n\n[[ ## joke ## ]]\n{rng.choice(CANNED_TEXT)}"
+    return text[:4 * max_tokens]
+
+
+def apply_limits(content, options):
+    """Cut a reply at its first stop sequence and at num_predict tokens; returns (content, done_reason)"""
+    stops = options.get("stop") or []
+    for stop in [stops] if isinstance(stops, str) else stops:
+        index = content.find(stop)
+        if index != -1:
+            content = content[:index]
+    limit = options.get("num_predict")
+    if limit and limit > 0 and count_tokens(content) > limit:
+        return content[:4 * limit], "length"
+    return content, "stop"
+
+
+class StubServer:
+    """Model residency and prefix caches shared by every stub model, like one Ollama server
+
+    Args:
+        max_loaded (int): Models resident at once, or 0 for no limit
+    """
+
+    def __init__(self, max_loaded=0):
+        self.max_loaded = max_loaded
+        self.loads = 0
+        self.load_seconds = 0.0
+        self._resident = {}  # model -> (ready_at, expires_at), least recently used first
+        self._prefixes = {}
+        self._lock = threading.Lock()
+
+    def admit(self, model, prefix, load_seconds, keep_alive):
+        """Register a request; returns (seconds until the model is ready, seconds spent loading, prefix cached)"""
+        now = time.monotonic()
+        with self._lock:
+            for name, (_, expires_at) in list(self._resident.items()):
+                if expires_at <= now:
+                    del self._resident[name]
+                    self._prefixes.pop(name, None)
+
+            loaded = 0.0
+            if model in self._resident:
+                ready_at, _ = self._resident.pop(model)
+            else:
+                while self.max_loaded and len(self._resident) >= self.max_loaded:
+                    evicted = next(iter(self._resident))
+                    del self._resident[evicted]
+                    self._prefixes.pop(evicted, None)
+                loaded = load_seconds
+                ready_at = now + loaded
+                self.loads += bool(loaded)
+                self.load_seconds += loaded
+            self._resident[model] = (ready_at, ready_at + keep_alive_seconds(keep_alive))
+
+            cached = prefix is not None and self._prefixes.get(model) == prefix
+            self._prefixes[model] = prefix
+            return max(0.0, ready_at - now), loaded, cached
+
+    def unload(self, model):
+        """Drop a model from memory, like a request with keep_alive 0 and no messages"""
+        with self._lock:
+            self._resident.pop(model, None)
+            self._prefixes.pop(model, None)
+
+    def stats(self):
+        with self._lock:
+            return {"loads": self.loads, "load_seconds": self.load_seconds, "resident": list(self._resident)}
+
+
+STUB_SERVER = StubServer()
+
+
+class StubTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """In-process stand-in for Ollama's /api/chat and /api/tags endpoints
+
+    Args:
+        seed (int): Seed mixed into every reply, latency and fault draw
+        latency (str): Latency distribution in seconds
+        tokens (str): Completion token count distribution, or None to estimate from the reply
+        per_token (float): Extra seconds of latency per completion token
+        fail_rate (float): Probability of answering with a 503
+        timeout_rate (float): Probability of raising a timeout
+        load (float): Seconds to load the model when the server doesn't have it resident
+        prefill (float): Seconds per prompt token outside the model's cached prefix
+        runaway (float): Probability that a reply keeps generating past the completed marker
+        server (StubServer): Server whose residency and prefix caches this model shares
+    """
+
+    def __init__(self, seed=0, latency="fixed:0", tokens=None, per_token=0.0, fail_rate=0.0, timeout_rate=0.0,
+                 load=0.0, prefill=0.0, runaway=0.0, server=STUB_SERVER):
+        self.seed = seed
+        self.latency = parse_distribution(latency)
+        self.tokens = parse_distribution(tokens) if tokens else None
+        self.per_token = float(per_token)
+        self.fail_rate = float(fail_rate)
+        self.timeout_rate = float(timeout_rate)
+        self.load = float(load)
+        self.prefill = float(prefill)
+        self.runaway = float(runaway)
+        self.server = server
+        self.requests = 0
+        self.failures = 0
+        self.timeouts = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _rng(self, *parts):
+        payload = json.dumps([self.seed, *parts], sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _plan(self, request):
+        """Decide the outcome of a request: (delay, status code or "timeout", response body)"""
+        if request.url.path == "/api/tags":
+            return 0.0, 200, {"models": []}
+
+        body = json.loads(request.content or b"{}")
+        messages = body.get("messages", [])
+        if not messages and parse_keep_alive(body.get("keep_alive")) == 0:
+            self.server.unload(body.get("model"))
+            return 0.0, 200, {"model": body.get("model"), "done": True, "done_reason": "unload"}
+        key = hashlib.sha256(request.content).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+            self.requests += 1
+
+        content = stub_reply(messages, self._rng(body.get("model"), messages))
+        draws = self._rng(key, attempt)
+        options = body.get("options", {})
+        if self.runaway and content.endswith(COMPLETED_MARKER):
+            rng = self._rng("runaway", body.get("model"), messages)
+            if rng.random() < self.runaway:
+                content += ramble(rng, max(0, (options.get("num_predict") or 4000) - count_tokens(content)))
+        content, done_reason = apply_limits(content, options)
+        completion_tokens = int(self.tokens(draws)) if self.tokens else count_tokens(content)
+        if done_reason == "length":
+            completion_tokens = min(completion_tokens, options["num_predict"])
+        delay = self.latency(draws) + self.per_token * completion_tokens
+
+        prefix = prefix_key(messages)
+        wait, loaded, cached = self.server.admit(body.get("model"), prefix, self.load, body.get("keep_alive"))
+        prompt_tokens = sum(count_tokens(str(m.get("content", ""))) for m in messages)
+        uncached_tokens = count_tokens(str(messages[-1].get("content", ""))) if cached else prompt_tokens
+        delay += wait + self.prefill * uncached_tokens
+
+        fault = draws.random()
+        if fault < self.timeout_rate:
+            with self._lock:
+                self.timeouts += 1
+            return delay, "timeout", None
+        if fault < self.timeout_rate + self.fail_rate:
+            with self._lock:
+                self.failures += 1
+            return delay, 503, {"error": "injected failure"}
+
+        return delay, 200, {
+            "model": body.get("model"),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": done_reason,
+            "load_duration": int(loaded * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": completion_tokens,
+            "eval_duration": int(self.per_token * completion_tokens * 1e9),
+            "total_duration": int(delay * 1e9),
+        }
+
+    def _response(self, request, status, body):
+        if status == "timeout":
+            raise httpx.ReadTimeout("injected timeout", request=request)
+        return httpx.Response(status, json=body, request=request)
+
+    def _read_timeout(self, request, delay):
+        """Seconds until the request's read timeout fires, if it fires before the reply (else None)"""
+        timeout = (request.extensions.get("timeout") or {}).get("read")
+        return timeout if timeout is not None and timeout < delay else None
+
+    def handle_request(self, request):
+        delay, status, body = self._plan(request)
+        timeout = self._read_timeout(request, delay)
+        time.sleep(delay if timeout is None else timeout)
+        if timeout is not None:
+            raise httpx.ReadTimeout("read timeout", request=request)
+        return self._response(request, status, body)
+
+    async def handle_async_request(self, request):
+        delay, status, body = self._plan(request)
+        timeout = self._read_timeout(request, delay)
+        await asyncio.sleep(delay if timeout is None else timeout)
+        if timeout is not None:
+            raise httpx.ReadTimeout("read timeout", request=request)
+        return self._response(request, status, body)
+
+    def stats(self):
+        """Return injected-fault counters"""
+        with self._lock:
+            return {"requests": self.requests, "failures": self.failures, "timeouts": self.timeouts}
+
+
+class StubLM(LocalLM):
+    """LocalLM served by a StubTransport instead of an Ollama server
+
+    Args:
+        model (str): Stub model spec, e.g. "stub:student?latency=0.05&fail_rate=0.1"
+        seed (int): Run seed, used unless the spec sets its own (None behaves like 0)
+        concurrency (int): Maximum requests in flight through this LM's connection pool
+        **kwargs: Passed through to LocalLM (response_cache, metrics, temperature, ...)
+    """
+
+    def __init__(self, model, seed=None, concurrency=8, **kwargs):
+        _, self.options = parse_stub_spec(model)
+        self.seed = int(self.options.pop("seed", seed or 0))
+        super().__init__(model, concurrency=concurrency, **kwargs)
+
+    def _make_client(self, base_url, concurrency):
+        if "max_loaded" in self.options:
+            STUB_SERVER.max_loaded = int(self.options.pop("max_loaded"))
+        self.transport = StubTransport(seed=self.seed, **self.options)
+        return OllamaClient(
+            STUB_URL,
+            max_connections=concurrency,
+            retries=self.retries,
+            transport=self.transport,
+            keep_alive=self.keep_alive,
+            scheduler=self.scheduler,
+            resilience=self.resilience,
+        )
+
+    def client_stats(self):
+        stats = super().client_stats()
+        stats["injected"] = self.transport.stats()
+        return stats
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Parallel configuration sweep across several Ollama servers.
+
+Every (configuration, seed) job runs evaluator_optimizer_dspy.py in its own
+process, pointed at one of the given endpoints with --ollama-url. Each endpoint
+runs `--jobs-per-endpoint` jobs at a time and takes the next job it can serve
+as soon as one finishes, so faster servers pick up more work and the whole
+sweep takes about as long as its slowest job on the busiest server.
+
+Before anything runs, every endpoint is health-checked through /api/tags;
+unreachable endpoints are dropped, and jobs only go to endpoints that have both
+of their models pulled. Results are merged into one report (the same table as
+bench.py, one row per configuration) plus a per-endpoint summary:
+
+    # The three BENCHMARKS.md configurations, 3 seeds each, on two servers
+    python sweep.py --preset all --seeds 3 --endpoints http://gpu1:11434 http://gpu2:11434
+
+    # Several servers on this machine (OLLAMA_HOST=127.0.0.1:11435 ollama serve, ...)
+    python sweep.py --pair llama3.2:1b llama3.1:8b --pair llama3.1:8b qwen3:8b --ports 11434 11435
+
+    # Offline, against the stub backend
+    python sweep.py --pair stub:student stub:teacher --seeds 4 --jobs-per-endpoint 2
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+import httpx
+
+from bench import aggregate, cell_name, render_report, run_once
+from lm_cache import CACHE_MODES
+from ollama_client import ollama_base_url
+
+# Student and teacher of the configurations in BENCHMARKS.md
+PRESETS = {
+    "lightweight": ("llama3.2:1b", "llama3.1:8b"),
+    "medium": ("llama3.1:8b", "qwen3:8b"),
+    "high": ("gpt-oss:20b", "gpt-oss:120b"),
+}
+
+
+def check_endpoint(url, timeout=5.0):
+    """Health-check an Ollama endpoint; returns (healthy, pulled model names or error message)"""
+    try:
+        response = httpx.get(f"{url}/api/tags", timeout=timeout)
+        response.raise_for_status()
+        return True, {m["name"] for m in response.json().get("models", [])}
+    except (httpx.HTTPError, ValueError) as e:
+        return False, str(e) or type(e).__name__
+
+
+def is_stub_model(model):
+    # Same test as stub_lm.is_stub_model, without importing DSPy into the sweep process
+    return model.startswith("stub:")
+
+
+def has_model(pulled, model):
+    """True if a model (stub models always) is available on an endpoint with these pulled models"""
+    if is_stub_model(model):
+        return True
+    return model in pulled or (":" not in model and f"{model}:latest" in pulled)
+
+
+def needs_server(jobs):
+    return any(not is_stub_model(model) for job in jobs for model in (job["config"]["student"], job["config"]["teacher"]))
+
+
+class Sweep:
+    """Distributes (configuration, seed) jobs over healthy endpoints
+
+    Args:
+        endpoints (dict): Endpoint URL -> set of pulled model names
+        jobs (list): Jobs as dicts with "config", "seed" and "out_dir"
+        jobs_per_endpoint (int): Jobs running at once on each endpoint
+        cache_dir (str): Response cache shared by every run, or None for a fresh one per run
+    """
+
+    def __init__(self, endpoints, jobs, jobs_per_endpoint=1, cache_dir=None):
+        self.endpoints = endpoints
+        self.pending = list(jobs)
+        self.jobs_per_endpoint = jobs_per_endpoint
+        self.cache_dir = cache_dir
+        self.results = []
+        self.usage = {url: {"jobs": 0, "failed": 0, "busy_seconds": 0.0} for url in endpoints}
+        self._lock = threading.Lock()
+
+    def _servable(self, url, job):
+        return all(has_model(self.endpoints[url], job["config"][role]) for role in ("student", "teacher"))
+
+    def _next_job(self, url):
+        with self._lock:
+            for index, job in enumerate(self.pending):
+                if self._servable(url, job):
+                    return self.pending.pop(index)
+        return None
+
+    def _worker(self, url):
+        while True:
+            job = self._next_job(url)
+            if job is None:
+                return
+            name = cell_name(job["config"])
+            print(f"[{url}] {name}, seed {job['seed']}: started")
+            start = time.perf_counter()
+            record = run_once(job["config"], job["seed"], job["out_dir"], self.cache_dir, ollama_url=url)
+            seconds = time.perf_counter() - start
+            with self._lock:
+                usage = self.usage[url]
+                usage["jobs"] += 1
+                usage["failed"] += record is None
+                usage["busy_seconds"] += seconds
+                self.results.append({"job": job, "endpoint": url, "record": record})
+            status = "failed" if record is None else f"{record['run_seconds']:.1f}s"
+            print(f"[{url}] {name}, seed {job['seed']}: {status}")
+
+    def run(self):
+        """Run every job; returns the results, with jobs no healthy endpoint could serve left in .pending"""
+        workers = [
+            threading.Thread(target=self._worker, args=(url,), name=f"sweep-{url}", daemon=True)
+            for url in self.endpoints
+            for _ in range(self.jobs_per_endpoint)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return self.results
+
+
+def merge_results(jobs, results):
+    """Group job results by configuration into bench.py-style cells"""
+    cells = {}
+    for job in jobs:
+        name = cell_name(job["config"])
+        cells.setdefault(name, {"config": job["config"], "repeats": 0, "runs": [], "stats": {}})
+        cells[name]["repeats"] += 1
+    for result in sorted(results, key=lambda r: r["job"]["seed"]):
+        if result["record"] is not None:
+            run = dict(result["record"], seed=result["job"]["seed"], endpoint=result["endpoint"])
+            cells[cell_name(result["job"]["config"])]["runs"].append(run)
+    for cell in cells.values():
+        metrics = [{k: v for k, v in run.items() if k not in ("seed", "endpoint")} for run in cell["runs"]]
+        cell["stats"] = aggregate(metrics) if metrics else {}
+    return cells
+
+
+def render_endpoints(usage, wall_seconds, jobs_per_endpoint=1):
+    """Markdown table of the work each endpoint did"""
+    lines = [
+        "| Endpoint | Jobs | Failed | Busy (s) | Utilization |",
+        "|----------|------|--------|----------|-------------|",
+    ]
+    for url, stats in usage.items():
+        utilization = stats["busy_seconds"] / (wall_seconds * jobs_per_endpoint) if wall_seconds else 0.0
+        lines.append(f"| {url} | {stats['jobs']} | {stats['failed']} | {stats['busy_seconds']:.1f} | {utilization:.0%} |")
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run configurations x seeds of evaluator_optimizer_dspy.py in parallel across Ollama servers",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("\n\n", 3)[3],
+    )
+    parser.add_argument("--preset", nargs="+", choices=[*PRESETS, "all"], default=[],
+                        help="BENCHMARKS.md configurations to run")
+    parser.add_argument("--pair", nargs=2, action="append", default=[], metavar=("STUDENT", "TEACHER"),
+                        help="Student/teacher pair to run (repeatable)")
+    parser.add_argument("--endpoints", nargs="+", default=[], help="Ollama server URLs")
+    parser.add_argument("--ports", nargs="+", type=int, default=[], help="Ports of Ollama servers on this machine")
+    parser.add_argument("--jobs-per-endpoint", type=int, default=1, help="Runs at once per endpoint (default: 1)")
+    parser.add_argument("--seeds", type=int, default=3, help="Seeds per configuration (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="First seed (default: 0)")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[8], help="Concurrency level(s)")
+    parser.add_argument("--cache-mode", nargs="+", choices=CACHE_MODES, default=["write"], help="Cache mode(s)")
+    parser.add_argument("--max-evals", nargs="+", type=int, default=[1], help="GEPA budget(s) in full evaluations")
+    parser.add_argument("--cache-dir", default=None, help="Share this response cache between runs instead of a fresh one")
+    parser.add_argument("--out", default="sweep_results", help="Directory for run logs and results (default: sweep_results)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+
+    presets = list(PRESETS) if "all" in args.preset else args.preset
+    pairs = [PRESETS[name] for name in presets] + [tuple(pair) for pair in args.pair]
+    if not pairs:
+        print("Nothing to run: give --preset and/or --pair")
+        return 2
+
+    urls = [ollama_base_url(url) for url in args.endpoints]
+    urls += [f"http://localhost:{port}" for port in args.ports]
+    urls = list(dict.fromkeys(urls or [ollama_base_url()]))
+
+    jobs = []
+    for (student, teacher), concurrency, cache_mode, max_evals in itertools.product(
+        pairs, args.concurrency, args.cache_mode, args.max_evals
+    ):
+        config = {"student": student, "teacher": teacher, "concurrency": concurrency,
+                  "cache_mode": cache_mode, "max_evals": max_evals}
+        cell_dir = os.path.join(args.out, stamp, f"cell{len(jobs) // args.seeds:02d}")
+        os.makedirs(cell_dir, exist_ok=True)
+        jobs += [{"config": config, "seed": seed, "out_dir": cell_dir}
+                 for seed in range(args.seed, args.seed + args.seeds)]
+
+    endpoints = {}
+    if needs_server(jobs):
+        for url in urls:
+            healthy, detail = check_endpoint(url)
+            if healthy:
+                print(f"{url}: healthy, {len(detail)} models pulled")
+                endpoints[url] = detail
+            else:
+                print(f"{url}: unreachable ({detail}), skipping")
+    else:
+        endpoints = {url: set() for url in urls}  # Stub models only: no server is contacted
+    if not endpoints:
+        print("No healthy endpoints")
+        return 1
+
+    print(f"\nRunning {len(jobs)} jobs on {len(endpoints)} endpoint(s), {args.jobs_per_endpoint} at a time each\n")
+    start = time.perf_counter()
+    sweep = Sweep(endpoints, jobs, args.jobs_per_endpoint, args.cache_dir)
+    results = sweep.run()
+    wall_seconds = time.perf_counter() - start
+
+    cells = merge_results(jobs, results)
+    report = {
+        "created": stamp,
+        "wall_seconds": wall_seconds,
+        "endpoints": {url: dict(stats, models=sorted(endpoints[url])) for url, stats in sweep.usage.items()},
+        "unserved": [dict(job["config"], seed=job["seed"]) for job in sweep.pending],
+        "cells": cells,
+    }
+    results_path = os.path.join(args.out, f"sweep-{stamp}.json")
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print()
+    print(render_report(cells))
+    print()
+    print(render_endpoints(sweep.usage, wall_seconds, args.jobs_per_endpoint))
+    print(f"\nSweep wall time: {wall_seconds:.1f}s (sum of run times: "
+          f"{sum(stats['busy_seconds'] for stats in sweep.usage.values()):.1f}s)")
+    if sweep.pending:
+        print(f"{len(sweep.pending)} job(s) not run: no healthy endpoint has their models pulled")
+    print(f"Results written to {results_path}")
+
+    failed = sum(stats["failed"] for stats in sweep.usage.values())
+    return 1 if failed or sweep.pending else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Adaptive evaluation: stopped programs report an upper bound, never a partial-sample accuracy"""
+
+from adaptive_eval import AdaptiveEvaluator, StoppedEvaluation, wilson_interval
+from instrumentation import format_score, render_summary, score_value, split_scores
+
+
+def make_evaluator(size=40):
+    # A "program" is its per-example score
+    def evaluate_batch(programs, examples):
+        return [[(example, None, program) for example in examples] for program in programs]
+    return AdaptiveEvaluator(evaluate_batch, list(range(size)), chunk_size=8, min_examples=8)
+
+
+def test_wilson_interval():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(8, 8)
+    assert 0.6 < low < 1.0 and high == 1.0
+
+
+def test_a_program_below_the_best_is_stopped_with_an_upper_bound():
+    evaluate = make_evaluator()
+    assert evaluate(1.0).score == 100.0
+    stopped = evaluate(0.0)
+    assert isinstance(stopped, StoppedEvaluation) and stopped.score is None
+    assert len(stopped.results) == 8 and 0 < stopped.upper_bound < 100
+    assert evaluate.stats()["stopped"] == 1 and evaluate.stats()["examples_skipped"] == 32
+
+
+def test_race_drops_the_losing_program():
+    full, stopped = make_evaluator().race([1.0, 0.0])
+    assert full.score == 100.0 and isinstance(stopped, StoppedEvaluation)
+
+
+def test_stopped_scores_stay_out_of_the_accuracies():
+    stopped = score_value(make_evaluator().race([1.0, 0.0])[1])
+    assert stopped["stopped"] and stopped["examples"] == 8
+    assert score_value(stopped) is stopped  # Resumed from a checkpoint
+    assert format_score(stopped) == f"stopped (upper bound {stopped['upper_bound']}% on 8 examples)"
+
+    scores, stopped_scores = split_scores({"baseline_judge": 50.0, "optimized_judge": stopped})
+    assert scores == {"baseline_judge": 50.0} and stopped_scores == {"optimized_judge": stopped}
+    summary = {"scores": scores, "stopped_scores": stopped_scores, "total_seconds": 60, "models": {}}
+    assert render_summary(summary)[:2] == [
+        "Basic audience judge accuracy: 50.0%",
+        f"Optimized audience judge accuracy: {format_score(stopped)}",
+    ]
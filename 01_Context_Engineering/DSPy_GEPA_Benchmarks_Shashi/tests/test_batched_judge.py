@@ -0,0 +1,69 @@
+"""BatchedJudge / BatchedJudgeQueue: one prompt per micro-batch, per-joke fallback on bad answers"""
+
+import dspy
+
+from batched_judge import BatchedJudge, BatchedJudgeQueue
+
+
+def make_judge():
+    """A judge program whose single-joke calls are recorded instead of sent to a model"""
+    program = dspy.ChainOfThought("topic, joke -> funny: bool")
+    calls = []
+
+    def judge(topic, joke):
+        calls.append(joke)
+        return dspy.Prediction(reasoning="single", funny=True)
+
+    return program, judge, calls
+
+
+def batched(program, judge, answer):
+    """BatchedJudge whose batched prompt returns `answer` (a function of the jokes) without an LM"""
+    batched_judge = BatchedJudge(program)
+    batched_judge.judge = judge
+    batched_judge.predict = lambda topics, jokes: answer(jokes)
+    return batched_judge
+
+
+def test_one_verdict_per_joke_from_one_call():
+    program, judge, calls = make_judge()
+    batched_judge = batched(program, judge, lambda jokes: dspy.Prediction(
+        reasonings=[f"r{i}" for i in range(len(jokes))], funny=[i % 2 == 0 for i in range(len(jokes))]))
+    results = batched_judge([("t", "a"), ("t", "b"), ("t", "c")])
+    assert [result.funny for result in results] == [True, False, True]
+    assert [result.reasoning for result in results] == ["r0", "r1", "r2"]
+    assert calls == []
+    assert batched_judge.stats() == {"calls": 1, "items": 3, "fallbacks": 0, "parse_failures": 0}
+
+
+def test_unusable_verdicts_fall_back_to_the_single_judge():
+    program, judge, calls = make_judge()
+    # A non-bool verdict only falls back for that joke
+    batched_judge = batched(program, judge, lambda jokes: dspy.Prediction(reasonings=[], funny=[False, "maybe"]))
+    results = batched_judge([("t", "a"), ("t", "b")])
+    assert [result.funny for result in results] == [False, True] and calls == ["b"]
+
+    # A misaligned answer can't be matched to its jokes, so all of them fall back
+    calls.clear()
+    batched_judge = batched(program, judge, lambda jokes: dspy.Prediction(reasonings=[], funny=[False]))
+    assert [result.reasoning for result in batched_judge([("t", "a"), ("t", "b")])] == ["single", "single"]
+    assert calls == ["a", "b"]
+    assert batched_judge.stats()["fallbacks"] == 2 and batched_judge.stats()["parse_failures"] == 1
+
+
+def test_queue_sends_each_micro_batch_as_one_prompt():
+    program, judge, calls = make_judge()
+    judge_queue = BatchedJudgeQueue(program, batch_size=4, max_wait=1.0, max_workers=2)
+    prompts = []
+
+    def answer(jokes):
+        prompts.append(list(jokes))
+        return dspy.Prediction(reasonings=list(jokes), funny=[joke.endswith("!") for joke in jokes])
+
+    judge_queue.batched_judge.judge = judge
+    judge_queue.batched_judge.predict = lambda topics, jokes: answer(jokes)
+    futures = [judge_queue.submit("t", joke) for joke in ("a!", "b", "c!", "d")]
+    assert [future.result(timeout=5).funny for future in futures] == [True, False, True, False]
+    judge_queue.close()
+    assert prompts == [["a!", "b", "c!", "d"]]
+    assert judge_queue.stats()["batches"] == 1 and judge_queue.stats()["prompt_calls"] == 1
@@ -0,0 +1,74 @@
+"""Incremental re-optimization: example fingerprints, deltas, budgets and reused scores"""
+
+from types import SimpleNamespace
+
+import dspy
+
+from incremental import (
+    IncrementalEvaluator,
+    IncrementalStore,
+    example_fingerprint,
+    incremental_budget,
+)
+
+
+def joke(i, funny=True):
+    return dspy.Example(topic=f"topic {i}", joke=f"joke {i}", funny=funny).with_inputs("topic", "joke")
+
+
+def test_fingerprint_covers_inputs_and_labels_only():
+    assert example_fingerprint(joke(1)) == example_fingerprint(joke(1))
+    assert example_fingerprint(joke(1)) == example_fingerprint(joke(1).with_inputs("topic"))
+    assert example_fingerprint(joke(1)) != example_fingerprint(joke(1, funny=False))
+    assert example_fingerprint(joke(1)) != example_fingerprint(joke(2))
+
+
+def test_delta_against_the_saved_phase(tmp_path):
+    store = IncrementalStore(str(tmp_path))
+    trainset, valset = [joke(i) for i in range(6)], [joke(i) for i in range(6, 8)]
+    assert store.delta("phase", trainset, valset).fraction == 1.0  # Never ran
+
+    program = dspy.Predict("topic, joke -> funny: bool")
+    store.save_program("phase", program, trainset, valset, setting={"student": "a"})
+    reopened = IncrementalStore(str(tmp_path))
+    delta = reopened.delta("phase", trainset, valset, setting={"student": "a"})
+    assert not delta.changed and not delta.setting_changed
+
+    delta = reopened.delta("phase", trainset[1:] + [joke(8), joke(9)], valset, setting={"student": "a"})
+    assert (delta.added, delta.removed, delta.total) == (2, 1, 9)
+    assert delta.fraction == 3 / 9
+    assert reopened.delta("phase", trainset, valset, setting={"student": "b"}).setting_changed
+    assert reopened.load_program("phase", program, None) is not None
+
+
+def test_budget_scales_with_the_change_within_bounds():
+    assert incremental_budget(1000, 0.1, valset_size=20) == 100
+    assert incremental_budget(1000, 0.001, valset_size=20) == 26  # The seed's valset evaluation plus one proposal
+    assert incremental_budget(1000, 1.0, valset_size=20) == 1000
+
+
+def test_evaluator_scores_only_examples_without_a_stored_score(tmp_path):
+    evaluated = []
+
+    def create(examples):
+        def evaluate(program):
+            evaluated.extend(example.topic for example in examples)
+            return SimpleNamespace(results=[(example, None, float(example.funny)) for example in examples])
+        return evaluate
+
+    program = dspy.Predict("topic, joke -> funny: bool")
+    devset = [joke(0), joke(1, funny=False)]
+    assert IncrementalEvaluator(create, devset, IncrementalStore(str(tmp_path)), "exact")(program) == 50.0
+
+    evaluated.clear()
+    store = IncrementalStore(str(tmp_path))
+    assert IncrementalEvaluator(create, devset + [joke(2)], store, "exact")(program) == 66.67
+    assert evaluated == ["topic 2"]
+    assert (store.stats()["reused"], store.stats()["scored"]) == (2, 1)
+
+    # Another metric, or a changed program, has no stored scores
+    evaluated.clear()
+    IncrementalEvaluator(create, devset, store, "judge")(program)
+    program.signature = program.signature.with_instructions("Be strict.")
+    IncrementalEvaluator(create, devset, store, "exact")(program)
+    assert evaluated == ["topic 0", "topic 1"] * 2
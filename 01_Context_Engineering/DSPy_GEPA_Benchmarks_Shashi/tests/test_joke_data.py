@@ -0,0 +1,61 @@
+"""joke_data: hash-based splits, reservoir sampling, and streaming every file format"""
+
+import json
+from collections import Counter
+
+import pytest
+
+from joke_data import iter_records, load_joke_datasets, reservoir_sample, split_of
+
+
+def make_records(count):
+    return [{"topic": f"topic {i % 7}", "joke": f"joke number {i}", "funny": i % 2 == 0} for i in range(count)]
+
+
+def test_split_is_deterministic_and_close_to_60_20_20():
+    records = make_records(5000)
+    splits = [split_of(record) for record in records]
+    assert splits == [split_of(record) for record in records]
+    counts = Counter(splits)
+    assert abs(counts["train"] / 5000 - 0.6) < 0.03
+    assert abs(counts["val"] / 5000 - 0.2) < 0.03
+    # A different salt reassigns records
+    assert [split_of(record, salt="x") for record in records] != splits
+
+
+def test_reservoir_keeps_k_items_sampled_uniformly():
+    assert reservoir_sample(range(10), None) == list(range(10))
+    assert reservoir_sample(range(3), 5) == [0, 1, 2]
+    sample = reservoir_sample(range(1000), 10, seed=1)
+    assert len(sample) == 10 and len(set(sample)) == 10
+    assert sample == reservoir_sample(range(1000), 10, seed=1)
+    # Late items are as likely to be kept as early ones
+    kept = Counter(item // 500 for seed in range(200) for item in reservoir_sample(range(1000), 10, seed=seed))
+    assert abs(kept[0] - kept[1]) < 0.15 * 2000
+
+
+@pytest.mark.parametrize("extension", [".jsonl", ".json", ".csv"])
+def test_formats_stream_the_same_records(tmp_path, extension):
+    records = make_records(20) + [{"topic": "x", "joke": "  ", "funny": True}]
+    path = tmp_path / f"jokes{extension}"
+    if extension == ".jsonl":
+        path.write_text("\n".join(json.dumps(record) for record in records))
+    elif extension == ".json":
+        path.write_text(json.dumps(records, indent=2))
+    else:
+        lines = ["topic,joke,funny"] + [f"{r['topic']},{r['joke']},{'yes' if r['funny'] else 'no'}" for r in records]
+        path.write_text("\n".join(lines))
+    streamed = list(iter_records(str(path)))
+    assert [(r["topic"], r["joke"], r["funny"]) for r in streamed] == [
+        (r["topic"], r["joke"], r["funny"]) for r in records[:20]
+    ]
+
+
+def test_load_bounds_each_split_by_its_size(tmp_path):
+    path = tmp_path / "jokes.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in make_records(300)))
+    train, val, dev = load_joke_datasets(str(path), trainset_size=10, valset_size=5, devset_size=None)
+    assert (len(train), len(val)) == (10, 5)
+    assert len(dev) == sum(split_of(record) == "dev" for record in make_records(300))
+    assert all(split_of({"topic": example.topic, "joke": example.joke}) == "train" for example in train)
+    assert set(train[0].inputs().keys()) >= {"topic", "joke"}
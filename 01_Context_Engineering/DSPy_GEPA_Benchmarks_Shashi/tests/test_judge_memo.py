@@ -0,0 +1,37 @@
+"""JudgeMemo: key normalisation, LRU eviction, and reloading a persisted memo"""
+
+from judge_memo import JudgeMemo, normalize_text
+
+
+def test_keys_ignore_case_and_whitespace_but_not_the_judge():
+    memo = JudgeMemo()
+    memo.put("Fishing", "Give a man  a fish.", "judge-a", True, "Ha")
+    assert normalize_text("  Give a MAN\ta fish. ") == "give a man a fish."
+    assert memo.get(" fishing ", "give a man a fish.", "judge-a") == {"funny": True, "reasoning": "Ha"}
+    assert memo.get("fishing", "give a man a fish.", "judge-b") is None
+    assert memo.stats()["hits"] == 1 and memo.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used_verdicts():
+    memo = JudgeMemo(max_entries=2)
+    memo.put("t", "a", "j", True, "")
+    memo.put("t", "b", "j", False, "")
+    assert memo.get("t", "a", "j") is not None  # "a" is now more recent than "b"
+    memo.put("t", "c", "j", True, "")
+    assert memo.get("t", "b", "j") is None
+    assert memo.get("t", "a", "j") is not None and memo.get("t", "c", "j") is not None
+    assert memo.stats()["entries"] == 2
+
+
+def test_reload_keeps_the_most_recent_entries(tmp_path):
+    path = str(tmp_path / "memo.json")
+    memo = JudgeMemo(max_entries=3, path=path)
+    for joke in "abc":
+        memo.put("t", joke, "j", True, joke)
+    memo.get("t", "a", "j")
+    memo.save()
+
+    reloaded = JudgeMemo(max_entries=2, path=path)
+    assert reloaded.stats()["entries"] == 2
+    assert reloaded.get("t", "b", "j") is None
+    assert reloaded.get("t", "a", "j") == {"funny": True, "reasoning": "a"}
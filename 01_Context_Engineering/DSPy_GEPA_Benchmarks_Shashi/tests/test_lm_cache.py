@@ -0,0 +1,62 @@
+"""ResponseCache: put/get round trips, size accounting on overwrites, LRU eviction"""
+
+import os
+import time
+
+from lm_cache import ResponseCache, make_cache_key
+
+
+def entry_bytes(cache):
+    return sum(size for _, _, size in cache._entries())
+
+
+def test_put_get_round_trip(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    key = make_cache_key("m", {"temperature": 0.0}, messages=[{"role": "user", "content": "hi"}])
+    assert cache.get(key) is None
+    cache.put(key, {"choices": ["a"]}, model="m")
+    assert cache.get(key) == {"choices": ["a"]}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    # A fresh cache over the same directory sees the entry
+    assert ResponseCache(str(tmp_path)).get(key) == {"choices": ["a"]}
+
+
+def test_key_ignores_connection_params_and_unset_values():
+    messages = [{"role": "user", "content": "hi"}]
+    base = make_cache_key("m", {"temperature": 1.0}, messages=messages)
+    assert make_cache_key("m", {"temperature": 1.0, "api_base": "x", "top_p": None}, messages=messages) == base
+    assert make_cache_key("m", {"temperature": 0.5}, messages=messages) != base
+
+
+def test_read_and_off_modes_do_not_write(tmp_path):
+    ResponseCache(str(tmp_path), mode="read").put("ab" * 32, {"x": 1})
+    assert not any(os.scandir(tmp_path))
+    off = ResponseCache(str(tmp_path / "off"), mode="off")
+    off.put("ab" * 32, {"x": 1})
+    assert off.get("ab" * 32) is None and not (tmp_path / "off").exists()
+
+
+def test_overwrite_counts_only_the_size_difference(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    for text in ("a" * 1000, "b" * 10, "c" * 500):
+        cache.put("cd" * 32, {"text": text})
+    assert cache._size == entry_bytes(cache)
+    assert cache.evictions == 0
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    keys = [f"{i:02d}" * 32 for i in range(6)]
+    probe = ResponseCache(str(tmp_path / "probe"))
+    probe.put(keys[0], {"text": "x" * 300})
+    # Room for five entries: the sixth put goes over the limit
+    cache = ResponseCache(str(tmp_path / "cache"), max_size_mb=5.5 * entry_bytes(probe) / (1024 * 1024))
+    for i, key in enumerate(keys[:5]):
+        cache.put(key, {"text": "x" * 300})
+        os.utime(cache._path(key), (time.time() - 100 + i,) * 2)  # Distinct last-use times, oldest first
+    cache.get(keys[0])  # Touch the oldest entry: it becomes the most recently used
+    cache.put(keys[5], {"text": "x" * 300})
+    assert cache.evictions > 0
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert entry_bytes(cache) <= cache.max_bytes
+    assert cache._size == entry_bytes(cache)
@@ -0,0 +1,40 @@
+"""LocalLM: calls run through its DSPy engine, hit the response cache, and refuse unsupported params"""
+
+import asyncio
+import warnings
+
+import pytest
+
+from lm_cache import ResponseCache, make_cache_key
+from stub_lm import StubLM
+
+
+def make_lm(tmp_path, **kwargs):
+    return StubLM("stub:s", response_cache=ResponseCache(str(tmp_path)), temperature=1.0, max_tokens=100, **kwargs)
+
+
+def test_calls_use_the_engine_without_deprecation_warnings(tmp_path):
+    lm = make_lm(tmp_path)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        first = lm("hi")
+        again = asyncio.run(lm.acall("hi"))
+    assert first == again
+    assert lm.transport.stats()["requests"] == 1
+    assert lm.response_cache.stats()["hits"] == 1
+
+
+def test_cache_key_matches_the_request_messages_and_params(tmp_path):
+    lm = make_lm(tmp_path)
+    outputs = lm("hi", top_p=0.5)
+    params = {"temperature": 1.0, "max_tokens": 100, "top_p": 0.5}
+    key = make_cache_key(lm.model, params, messages=[{"role": "user", "content": "hi"}])
+    assert lm.response_cache.get(key)["choices"][0]["message"]["content"] == outputs[0]
+
+
+@pytest.mark.parametrize("kwargs", [{"response_format": {"type": "json_object"}}, {"logprobs": True}, {"num_ctx": 8}])
+def test_unsupported_params_are_refused(tmp_path, kwargs):
+    lm = make_lm(tmp_path)
+    with pytest.raises(Exception, match="response_format|logprobs|num_ctx"):
+        lm("hi", **kwargs)
+    assert lm.transport.stats()["requests"] == 0
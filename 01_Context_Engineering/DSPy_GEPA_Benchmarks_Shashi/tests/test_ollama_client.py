@@ -0,0 +1,94 @@
+"""OllamaClient against a local fake Ollama server: file descriptors stay bounded as concurrency grows"""
+
+import concurrent.futures
+import http.server
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from ollama_client import OllamaClient
+
+MAX_CONNECTIONS = 8
+CALLS = 200
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="counts fds through /proc/self/fd")
+
+
+class FakeOllama(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like Ollama
+
+    def do_POST(self):
+        json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(0.005)
+        body = json.dumps({"message": {"role": "assistant", "content": "ok"}, "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+def peak_fds(base_url, threads):
+    """Peak open fds while `threads` threads make CALLS requests through one client"""
+    client = OllamaClient(base_url, max_connections=MAX_CONNECTIONS)
+    peak, done = [open_fds()], threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], open_fds())
+            time.sleep(0.001)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+            messages = [{"role": "user", "content": f"joke {i}"} for i in range(CALLS)]
+            results = list(executor.map(lambda m: client.chat("fake", [m], {}), messages))
+    finally:
+        done.set()
+        sampler.join()
+    stats = client.stats()
+    client.close()
+    assert all(r["message"]["content"] == "ok" for r in results)
+    assert stats["requests"] == CALLS
+    assert stats["peak_in_flight"] <= MAX_CONNECTIONS
+    return peak[0]
+
+
+def test_fds_stay_flat_as_concurrency_grows(server):
+    baseline = open_fds()
+    peaks = {threads: peak_fds(server, threads) for threads in (4, 16, 64)}
+    # Each pooled connection holds one client and one (in-process) server socket
+    for threads, peak in peaks.items():
+        assert peak - baseline <= 2 * MAX_CONNECTIONS + 4, (threads, peaks)
+    assert peaks[64] - peaks[16] <= 4, peaks
+
+
+def test_close_releases_sockets(server):
+    baseline = open_fds()
+    peak_fds(server, 16)
+    deadline = time.monotonic() + 5
+    while open_fds() > baseline + 2 and time.monotonic() < deadline:
+        time.sleep(0.05)  # Server handler threads close their side once the client hangs up
+    assert open_fds() <= baseline + 2
@@ -0,0 +1,73 @@
+"""PrefixGate: waiting requests are admitted grouped by prefix, without starving the rest"""
+
+import asyncio
+import threading
+import time
+
+from prefix_gate import PrefixGate, prefix_key
+
+
+def queue_waiters(gate, names):
+    """Start one blocked acquire() per name (prefixed by its first letter), in order
+
+    Returns the list the names are appended to as they are admitted.
+    """
+    admitted = []
+    for name in names:
+        expected = len(gate._waiters) + 1
+
+        def wait(name=name):
+            gate.acquire(name[0])
+            admitted.append(name)
+
+        threading.Thread(target=wait, daemon=True).start()
+        while len(gate._waiters) < expected:
+            time.sleep(0.001)
+    return admitted
+
+
+def release_all(gate, admitted, count):
+    for i in range(count):
+        gate.release()
+        while len(admitted) < i + 1:
+            time.sleep(0.001)
+
+
+def test_prefix_key_ignores_the_final_message():
+    system = {"role": "system", "content": "Judge the joke."}
+    assert prefix_key([system, {"role": "user", "content": "a"}]) == prefix_key([system, {"role": "user", "content": "b"}])
+    assert prefix_key([{"role": "user", "content": "a"}]) is None
+
+
+def test_waiters_with_the_last_prefix_go_first():
+    gate = PrefixGate(slots=1)
+    gate.acquire("A")
+    admitted = queue_waiters(gate, ["B1", "A1", "B2", "A2"])
+    release_all(gate, admitted, 4)
+    assert admitted == ["A1", "A2", "B1", "B2"]
+    assert gate.stats() == {"admitted": 5, "prefixed": 5, "prefix_hits": 3, "reordered": 2}
+
+
+def test_a_request_passed_over_max_skips_times_is_admitted_next():
+    gate = PrefixGate(slots=1, max_skips=1)
+    gate.acquire("A")
+    admitted = queue_waiters(gate, ["B1", "A1", "A2"])
+    release_all(gate, admitted, 3)
+    assert admitted == ["A1", "B1", "A2"]
+
+
+def test_async_waiters_share_the_gate_and_cancellation_frees_the_slot():
+    gate = PrefixGate(slots=1)
+
+    async def main():
+        await gate.acquire_async("A")
+        waiting = asyncio.ensure_future(gate.acquire_async("A"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.sleep(0.01)
+        assert gate._waiters == []
+        gate.release()
+        await asyncio.wait_for(gate.acquire_async("B"), 1)
+
+    asyncio.run(main())
+    assert gate.stats()["admitted"] == 2
@@ -0,0 +1,46 @@
+"""Program artifacts: saved programs render and parse exactly as DSPy's ChatAdapter does"""
+
+import dspy
+import pytest
+
+from program_artifact import describe_program, load_artifact, save_artifact
+
+
+def make_program():
+    program = dspy.Predict("topic, comedian -> joke, funny: bool")
+    program.signature = program.signature.with_instructions("Tell a joke about the topic.")
+    program.demos = [dspy.Example(topic="Fishing", comedian="Ricky Gervais", joke="Give a man a fish.", funny=True)]
+    program.config["top_p"] = 0.9
+    return program
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    program = make_program()
+    lm = dspy.LM("ollama_chat/llama3.2:1b", temperature=1.0, max_tokens=100, api_key="")
+    path = save_artifact(str(tmp_path / "programs.json"), {"comedian": describe_program(program, lm, {"dev": 50.0})})
+    return load_artifact(path)
+
+
+def test_render_matches_the_chat_adapter(artifact):
+    inputs = {"topic": "AI {{comedian}}", "comedian": "Ricky Gervais"}
+    expected = dspy.ChatAdapter().format(make_program().signature, demos=make_program().demos, inputs=inputs)
+    assert artifact.program("comedian").render(**inputs) == expected
+
+
+def test_parse_matches_the_chat_adapter(artifact):
+    reply = "[[ ## joke ## ]]\nMy code works.\n\n[[ ## funny ## ]]\nFalse\n\n[[ ## completed ## ]]"
+    expected = dspy.ChatAdapter().parse(make_program().signature, reply)
+    assert artifact.program("comedian").parse(reply) == expected == {"joke": "My code works.", "funny": False}
+    with pytest.raises(ValueError, match="funny"):
+        artifact.program("comedian").parse("[[ ## joke ## ]]\nNo verdict.")
+
+
+def test_metadata_survives_the_round_trip(artifact):
+    program = artifact.program("comedian")
+    assert program.model == "ollama_chat/llama3.2:1b"
+    assert program.scores == {"dev": 50.0}
+    # Connection settings are left out; the predictor's config overrides the LM's kwargs
+    assert program.request_params() == {"temperature": 1.0, "max_tokens": 100, "top_p": 0.9}
+    with pytest.raises(KeyError):
+        artifact.program("judge")
@@ -0,0 +1,61 @@
+"""ResidencyScheduler: one model's requests at a time, switching once its phase has drained"""
+
+import threading
+import time
+
+from residency import ResidencyScheduler
+
+
+def start_waiter(scheduler, model, admitted):
+    """acquire() in a thread, appending (model, model to unload) once admitted; returns once it is queued"""
+    queued = sum(len(queue) for queue in scheduler._waiters.values()) + 1
+
+    def wait():
+        admitted.append((model, scheduler.acquire(model)))
+
+    threading.Thread(target=wait, daemon=True).start()
+    while sum(len(queue) for queue in scheduler._waiters.values()) < queued and not admitted:
+        time.sleep(0.001)
+
+
+def wait_for(admitted, count):
+    deadline = time.monotonic() + 5
+    while len(admitted) < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return admitted
+
+
+def test_other_model_waits_for_the_active_phase_to_drain():
+    scheduler = ResidencyScheduler(max_wait=60, unload=True)
+    assert scheduler.acquire("student") is None
+    assert scheduler.acquire("student") is None
+    admitted = []
+    start_waiter(scheduler, "teacher", admitted)
+    start_waiter(scheduler, "teacher", admitted)
+
+    # Before max_wait, the active model keeps admitting new work
+    assert scheduler.acquire("student") is None
+    for _ in range(3):
+        assert admitted == []
+        scheduler.release("student")
+
+    # The whole teacher phase is admitted at once; its first request unloads the student
+    assert sorted(wait_for(admitted, 2), key=str) == [("teacher", "student"), ("teacher", None)]
+    assert scheduler.stats()["switches"] == 1
+    assert scheduler.stats()["phases"] == {"student": 1, "teacher": 1}
+
+
+def test_past_max_wait_the_active_model_stops_admitting():
+    scheduler = ResidencyScheduler(max_wait=0)
+    scheduler.acquire("student")
+    teacher = []
+    start_waiter(scheduler, "teacher", teacher)
+    student = []
+    start_waiter(scheduler, "student", student)
+    assert student == [] and teacher == []
+
+    scheduler.release("student")
+    assert wait_for(teacher, 1) == [("teacher", None)] and student == []
+    scheduler.release("teacher")
+    assert wait_for(student, 1) == [("student", None)]
+    assert scheduler.stats()["switches"] == 2
@@ -0,0 +1,140 @@
+"""Resilience policy through an OllamaClient: retries, deadlines, circuit breakers and hedging"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from ollama_client import OllamaClient
+from resilience import CircuitOpenError, Resilience
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+REPLY = {"message": {"role": "assistant", "content": "hello"}, "done": True}
+
+
+class ScriptedTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Answers the n-th request with statuses[n] (the last one repeats) after delays[n] seconds
+
+    A delay longer than the request's timeout raises httpx.ReadTimeout once the timeout has passed.
+    """
+
+    def __init__(self, statuses=(200,), delays=(0.0,)):
+        self.statuses = list(statuses)
+        self.delays = list(delays)
+        self.requests = 0
+        self.cancelled = 0
+
+    def _plan(self, request):
+        index = self.requests
+        self.requests += 1
+        status = self.statuses[min(index, len(self.statuses) - 1)]
+        delay = self.delays[min(index, len(self.delays) - 1)]
+        timeout = request.extensions.get("timeout", {}).get("read")
+        return status, delay, timeout
+
+    def _response(self, request, status, delay, timeout):
+        if timeout is not None and delay > timeout:
+            raise httpx.ReadTimeout("stub timeout", request=request)
+        return httpx.Response(status, json=REPLY if status == 200 else {"error": "stub"}, request=request)
+
+    def handle_request(self, request):
+        status, delay, timeout = self._plan(request)
+        time.sleep(min(delay, timeout or delay))
+        return self._response(request, status, delay, timeout)
+
+    async def handle_async_request(self, request):
+        status, delay, timeout = self._plan(request)
+        try:
+            await asyncio.sleep(min(delay, timeout or delay))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self._response(request, status, delay, timeout)
+
+
+def client(transport, **policy):
+    return OllamaClient("http://stub", transport=transport, resilience=Resilience(backoff=0.001, **policy))
+
+
+def endpoint_stats(ollama):
+    return ollama.resilience.stats()["http://stub m"]
+
+
+def test_5xx_responses_are_retried():
+    transport = ScriptedTransport(statuses=(503, 500, 200))
+    ollama = client(transport, retries=3)
+    assert ollama.chat("m", MESSAGES, {}) == REPLY
+    assert transport.requests == 3 and ollama.stats()["retried"] == 2
+
+
+def test_4xx_responses_are_not_retried():
+    transport = ScriptedTransport(statuses=(400, 200))
+    ollama = client(transport, retries=3)
+    with pytest.raises(httpx.HTTPStatusError):
+        ollama.chat("m", MESSAGES, {})
+    assert transport.requests == 1 and ollama.stats()["retried"] == 0
+    assert endpoint_stats(ollama)["breaker"] == "closed"  # The server answered, so it is up
+
+
+def test_the_deadline_covers_every_attempt():
+    transport = ScriptedTransport(delays=(10.0,))
+    ollama = client(transport, deadline=0.2, retries=5)
+    start = time.monotonic()
+    with pytest.raises(httpx.TimeoutException):
+        ollama.chat("m", MESSAGES, {})
+    assert time.monotonic() - start < 1.0
+    assert endpoint_stats(ollama)["deadline_exceeded"] >= 1
+
+
+def test_the_breaker_opens_then_a_probe_closes_it():
+    transport = ScriptedTransport(statuses=(503, 503, 200))
+    ollama = client(transport, retries=0, deadline=5, breaker_failures=2, breaker_cooldown=0.2)
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            ollama.chat("m", MESSAGES, {})
+    assert endpoint_stats(ollama)["breaker"] == "open"
+
+    start = time.monotonic()
+    assert ollama.chat("m", MESSAGES, {}) == REPLY  # Held for the cooldown, then sent as the probe
+    assert time.monotonic() - start >= 0.1
+    stats = endpoint_stats(ollama)
+    assert (stats["breaker"], stats["breaker_opened"], stats["held"]) == ("closed", 1, 1)
+
+
+def test_a_call_held_past_its_deadline_is_rejected():
+    ollama = client(ScriptedTransport(statuses=(503,)), retries=0, deadline=0.1, breaker_failures=1,
+                    breaker_cooldown=10)
+    with pytest.raises(httpx.HTTPStatusError):
+        ollama.chat("m", MESSAGES, {})
+    with pytest.raises(CircuitOpenError):
+        ollama.chat("m", MESSAGES, {})
+    assert endpoint_stats(ollama)["rejected"] == 1
+
+
+def test_the_losing_hedge_is_cancelled():
+    transport = ScriptedTransport(delays=(10.0, 0.0))
+    ollama = client(transport, hedge_after=0.05)
+
+    async def main():
+        reply = await ollama.achat("m", MESSAGES, {})
+        await asyncio.sleep(0.01)  # Let the cancelled primary request unwind
+        await ollama.aclose()
+        return reply
+
+    assert asyncio.run(main()) == REPLY
+    assert (transport.requests, transport.cancelled) == (2, 1)
+    stats = endpoint_stats(ollama)
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_close_closes_the_async_pools_of_live_loops():
+    ollama = client(ScriptedTransport())
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(ollama.achat("m", MESSAGES, {})) == REPLY
+        pool = ollama._async_clients[loop]
+        ollama.close()
+        assert pool.is_closed and not ollama._async_clients
+    finally:
+        loop.close()
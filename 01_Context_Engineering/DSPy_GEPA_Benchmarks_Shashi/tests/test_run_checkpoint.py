@@ -0,0 +1,40 @@
+"""RunCheckpoint: finished steps and programs are reused only under the key they were computed with"""
+
+import dspy
+
+from run_checkpoint import RunCheckpoint
+
+
+def test_steps_are_reused_across_attempts(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    checkpoint.finish("judge_baseline", 50.0)
+    resumed = RunCheckpoint(str(tmp_path))
+    assert resumed.done("judge_baseline") and resumed.result("judge_baseline") == 50.0
+    assert not resumed.done("judge_fewshot")
+
+
+def test_steps_scored_by_another_judge_are_not_done(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    checkpoint.finish("comedian_baseline", 25.0, depends_on="fewshot-judge")
+    resumed = RunCheckpoint(str(tmp_path))
+    assert resumed.done("comedian_baseline", "fewshot-judge")
+    assert not resumed.done("comedian_baseline", "optimized-judge")
+    assert not resumed.done("comedian_baseline")
+
+    resumed.finish("comedian_baseline", 75.0, depends_on="optimized-judge")
+    assert RunCheckpoint(str(tmp_path)).done("comedian_baseline", "optimized-judge")
+
+
+def test_programs_and_gepa_logs_are_kept_per_key(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    program = dspy.Predict("topic -> joke")
+    program.signature = program.signature.with_instructions("Be funny.")
+    checkpoint.save_program("comedian", program, depends_on="fewshot-judge")
+
+    resumed = RunCheckpoint(str(tmp_path))
+    base = dspy.Predict("topic -> joke")
+    assert resumed.load_program("comedian", base, None, "optimized-judge") is None
+    loaded = resumed.load_program("comedian", base, None, "fewshot-judge")
+    assert loaded.signature.instructions == "Be funny."
+    assert resumed.gepa_dir("comedian", "fewshot-judge") != resumed.gepa_dir("comedian", "optimized-judge")
+    assert resumed.gepa_dir("audience").endswith("audience")
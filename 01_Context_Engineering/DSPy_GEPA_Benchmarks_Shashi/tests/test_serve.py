@@ -0,0 +1,60 @@
+"""serve.py: micro-batching merges duplicate requests, and runs' cached replies are served"""
+
+import asyncio
+
+import dspy
+
+from lm_cache import ResponseCache
+from program_artifact import describe_program, load_artifact, save_artifact
+from serve import MicroBatcher, ProgramServer, ServeStats
+from stub_lm import StubLM
+
+
+class CountingServer:
+    def __init__(self):
+        self.calls = []
+
+    async def run(self, name, inputs):
+        self.calls.append((name, inputs))
+        await asyncio.sleep(0.01)
+        return {"echo": inputs["topic"]}, False
+
+
+def test_duplicate_requests_in_a_window_share_one_call():
+    server, stats = CountingServer(), ServeStats()
+    batcher = MicroBatcher(server, stats, window=0.05, max_batch=16)
+
+    async def main():
+        requests = [{"topic": "AI"}, {"topic": "AI"}, {"topic": "Cats"}, {"topic": "AI"}]
+        return await asyncio.gather(*(batcher.submit("comedian", inputs) for inputs in requests))
+
+    results = asyncio.run(main())
+    assert [outputs["echo"] for outputs, _ in results] == ["AI", "AI", "Cats", "AI"]
+    assert sorted(inputs["topic"] for _, inputs in server.calls) == ["AI", "Cats"]
+    summary = stats.summary()
+    assert (summary["batches"], summary["mean_batch"], summary["coalesced"]) == (1, 4.0, 2)
+
+
+def test_a_full_batch_is_dispatched_without_waiting_for_the_window():
+    server, stats = CountingServer(), ServeStats()
+    batcher = MicroBatcher(server, stats, window=60, max_batch=2)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(
+            batcher.submit("comedian", {"topic": "a"}), batcher.submit("comedian", {"topic": "b"})), 5)
+
+    assert len(asyncio.run(main())) == 2
+
+
+def test_replies_cached_by_a_run_are_served_from_the_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    lm = StubLM("stub:s", response_cache=cache, temperature=1.0, max_tokens=100)
+    program = dspy.Predict("topic -> joke")
+    program.set_lm(lm)
+    with dspy.context(adapter=dspy.ChatAdapter()):
+        joke = program(topic="AI").joke
+    path = save_artifact(str(tmp_path / "programs.json"), {"comedian": describe_program(program)})
+
+    server = ProgramServer(load_artifact(path), cache)
+    outputs, cache_hit = asyncio.run(server.run("comedian", {"topic": "AI"}))
+    assert cache_hit and outputs == {"joke": joke}
@@ -0,0 +1,30 @@
+"""CLI startup stays light: --help and importing the tutorial module must not load DSPy or LiteLLM"""
+
+import os
+import subprocess
+import sys
+
+from import_profile import heavy_imports, profile_command
+
+DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(DIRECTORY, "evaluator_optimizer_dspy.py")
+
+
+def test_help_does_not_import_dspy():
+    returncode, records = profile_command([SCRIPT, "--help"], stdout=subprocess.DEVNULL)
+    assert returncode == 0
+    assert records, "no -X importtime output"
+    modules = {record["module"].split(".")[0] for record in records}
+    assert not modules & {"dspy", "litellm"}
+    assert not heavy_imports(records)
+
+
+def test_importing_module_does_not_import_dspy():
+    code = (
+        "import sys, evaluator_optimizer_dspy\n"
+        "print(' '.join(sorted({'dspy', 'litellm'} & {name.split('.')[0] for name in sys.modules})))"
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", code], cwd=DIRECTORY, capture_output=True, text=True, check=True
+    )
+    assert process.stdout.strip() == ""
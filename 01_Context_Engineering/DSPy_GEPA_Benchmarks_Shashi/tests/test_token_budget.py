@@ -0,0 +1,69 @@
+"""TokenBudget: budgets learned per predictor, and a truncated reply retried without its budget"""
+
+from stub_lm import StubLM
+from token_budget import COMPLETED_MARKER, TokenBudget, needed_tokens, signature_key
+
+SYSTEM = (
+    "Your input fields are:\n1. `topic` (str): The topic\n"
+    "Your output fields are:\n1. `joke` (str): The joke\n"
+    "All interactions will be structured in the following way..."
+)
+MESSAGES = [{"role": "system", "content": SYSTEM}, {"role": "user", "content": "[[ ## topic ## ]]\nAI"}]
+REPLY = f"[[ ## joke ## ]]\nAI joke\n\n{COMPLETED_MARKER}"
+
+
+def result(tokens, done_reason="stop", content=REPLY):
+    return {"message": {"content": content}, "eval_count": tokens, "done_reason": done_reason,
+            "eval_duration": tokens * 10_000_000}
+
+
+def learned(budget, tokens=40, model="m"):
+    for _ in range(budget.min_samples):
+        plan = budget.plan(model, MESSAGES, {"max_tokens": 4000})
+        assert plan.budget is None
+        budget.record(plan, result(tokens))
+    return budget
+
+
+def test_signature_key_and_needed_tokens():
+    assert signature_key(MESSAGES) == "topic -> joke"
+    assert signature_key([{"role": "user", "content": "hi"}]) is None
+    # A reply that runs on past the marker only needed the tokens up to it
+    assert needed_tokens(REPLY + " and then some more rambling " * 3, 100) < 50
+    assert needed_tokens("no marker", 100) == 100
+
+
+def test_budget_applies_after_min_samples_with_a_completed_stop():
+    budget = learned(TokenBudget(headroom=1.5, min_samples=3, min_tokens=8))
+    plan = budget.plan("m", MESSAGES, {"max_tokens": 4000, "stop": "END"})
+    assert plan.params["max_tokens"] == 60
+    assert plan.params["stop"] == ["END", COMPLETED_MARKER]
+    assert plan.fallback == {"max_tokens": 4000, "stop": ["END", COMPLETED_MARKER]}
+    # Other predictors, and prompts without a ChatAdapter system message, keep their own limits
+    assert budget.plan("other-model", MESSAGES, {"max_tokens": 4000}).budget is None
+    assert budget.plan("m", MESSAGES[1:], {"max_tokens": 4000}).budget is None
+
+
+class FakeClient:
+    """Replies with 50 tokens, cut off at max_tokens"""
+
+    def __init__(self):
+        self.calls = []
+
+    def chat(self, model, messages, params):
+        self.calls.append(params)
+        if params.get("max_tokens", 4000) < 50:
+            return result(params["max_tokens"], done_reason="length", content="[[ ## joke ## ]]\nAI jo")
+        return result(50)
+
+
+def test_truncated_reply_is_retried_with_the_original_limits():
+    budget = learned(TokenBudget(headroom=1.0, min_samples=3, min_tokens=8), tokens=30, model="stub:s")
+    lm = StubLM("stub:s", token_budget=budget)
+    lm.client = FakeClient()
+
+    reply = lm._chat(MESSAGES, {"max_tokens": 4000})
+    assert reply["done_reason"] == "stop" and reply["message"]["content"] == REPLY
+    assert [params["max_tokens"] for params in lm.client.calls] == [30, 4000]
+    stats = budget.stats()["stub:s: topic -> joke"]
+    assert stats["truncated"] == 1 and stats["truncation_rate"] == 1.0 and stats["budgeted_calls"] == 1
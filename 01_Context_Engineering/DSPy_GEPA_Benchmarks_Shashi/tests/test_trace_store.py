@@ -0,0 +1,57 @@
+"""Trace store: rows stream to an Arrow file in batches and read back by column"""
+
+from types import SimpleNamespace
+
+import dspy
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from trace_store import TraceWriter, read_traces, worst_examples  # noqa: E402
+
+
+def joke(i):
+    return dspy.Example(topic=f"topic {i % 3}", joke=f"joke {i}", funny=i % 2 == 0).with_inputs("topic", "joke")
+
+
+def test_rows_are_written_in_batches_and_read_back(tmp_path):
+    path = str(tmp_path / "traces.arrow")
+    writer = TraceWriter(path, batch_size=4)
+    program = dspy.Predict("topic, joke -> funny: bool")
+    results = [(joke(i), dspy.Prediction(funny=True), float(i % 2 == 0)) for i in range(10)]
+    writer.record_evaluation("audience", program, results)
+    assert writer.stats()["batches"] == 2  # Two full batches, two rows buffered
+    writer.close()
+
+    stats = writer.stats()
+    assert (stats["rows"], stats["batches"]) == (10, 3)
+    # Only the low-cardinality columns are interned; examples and fields are plain strings
+    assert stats["interned"] == {"source": 1, "program": 1, "candidate": 1, "instructions": 1, "topic": 3}
+
+    table = read_traces(path)
+    assert table.num_rows == 10
+    assert str(table.schema.field("example").type) == "string"
+    assert str(table.schema.field("topic").type).startswith("dictionary")
+    assert table.column("topic").to_pylist() == [f"topic {i % 3}" for i in range(10)]
+    assert len(set(table.column("example").to_pylist())) == 10
+
+
+def test_dictionaries_grow_across_batches_and_gepa_rows(tmp_path):
+    path = str(tmp_path / "traces.arrow")
+    writer = TraceWriter(path, batch_size=2)
+    program = dspy.Predict("topic, joke -> funny: bool")
+    other = dspy.Predict("topic, joke -> funny: bool")
+    other.signature = other.signature.with_instructions("Be strict.")
+    writer.record_evaluation("audience", program, [(joke(i), dspy.Prediction(funny=True), 1.0) for i in range(3)])
+    valset = [joke(i) for i in range(3)]
+    detailed = SimpleNamespace(candidates=[program, other], val_subscores=[{0: 1.0, 1: 0.0}, {2: 0.5}])
+    writer.record_gepa("audience", detailed, valset)
+    writer.close()
+
+    table = read_traces(path)
+    assert table.column("source").to_pylist() == ["devset"] * 3 + ["gepa_valset"] * 3
+    assert table.column("instructions").to_pylist()[-1] == "Be strict."
+    assert table.column("prediction").to_pylist()[3:] == [None] * 3
+
+    worst = worst_examples(path, k=1, source="gepa_valset")
+    assert [rows[0]["score"] for rows in worst.values()] == [0.0, 0.5]
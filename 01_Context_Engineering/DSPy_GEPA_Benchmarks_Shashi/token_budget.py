@@ -0,0 +1,178 @@
+"""
+Per-predictor generation limits learned from observed output lengths.
+
+Both LMs are created with max_tokens=4000, but a Comedian reply is one joke and
+an Audience reply is a short reasoning plus a boolean. A small model that
+doesn't stop after the `[[ ## completed ## ]]` marker keeps decoding until it
+hits the limit, which costs seconds per call.
+
+TokenBudget tracks the completion lengths of every predictor, keyed by model and
+by the input/output fields listed in the ChatAdapter system message (so a
+predictor keeps its budget while GEPA rewrites its instructions). The first
+`min_samples` calls of a predictor run unchanged. They measure how many tokens
+a reply needs up to the completed marker, and how long an unlimited call takes
+to decode. After that, every call gets:
+
+- `max_tokens` set to the p99 of the needed lengths times `headroom`
+- a stop sequence at `[[ ## completed ## ]]`, so Ollama stops right after the
+  last output field
+
+A reply cut off by the budget (done_reason "length") is retried once with the
+original limits, so budgets never cost accuracy, and the truncation rate is
+reported. The decode time saved is estimated per predictor: the mean decode time
+of the unlimited calls minus what the budgeted calls (retries included) took.
+
+This module deliberately does not import DSPy.
+"""
+
+import math
+import threading
+from collections import defaultdict, deque
+
+from instrumentation import percentile
+
+COMPLETED_MARKER = "[[ ## completed ## ]]"
+OUTPUT_FIELDS_HEADER = "Your output fields are:"
+
+
+def _field_names(text):
+    """Field names from a ChatAdapter field list ("1. `topic` (str): ...")"""
+    names = []
+    for line in text.splitlines():
+        number, _, rest = line.partition(". ")
+        if number.isdigit() and rest.startswith("`"):
+            names.append(rest[1:].split("`", 1)[0])
+    return names
+
+
+def signature_key(messages):
+    """"inputs -> outputs" from a request's ChatAdapter/JSONAdapter system message, or None"""
+    if not messages or messages[0].get("role") != "system":
+        return None
+    system = str(messages[0].get("content", ""))
+    if OUTPUT_FIELDS_HEADER not in system:
+        return None
+    inputs, _, rest = system.partition(OUTPUT_FIELDS_HEADER)
+    outputs = rest.split("All interactions", 1)[0]
+    return f"{', '.join(_field_names(inputs))} -> {', '.join(_field_names(outputs))}"
+
+
+def needed_tokens(content, completion_tokens):
+    """Completion tokens a reply needed to reach the completed marker (all of them if it has none)"""
+    index = content.find(COMPLETED_MARKER)
+    if index == -1 or not content:
+        return completion_tokens
+    return math.ceil(completion_tokens * (index + len(COMPLETED_MARKER)) / len(content))
+
+
+def decode_seconds(result):
+    """Seconds an Ollama /api/chat result spent generating its completion"""
+    return result.get("eval_duration", 0) / 1e9
+
+
+class _Plan:
+    __slots__ = ("key", "params", "fallback", "budget")
+
+    def __init__(self, key, params, fallback=None, budget=None):
+        self.key = key
+        self.params = params
+        self.fallback = fallback  # Params to retry with when the budget truncates the reply
+        self.budget = budget
+
+
+def _counters():
+    return {
+        "calls": 0,
+        "learning_calls": 0,
+        "learning_tokens": 0,
+        "learning_seconds": 0.0,
+        "budgeted_calls": 0,
+        "budgeted_tokens": 0,
+        "budgeted_seconds": 0.0,
+        "truncated": 0,
+    }
+
+
+class TokenBudget:
+    """Learns a max_tokens budget per (model, signature) from the lengths it observes
+
+    Args:
+        headroom (float): Budget as a multiple of the p99 needed length
+        min_samples (int): Calls observed with the original limits before a predictor gets a budget
+        min_tokens (int): Smallest budget ever set
+        window (int): Most recent lengths kept per predictor
+    """
+
+    def __init__(self, headroom=1.5, min_samples=20, min_tokens=32, window=2000):
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.min_tokens = min_tokens
+        self._lengths = defaultdict(lambda: deque(maxlen=window))
+        self._counters = defaultdict(_counters)
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def limit(self, key):
+        """Current budget for a predictor, or None while it is still being observed"""
+        with self._lock:
+            lengths = list(self._lengths.get(key, ()))
+        if len(lengths) < self.min_samples:
+            return None
+        return max(self.min_tokens, math.ceil(percentile(lengths, 99) * self.headroom))
+
+    def plan(self, model, messages, params):
+        """Params for one request: budgeted and with the completed stop once the predictor has a budget"""
+        signature = signature_key(messages)
+        if signature is None:
+            return _Plan(None, params)
+        key = f"{model}: {signature}"
+        budget = self.limit(key)
+        max_tokens = params.get("max_tokens")
+        if budget is None or (max_tokens and budget >= max_tokens):
+            return _Plan(key, params)
+        stop = params.get("stop") or []
+        stop = [stop] if isinstance(stop, str) else list(stop)
+        fallback = {**params, "stop": [*stop, COMPLETED_MARKER]}
+        return _Plan(key, {**fallback, "max_tokens": budget}, fallback, budget)
+
+    def record(self, plan, result, retry=False):
+        """Record a result of plan's request; returns True if the budget truncated it (retry with plan.fallback)"""
+        if plan.key is None:
+            return False
+        tokens = result.get("eval_count", 0)
+        seconds = decode_seconds(result)
+        truncated = plan.budget is not None and not retry and result.get("done_reason") == "length"
+        with self._lock:
+            counters = self._counters[plan.key]
+            counters["calls"] += not retry
+            if plan.budget is None:
+                counters["learning_calls"] += 1
+                counters["learning_tokens"] += tokens
+                counters["learning_seconds"] += seconds
+            else:
+                counters["budgeted_calls"] += not retry
+                counters["budgeted_tokens"] += tokens
+                counters["budgeted_seconds"] += seconds
+                counters["truncated"] += truncated
+            if not truncated:
+                self._lengths[plan.key].append(needed_tokens(result["message"]["content"], tokens))
+        return truncated
+
+    def stats(self):
+        """Per-predictor budgets, truncation rates and estimated decode time saved"""
+        with self._lock:
+            counters = {key: dict(values) for key, values in self._counters.items()}
+            lengths = {key: list(values) for key, values in self._lengths.items()}
+        stats = {}
+        for key, c in counters.items():
+            learning_mean = c["learning_seconds"] / c["learning_calls"] if c["learning_calls"] else 0.0
+            stats[key] = {
+                **c,
+                "budget": self.limit(key),
+                "p99_tokens": percentile(lengths.get(key, []), 99),
+                "truncation_rate": c["truncated"] / c["budgeted_calls"] if c["budgeted_calls"] else 0.0,
+                "seconds_saved": c["budgeted_calls"] * learning_mean - c["budgeted_seconds"],
+            }
+        return stats
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Append-only columnar store of evaluation traces and GEPA per-example scores.
+
+dspy.Evaluate and GEPA's track_stats keep every prediction, reasoning string and
+feedback as Python objects until the run ends. A trace store moves them to disk
+instead: each finished evaluation (and each GEPA phase's per-candidate validation
+scores) is appended to one Arrow IPC stream file, in record batches of at most
+`batch_size` rows, and the writer itself only buffers the current batch. An
+evaluation's own results list is still held by dspy.Evaluate until it returns;
+rows are recorded from it, not from the metric while the evaluation runs.
+
+    source        "devset" (an evaluation) or "gepa_valset" (GEPA's validation scores)
+    program       "audience" or "comedian"
+    candidate     program fingerprint (instructions, demos, models)
+    instructions  the candidate's instructions
+    example       example fingerprint
+    topic         the example's topic
+    fields        the example's fields as JSON
+    prediction    the program's outputs as JSON (null for GEPA rows)
+    score         metric score
+    feedback      the metric's feedback, if it returned any
+
+The low-cardinality columns (source, program, candidate, instructions, topic) are
+dictionary-encoded: each distinct value is written once, as a dictionary delta
+when it first appears, and rows refer to it by index. example, fields, prediction
+and feedback hold one value per row and are plain strings, so the writer keeps
+no per-example state. The stream stays readable up to its last complete batch if
+the run is interrupted.
+
+Reading memory-maps the file, so analysis touches only the batches it scans:
+
+    table = read_traces("traces.arrow")            # zero-copy pyarrow.Table
+    worst_examples("traces.arrow", k=5)            # {candidate: 5 lowest-scoring rows}
+    python trace_store.py traces.arrow --worst 5   # the same, as markdown tables
+
+Requires pyarrow (`pip install pyarrow`). This module deliberately does not import DSPy.
+"""
+
+import argparse
+import heapq
+import json
+import sys
+import threading
+
+from incremental import example_fingerprint
+from judge_memo import program_fingerprint
+
+DICTIONARY_COLUMNS = ("source", "program", "candidate", "instructions", "topic")
+STRING_COLUMNS = ("example", "fields", "prediction", "feedback")
+COLUMNS = (*DICTIONARY_COLUMNS, *STRING_COLUMNS, "score")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401 (loads pa.ipc)
+    except ImportError as e:
+        raise ImportError("Trace stores require pyarrow: pip install pyarrow") from e
+    return pa
+
+
+def trace_schema():
+    """Arrow schema of a trace store"""
+    pa = _pyarrow()
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [pa.field(name, dictionary) for name in DICTIONARY_COLUMNS]
+        + [pa.field(name, pa.string()) for name in STRING_COLUMNS]
+        + [pa.field("score", pa.float64())]
+    )
+
+
+def _json(value):
+    if value is None:
+        return None
+    data = value.toDict() if hasattr(value, "toDict") else value
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _instructions(program):
+    return "\n\n".join(predictor.signature.instructions for _, predictor in program.named_predictors())
+
+
+class _Interner:
+    """Append-only string dictionary: each distinct value gets the next index
+
+    dictionary() returns the values as an Arrow array, converting only the values
+    added since the previous call.
+    """
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+        self._array = None
+
+    def intern(self, value):
+        if value is None:
+            return None
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def dictionary(self, pa):
+        written = len(self._array) if self._array is not None else 0
+        if self._array is None or written < len(self.values):
+            delta = pa.array(self.values[written:], pa.string())
+            self._array = delta if self._array is None else pa.concat_arrays([self._array, delta])
+        return self._array
+
+
+class TraceWriter:
+    """Streams trace rows to an Arrow IPC file (overwritten if it exists)
+
+    Args:
+        path (str): Trace file to write
+        batch_size (int): Rows buffered in memory before they are written as one record batch
+    """
+
+    def __init__(self, path, batch_size=1024):
+        pa = _pyarrow()
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = 0
+        self.batches = 0
+        self.bytes = 0
+        self._schema = trace_schema()
+        self._interners = {name: _Interner() for name in DICTIONARY_COLUMNS}
+        self._buffer = {name: [] for name in COLUMNS}
+        self._sink = pa.OSFile(path, "wb")
+        # Dictionaries only grow, so each batch writes just the strings that are new since the last one
+        options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        self._writer = pa.ipc.new_stream(self._sink, self._schema, options=options)
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def record(self, source, program, candidate, instructions, example, topic, fields, prediction, score,
+               feedback=None):
+        """Buffer one row; a full buffer is written as a record batch"""
+        row = {
+            "source": source, "program": program, "candidate": candidate, "instructions": instructions,
+            "example": example, "topic": topic, "fields": fields, "prediction": prediction,
+            "feedback": feedback, "score": score,
+        }
+        with self._lock:
+            for name in DICTIONARY_COLUMNS:
+                self._buffer[name].append(self._interners[name].intern(row[name]))
+            for name in (*STRING_COLUMNS, "score"):
+                self._buffer[name].append(row[name])
+            if len(self._buffer["score"]) >= self.batch_size:
+                self._write_batch()
+
+    def record_evaluation(self, name, program, results):
+        """Append an evaluation's (example, prediction, score) results for one program"""
+        candidate = program_fingerprint(program)
+        instructions = _instructions(program)
+        for example, prediction, score in results:
+            self.record(
+                "devset", name, candidate, instructions, example_fingerprint(example),
+                getattr(example, "topic", None), _json(example), _json(prediction),
+                float(getattr(score, "score", score)), getattr(score, "feedback", None),
+            )
+
+    def record_gepa(self, name, detailed_results, valset):
+        """Append the validation score of every GEPA candidate on every validation example it was scored on"""
+        examples = [(example_fingerprint(example), getattr(example, "topic", None), _json(example))
+                    for example in valset]
+        for program, subscores in zip(detailed_results.candidates, detailed_results.val_subscores):
+            candidate = program_fingerprint(program)
+            instructions = _instructions(program)
+            for val_id, score in subscores.items():
+                self.record("gepa_valset", name, candidate, instructions, *examples[val_id], None, float(score))
+
+    def evaluation_tracer(self, name):
+        """trace(program, results) callback recording evaluations of program `name`"""
+        return lambda program, results: self.record_evaluation(name, program, results)
+
+    def gepa_tracer(self, name):
+        """trace(detailed_results, valset) callback recording the GEPA phase of program `name`"""
+        return lambda detailed_results, valset: self.record_gepa(name, detailed_results, valset)
+
+    def _write_batch(self):
+        pa = _pyarrow()
+        if not self._buffer["score"]:
+            return
+        arrays = []
+        for name in DICTIONARY_COLUMNS:
+            dictionary = self._interners[name].dictionary(pa)
+            indices = pa.array(self._buffer[name], pa.int32())
+            arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+        arrays += [pa.array(self._buffer[name], pa.string()) for name in STRING_COLUMNS]
+        arrays.append(pa.array(self._buffer["score"], pa.float64()))
+        self._writer.write_batch(pa.record_batch(arrays, schema=self._schema))
+        self.rows += len(self._buffer["score"])
+        self.batches += 1
+        self.bytes = self._sink.tell()
+        self._buffer = {name: [] for name in COLUMNS}
+
+    def flush(self):
+        """Write any buffered rows"""
+        with self._lock:
+            self._write_batch()
+
+    def close(self):
+        """Write buffered rows and end the stream"""
+        with self._lock:
+            self._write_batch()
+            self._writer.close()
+            self.bytes = self._sink.tell()
+            self._sink.close()
+
+    def stats(self):
+        """Rows and batches written, file size and distinct values per dictionary column"""
+        with self._lock:
+            return {
+                "path": self.path,
+                "rows": self.rows,
+                "batches": self.batches,
+                "bytes": self.bytes,
+                "interned": {name: len(interner.values) for name, interner in self._interners.items()},
+            }
+
+
+def open_traces(path):
+    """Record batch reader over a memory-mapped trace file"""
+    pa = _pyarrow()
+    return pa.ipc.open_stream(pa.memory_map(path, "r"))
+
+
+def read_traces(path):
+    """A trace file as a pyarrow.Table backed by the memory map (nothing is copied)"""
+    return open_traces(path).read_all()
+
+
+def worst_examples(path, k=5, program=None, source=None):
+    """The k lowest-scoring rows of each candidate, scanning the file one batch at a time
+
+    Args:
+        path (str): Trace file
+        k (int): Rows kept per candidate
+        program (str): Only rows of this program
+        source (str): Only "devset" or "gepa_valset" rows
+
+    Returns:
+        dict: {candidate: rows sorted by ascending score}; only the selected rows are materialized
+    """
+    heaps = {}
+    order = 0
+    for batch in open_traces(path):
+        candidates = batch.column("candidate").to_pylist()
+        scores = batch.column("score").to_pylist()
+        programs = batch.column("program").to_pylist() if program else None
+        sources = batch.column("source").to_pylist() if source else None
+        for i, (candidate, score) in enumerate(zip(candidates, scores)):
+            if score is None or (programs and programs[i] != program) or (sources and sources[i] != source):
+                continue
+            heap = heaps.setdefault(candidate, [])
+            # Max-heap on score via negation: heap[0] is the best of the k worst rows kept so far
+            if len(heap) < k or -heap[0][0] > score:
+                row = batch.slice(i, 1).to_pylist()[0]
+                order += 1
+                if len(heap) < k:
+                    heapq.heappush(heap, (-score, -order, row))
+                else:
+                    heapq.heapreplace(heap, (-score, -order, row))
+    return {candidate: [row for *_, row in sorted(heap, key=lambda e: (-e[0], -e[1]))]
+            for candidate, heap in heaps.items()}
+
+
+def render_worst(worst, width=60):
+    """Markdown tables of worst_examples() output"""
+    def cell(value):
+        text = " ".join(str(value if value is not None else "").split()).replace("|", "\\|")
+        return text if len(text) <= width else text[:width - 1] + "…"
+
+    lines = []
+    for candidate, rows in worst.items():
+        first = rows[0]
+        lines += [f"### {first['program']} {candidate}", "", f"Instructions: {cell(first['instructions'])}", "",
+                  "| Score | Source | Topic | Prediction | Feedback |",
+                  "|-------|--------|-------|------------|----------|"]
+        for row in rows:
+            lines.append(f"| {row['score']:.2f} | {row['source']} | {cell(row['topic'])} | "
+                         f"{cell(row['prediction'])} | {cell(row['feedback'])} |")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query a trace store written with --traces")
+    parser.add_argument("traces", help="Trace file (.arrow)")
+    parser.add_argument("--worst", type=int, default=5, help="Lowest-scoring rows per candidate (default: 5)")
+    parser.add_argument("--program", default=None, help="Only this program (audience or comedian)")
+    parser.add_argument("--source", choices=("devset", "gepa_valset"), default=None, help="Only rows from this source")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(render_worst(worst_examples(args.traces, args.worst, args.program, args.source)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())